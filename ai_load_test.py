@@ -0,0 +1,150 @@
+"""AIProcessor yük testi: eşzamanlılık düzeylerinde verim ve kuyruk gecikmesi
+
+Her düzeyde N farklı yapay görüntü, düzey kadar eşzamanlı istemci
+tarafından aynı AIProcessor ile (tek oturum, max_concurrent = düzey)
+işlenir; her istemci isteği bitince sıradakini gönderir, önbellek
+kapalıdır. Tamamlanan istek/sn, gecikme yüzdelikleri (p50/p95/p99/en
+büyük), başarısız istekler, HTTP istek ve yeniden deneme sayıları
+raporlanır. --url verilmezse
+ai_server_stub sunucusu aynı süreçte ayrı bir thread'de başlatılır ve
+hata oranları buradan ayarlanır; çıktılar girdinin ters Canny haritasıyla
+karşılaştırılarak doğrulanır.
+
+Örnek:
+    python ai_load_test.py --requests 64 --concurrency 1 4 16 --run-time 0.5 --error-rate 0.1
+    python ai_load_test.py --url http://127.0.0.1:8766/v1 --requests 32 --concurrency 8
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+
+import cv2
+import numpy as np
+
+from ai_server_stub import StubServer, add_stub_arguments, stub_from_args
+from core.ai_processor import AIProcessor
+
+
+def synthetic_images(count, size):
+    """Her isteğe ayrı görüntü: aynı içerik paylaşılan tahmine düşmesin"""
+    rng = np.random.default_rng(0)
+    images = []
+    for _ in range(count):
+        image = np.full((size, size, 3), 255, np.uint8)
+        for _ in range(8):
+            center = tuple(int(v) for v in rng.integers(0, size, 2))
+            radius = int(rng.integers(size // 16, size // 3))
+            color = tuple(int(v) for v in rng.integers(0, 200, 3))
+            cv2.circle(image, center, radius, color, int(rng.integers(1, 4)))
+        images.append(image)
+    return images
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if values else float("nan")
+
+
+async def run_level(api_url, images, concurrency, poll_interval, verify):
+    """Tüm görüntüleri tek düzeyde işle; satır için ölçümleri döndür"""
+    latencies = []
+    failures = 0
+    mismatches = 0
+    processor = AIProcessor(api_url, "stub", use_cache=False, max_concurrent=concurrency,
+                            poll_interval=poll_interval)
+
+    async def client(queue):
+        # Kapalı döngü: her istemci bir istek bitince sıradakini gönderir
+        nonlocal failures, mismatches
+        while not queue.empty():
+            image = queue.get_nowait()
+            start = time.perf_counter()
+            result = await processor.process_async(image)
+            if result is None:
+                failures += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+            if verify:
+                expected = cv2.bitwise_not(cv2.Canny(image, 100, 200))
+                mismatches += not np.array_equal(result[:, :, 0], expected)
+
+    queue = asyncio.Queue()
+    for image in images:
+        queue.put_nowait(image)
+    start = time.perf_counter()
+    async with processor:
+        await asyncio.gather(*(client(queue) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "completed": len(latencies),
+        "failed": failures,
+        "mismatched": mismatches,
+        "elapsed_s": elapsed,
+        "throughput": len(latencies) / elapsed,
+        "p50_ms": 1000 * percentile(latencies, 50),
+        "p95_ms": 1000 * percentile(latencies, 95),
+        "p99_ms": 1000 * percentile(latencies, 99),
+        "max_ms": 1000 * max(latencies, default=float("nan")),
+        **processor.stats
+    }
+
+
+def print_rows(rows):
+    print(f"{'eşzamanlı':>10}{'istek/sn':>10}{'p50':>9}{'p95':>9}{'p99':>9}{'en büyük':>10}"
+          f"{'başarısız':>11}{'HTTP':>7}{'yeniden':>9}")
+    for row in rows:
+        print(f"{row['concurrency']:>10}{row['throughput']:>10.2f}"
+              f"{row['p50_ms']:>7.0f}ms{row['p95_ms']:>7.0f}ms{row['p99_ms']:>7.0f}ms"
+              f"{row['max_ms']:>8.0f}ms{row['failed']:>11}{row['requests']:>7}{row['retries']:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AIProcessor yük testi")
+    parser.add_argument('--url', help="Tahmin API'si (verilmezse yerel sahte sunucu başlatılır)")
+    parser.add_argument('--requests', type=int, default=32, help="Düzey başına istek sayısı")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--size', type=int, default=256, help="Yapay görüntü boyutu")
+    parser.add_argument('--poll-interval', type=float, default=0.1,
+                        help="İlk durum sorgulama aralığı (sn)")
+    parser.add_argument('--json', help="Sonuçları bu dosyaya da yaz")
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+    # Yeniden denemeler uyarı olarak loglanır; rapor sayıları verir
+    logging.basicConfig(level=logging.CRITICAL)
+
+    server = None
+    api_url = args.url
+    if api_url is None:
+        server = StubServer(stub_from_args(args)).start()
+        api_url = server.api_url
+    images = synthetic_images(args.requests, args.size)
+
+    rows = []
+    try:
+        for concurrency in args.concurrency:
+            rows.append(asyncio.run(run_level(
+                api_url, images, concurrency, args.poll_interval, verify=server is not None
+            )))
+    finally:
+        if server is not None:
+            server.stop()
+
+    print_rows(rows)
+    if server is not None:
+        stats = server.stub.stats
+        print(f"sunucu: en çok {stats['peak_running']} eşzamanlı tahmin, "
+              f"{stats['errors']} adet 503, {stats['throttled']} adet 429, "
+              f"{stats['failed']} başarısız tahmin")
+        mismatched = sum(row["mismatched"] for row in rows)
+        if mismatched:
+            print(f"UYARI: {mismatched} çıktı girdiyle uyuşmuyor")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(rows, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
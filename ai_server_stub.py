@@ -0,0 +1,225 @@
+"""ControlNet tahmin servisinin yerine geçen yerel sunucu
+
+Tahmin oluşturma (POST /v1/predictions), durum sorgulama
+(GET /v1/predictions/<id>), iptal ve çıktı adresi akışını taklit eder.
+Tahmin run-time saniye içinde starting -> processing -> succeeded olur;
+çıktı girdi görüntüsünün ters Canny kenar haritasıdır, böylece istemci
+sonucu doğrulayabilir. Gecikme, 503/429 oranı ve başarısız tahmin oranı
+ayarlanabilir; sayaçlar GET /stats ile okunur. Gerçek servise ve
+maliyetine gerek kalmadan AIProcessor sınanır ve yük altında ölçülür.
+
+Örnek:
+    python ai_server_stub.py --port 8766 --run-time 2 --error-rate 0.1 --fail-rate 0.05
+    python ai_load_test.py --url http://127.0.0.1:8766/v1 --requests 64 --concurrency 1 4 16
+"""
+import argparse
+import asyncio
+import base64
+import itertools
+import random
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+from aiohttp import web
+
+
+class PredictionStub:
+    """Tahmin durumları ve hata enjeksiyonu; aiohttp uygulamasını kurar"""
+
+    def __init__(self, latency_ms=0.0, run_time=1.0, jitter=0.2, error_rate=0.0,
+                 throttle_rate=0.0, fail_rate=0.0, seed=None):
+        self.latency = latency_ms / 1000.0
+        self.run_time = run_time
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.fail_rate = fail_rate
+        self.random = random.Random(seed)
+        self.predictions = {}
+        self._ids = itertools.count(1)
+        self.stats = {"create": 0, "poll": 0, "output": 0, "cancel": 0,
+                      "errors": 0, "throttled": 0, "failed": 0, "peak_running": 0}
+
+    # ---------------------------------------------------------------- durum
+
+    def _running(self):
+        return sum(1 for p in self.predictions.values()
+                   if p["status"] in ("starting", "processing"))
+
+    def _update(self, prediction):
+        if prediction["status"] in ("starting", "processing"):
+            elapsed = time.perf_counter() - prediction["created"]
+            if elapsed >= prediction["duration"]:
+                prediction["status"] = "failed" if prediction["fail"] else "succeeded"
+            elif elapsed >= prediction["duration"] / 3:
+                prediction["status"] = "processing"
+
+    def _view(self, request, prediction_id):
+        prediction = self.predictions[prediction_id]
+        self._update(prediction)
+        base = f"http://{request.host}"
+        status = prediction["status"]
+        return {
+            "id": prediction_id,
+            "version": prediction["version"],
+            "status": status,
+            "error": "Enjekte edilen tahmin hatası" if status == "failed" else None,
+            "output": [f"{base}/files/{prediction_id}.png"] if status == "succeeded" else None,
+            "urls": {
+                "get": f"{base}/v1/predictions/{prediction_id}",
+                "cancel": f"{base}/v1/predictions/{prediction_id}/cancel"
+            }
+        }
+
+    async def _inject(self, kind):
+        """Gecikme ekle; olasılığa göre 503 ya da 429 döndür"""
+        self.stats[kind] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency * self.random.uniform(1 - self.jitter, 1 + self.jitter))
+        roll = self.random.random()
+        if roll < self.error_rate:
+            self.stats["errors"] += 1
+            raise web.HTTPServiceUnavailable(text="Enjekte edilen hata")
+        if roll < self.error_rate + self.throttle_rate:
+            self.stats["throttled"] += 1
+            raise web.HTTPTooManyRequests(headers={"Retry-After": "0.2"})
+
+    def _lookup(self, request):
+        prediction_id = request.match_info["id"]
+        if prediction_id not in self.predictions:
+            raise web.HTTPNotFound(text="Tahmin bulunamadı")
+        return prediction_id
+
+    # ---------------------------------------------------------------- uçlar
+
+    async def create(self, request):
+        await self._inject("create")
+        body = await request.json()
+        image = body.get("input", {}).get("image", "")
+        if not image.startswith("data:"):
+            raise web.HTTPUnprocessableEntity(text="input.image data URI olmalı")
+        prediction_id = f"p{next(self._ids)}"
+        fail = self.random.random() < self.fail_rate
+        self.stats["failed"] += fail
+        self.predictions[prediction_id] = {
+            "created": time.perf_counter(),
+            "duration": self.run_time * self.random.uniform(1 - self.jitter, 1 + self.jitter),
+            "version": body.get("version"),
+            "image": image,
+            "status": "starting",
+            "fail": fail
+        }
+        self.stats["peak_running"] = max(self.stats["peak_running"], self._running())
+        return web.json_response(self._view(request, prediction_id), status=201)
+
+    async def get(self, request):
+        await self._inject("poll")
+        return web.json_response(self._view(request, self._lookup(request)))
+
+    async def cancel(self, request):
+        prediction_id = self._lookup(request)
+        self.stats["cancel"] += 1
+        prediction = self.predictions[prediction_id]
+        self._update(prediction)
+        if prediction["status"] in ("starting", "processing"):
+            prediction["status"] = "canceled"
+        return web.json_response(self._view(request, prediction_id))
+
+    async def output(self, request):
+        await self._inject("output")
+        prediction = self.predictions[self._lookup(request)]
+        if prediction["status"] != "succeeded":
+            raise web.HTTPNotFound(text="Çıktı hazır değil")
+        data = base64.b64decode(prediction["image"].split(",", 1)[1])
+        image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        result = cv2.bitwise_not(cv2.Canny(image, 100, 200))
+        return web.Response(body=cv2.imencode(".png", result)[1].tobytes(), content_type="image/png")
+
+    async def get_stats(self, request):
+        return web.json_response({**self.stats, "running": self._running()})
+
+    def make_app(self):
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_post("/v1/predictions", self.create)
+        app.router.add_get("/v1/predictions/{id}", self.get)
+        app.router.add_post("/v1/predictions/{id}/cancel", self.cancel)
+        app.router.add_get("/files/{id}.png", self.output)
+        app.router.add_get("/stats", self.get_stats)
+        return app
+
+
+class StubServer:
+    """Sunucuyu ayrı bir thread'in olay döngüsünde çalıştırır (testler için)
+
+    İstemcinin döngüsüyle aynı döngüyü paylaşmadığından ölçülen gecikmeye
+    sunucunun işi karışmaz.
+    """
+
+    def __init__(self, stub: PredictionStub, port: int = 0):
+        self.stub = stub
+        self.port = port
+        self._loop = asyncio.new_event_loop()
+        self._runner = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+
+    @property
+    def api_url(self):
+        return f"http://127.0.0.1:{self.port}/v1"
+
+    def _serve(self):
+        asyncio.set_event_loop(self._loop)
+        self._runner = web.AppRunner(self.stub.make_app(), access_log=None)
+        self._loop.run_until_complete(self._runner.setup())
+        site = web.TCPSite(self._runner, "127.0.0.1", self.port)
+        self._loop.run_until_complete(site.start())
+        self.port = self._runner.addresses[0][1]
+        self._ready.set()
+        self._loop.run_forever()
+        self._loop.run_until_complete(self._runner.cleanup())
+
+    def start(self) -> "StubServer":
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def stop(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+
+def add_stub_arguments(parser):
+    """Sunucu ayarları; yük testi de aynı seçenekleri kullanır"""
+    parser.add_argument('--latency', type=float, default=20.0, help="İstek başına gecikme (ms)")
+    parser.add_argument('--run-time', type=float, default=1.0, help="Tahmin süresi (sn)")
+    parser.add_argument('--jitter', type=float, default=0.2,
+                        help="Gecikme ve tahmin süresindeki göreli sapma")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="503 döndürme olasılığı")
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help="429 döndürme olasılığı")
+    parser.add_argument('--fail-rate', type=float, default=0.0,
+                        help="Tahminin başarısız bitme olasılığı")
+    parser.add_argument('--seed', type=int)
+
+
+def stub_from_args(args) -> PredictionStub:
+    return PredictionStub(args.latency, args.run_time, args.jitter, args.error_rate,
+                          args.throttle_rate, args.fail_rate, args.seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Yerel ControlNet tahmin sunucusu")
+    parser.add_argument('--port', type=int, default=8766)
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    stub = stub_from_args(args)
+    print(f"http://127.0.0.1:{args.port}/v1 üzerinde tahmin servisi taklit ediliyor", file=sys.stderr)
+    web.run_app(stub.make_app(), host="127.0.0.1", port=args.port, print=None, access_log=None)
+    print(f"İstatistik: {stub.stats}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,241 @@
+"""Derin çizim modeli için çıkarım kiplerinin gecikme/doğruluk raporu
+
+Model verilmezse sabit tohumla rastgele ağırlıklar kullanılır; bu durumda
+doğruluk sayıları yalnızca sayısal sapmayı gösterir. --throughput ile
+toplama kuyruğunun grup boyutu 1-16 arasında verim (görüntü/sn) ölçülür;
+--hed eklenirse aynı ölçüm HED modeli için de yapılır. --runtimes torch
+ve ONNX (OpenCV DNN) çalışma yollarını ayrı süreçlerde başlatma süresi,
+en yüksek bellek, gecikme ve çıktı farkı açısından karşılaştırır; ONNX
+modeli yoksa --model ağırlıklarından aktarılır.
+
+torch yalnızca gereken kiplerde içe aktarılır; ONNX ölçüm süreci onu
+hiç yüklemez.
+
+Örnek:
+    python benchmark_inference.py --model models/apdrawing.pth foto1.jpg foto2.jpg
+    python benchmark_inference.py --throughput --count 32 --size 256 --hed
+    python benchmark_inference.py --runtimes --onnx models/apdrawing.onnx
+"""
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+BATCH_SIZES = (1, 2, 4, 8, 16)
+RUNTIMES = ("torch", "onnx")
+# İki çalışma yolu arasındaki en büyük fark (0-255 çıktı ölçeğinde)
+RUNTIME_TOLERANCE = 1
+
+
+def synthetic_images(count=2, size=512):
+    """Kenar ve doku içeren yapay test görüntüleri"""
+    rng = np.random.default_rng(0)
+    images = []
+    for _ in range(count):
+        image = cv2.GaussianBlur((rng.random((size, size, 3)) * 255).astype(np.uint8), (0, 0), 4)
+        for _ in range(12):
+            center = tuple(int(v) for v in rng.integers(0, size, 2))
+            color = tuple(int(v) for v in rng.integers(0, 255, 3))
+            cv2.circle(image, center, int(rng.integers(10, size // 4)), color, -1)
+        images.append(image)
+    return images
+
+
+def random_weights():
+    """Sabit tohumla rastgele APDrawing ağırlıkları (.pth yolu)"""
+    import torch
+    from core.deep_sketch_processor import APDrawingModel
+
+    torch.manual_seed(0)
+    model_path = os.path.join(tempfile.gettempdir(), "apdrawing_random.pth")
+    torch.save(APDrawingModel().state_dict(), model_path)
+    return model_path
+
+
+def peak_memory_mb():
+    """Bu sürecin en yüksek yerleşik belleği (VmHWM, MB)"""
+    try:
+        with open('/proc/self/status') as status:
+            hwm = next(line for line in status if line.startswith('VmHWM'))
+        return int(hwm.split()[1]) / 1024
+    except (OSError, StopIteration):
+        return float('nan')
+
+
+def probe_main(args, images):
+    """Tek çalışma yolunu temiz bir süreçte ölç; sonuç JSON olarak yazılır"""
+    start = time.perf_counter()
+    if args.probe == "torch":
+        from core.deep_sketch_processor import DeepSketchProcessor
+        processor = DeepSketchProcessor(compile_mode="script")
+    else:
+        from core.onnx_sketch_processor import OnnxSketchProcessor
+        processor = OnnxSketchProcessor()
+    imported = time.perf_counter()
+    if not processor.load_model(args.model):
+        sys.exit("Model yüklenemedi")
+    loaded = time.perf_counter()
+
+    outputs, timings = [], []
+    for image in images:
+        start_image = time.perf_counter()
+        for _ in range(args.runs):
+            result = processor.process_image(image)
+        timings.append((time.perf_counter() - start_image) / args.runs)
+        outputs.append(result)
+    np.savez(args.output, *outputs)
+    print(json.dumps({
+        "import_s": imported - start,
+        "load_s": loaded - imported,
+        "latency_ms": 1000 * float(np.mean(timings)),
+        "memory_mb": peak_memory_mb()
+    }))
+
+
+def runtimes_main(args):
+    """torch ve ONNX yollarını ayrı süreçlerde çalıştırıp karşılaştır"""
+    model_path = args.model or random_weights()
+    onnx_path = args.onnx or os.path.join(tempfile.gettempdir(), "apdrawing.onnx")
+    if not os.path.exists(onnx_path):
+        from core.deep_sketch_processor import DeepSketchProcessor
+        if not DeepSketchProcessor.export_onnx(model_path, onnx_path):
+            sys.exit("ONNX aktarımı başarısız")
+
+    rows, outputs = {}, {}
+    for runtime in RUNTIMES:
+        output = os.path.join(tempfile.gettempdir(), f"apdrawing_{runtime}.npz")
+        command = [
+            sys.executable, os.path.abspath(__file__), *args.images,
+            '--probe', runtime, '--output', output, '--runs', str(args.runs),
+            '--model', model_path if runtime == "torch" else onnx_path
+        ]
+        completed = subprocess.run(command, capture_output=True, text=True)
+        if completed.returncode != 0:
+            sys.exit(f"{runtime} ölçümü başarısız:\n{completed.stderr}")
+        rows[runtime] = json.loads(completed.stdout.strip().splitlines()[-1])
+        with np.load(output) as data:
+            outputs[runtime] = [data[key] for key in data.files]
+
+    errors = [cv2.absdiff(a, b) for a, b in zip(outputs["torch"], outputs["onnx"])]
+    max_error = max(int(e.max()) for e in errors)
+    print(f"{'çalışma yolu':<14}{'içe aktarma':>13}{'yükleme':>10}{'gecikme':>12}{'bellek':>11}")
+    for runtime, row in rows.items():
+        print(f"{runtime:<14}{row['import_s']:>11.2f} s{row['load_s']:>8.2f} s"
+              f"{row['latency_ms']:>9.1f} ms{row['memory_mb']:>8.0f} MB")
+    print(f"en büyük fark: {max_error} (sınır {RUNTIME_TOLERANCE})")
+    if max_error > RUNTIME_TOLERANCE:
+        sys.exit(1)
+
+
+def measure_throughput(create, images, batch_sizes=BATCH_SIZES, runs=2):
+    """Her grup boyutu için (görüntü/sn, görüntü başına ms, ileri geçiş sayısı)
+
+    create(batch_size) görüntü listesini işleyen bir çağrı ve kuyruğu
+    döndürür; ilk tur ısınma sayılır.
+    """
+    rows = {}
+    for batch_size in batch_sizes:
+        run, batcher = create(batch_size)
+        run(images)
+        batches_before = batcher.batches
+        start = time.perf_counter()
+        for _ in range(runs):
+            run(images)
+        elapsed = (time.perf_counter() - start) / runs
+        batcher.close()
+        rows[batch_size] = (len(images) / elapsed, 1000 * elapsed / len(images),
+                            (batcher.batches - batches_before) // runs)
+    return rows
+
+
+def print_throughput(title, rows):
+    print(f"\n{title}")
+    print(f"{'grup':>6}{'görüntü/sn':>13}{'ms/görüntü':>13}{'geçiş':>8}{'hızlanma':>10}")
+    base = rows[min(rows)][0]
+    for batch_size, (rate, per_image, batches) in rows.items():
+        print(f"{batch_size:>6}{rate:>13.2f}{per_image:>13.1f}{batches:>8}{rate / base:>9.2f}x")
+
+
+def throughput_main(args, images, model_path):
+    from core.deep_sketch_processor import DeepSketchProcessor
+
+    def sketch(batch_size):
+        processor = DeepSketchProcessor(batch_size=batch_size, max_wait_ms=args.max_wait)
+        if not processor.load_model(model_path):
+            sys.exit("Model yüklenemedi")
+        return (lambda batch: processor.process_batch(batch)), processor.batcher
+
+    print_throughput("Çizim modeli", measure_throughput(sketch, images, runs=args.runs))
+
+    if args.hed:
+        from core.deep_processor import DeepProcessor
+        settings = {"threshold": 50, "line_thickness": 2}
+
+        def hed(batch_size):
+            processor = DeepProcessor(max_batch=batch_size, max_wait_ms=args.max_wait)
+            if processor.nets is None:
+                sys.exit("HED modeli yüklenemedi")
+            return (lambda batch: processor.process_hed_batch(batch, settings)), processor.batcher
+
+        print_throughput("HED", measure_throughput(hed, images, runs=args.runs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Çıkarım kipleri karşılaştırması")
+    parser.add_argument('images', nargs='*', help="Test görüntüleri")
+    parser.add_argument('--model', help="APDrawing ağırlıkları (.pth)")
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--throughput', action='store_true',
+                        help="Grup boyutu 1-16 için toplu çıkarım verimi")
+    parser.add_argument('--hed', action='store_true', help="Verim ölçümüne HED'i de ekle")
+    parser.add_argument('--count', type=int, default=16, help="Verim ölçümündeki görüntü sayısı")
+    parser.add_argument('--size', type=int, default=256, help="Yapay görüntü boyutu")
+    parser.add_argument('--max-wait', type=float, default=10.0,
+                        help="Kuyruğun ilk girdiden sonra bekleme süresi (ms)")
+    parser.add_argument('--runtimes', action='store_true',
+                        help="torch ve ONNX çalışma yollarını karşılaştır")
+    parser.add_argument('--onnx', help="ONNX modeli (yoksa --model'den aktarılır)")
+    parser.add_argument('--probe', choices=RUNTIMES, help=argparse.SUPPRESS)
+    parser.add_argument('--output', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    if args.runtimes:
+        runtimes_main(args)
+        return
+
+    if args.throughput:
+        images = [cv2.imread(path) for path in args.images] or synthetic_images(args.count, args.size)
+    else:
+        images = [cv2.imread(path) for path in args.images] or synthetic_images()
+    if any(image is None for image in images):
+        sys.exit("Görüntü okunamadı")
+
+    if args.probe:
+        probe_main(args, images)
+        return
+
+    model_path = args.model or random_weights()
+
+    if args.throughput:
+        throughput_main(args, images, model_path)
+        return
+
+    from core.deep_sketch_processor import DeepSketchProcessor
+    report = DeepSketchProcessor.compare_variants(model_path, images, runs=args.runs)
+    baseline = report["float32"]["latency_ms"]
+    print(f"{'kip':<14}{'gecikme':>12}{'hızlanma':>10}{'maks fark':>11}{'PSNR':>9}{'stencil uyumu':>15}")
+    for name, row in report.items():
+        print(f"{name:<14}{row['latency_ms']:>9.1f} ms{baseline / row['latency_ms']:>9.2f}x"
+              f"{row['max_error']:>11}{row['psnr_db']:>7.1f}dB{row['stencil_agreement']:>14.2f}%")
+
+
+if __name__ == '__main__':
+    main()
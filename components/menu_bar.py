@@ -10,9 +10,12 @@ class MenuBar(QMenuBar):
     save_requested = pyqtSignal()
     undo_requested = pyqtSignal()
     redo_requested = pyqtSignal()
+    undo_crop_requested = pyqtSignal()
     batch_process_requested = pyqtSignal()
     preferences_requested = pyqtSignal()
     download_models_requested = pyqtSignal()  # Yeni sinyal
+    large_image_requested = pyqtSignal()
+    print_requested = pyqtSignal()
     
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -42,6 +45,7 @@ class MenuBar(QMenuBar):
             ("Aç", "Ctrl+O", self.load_requested),
             ("Kaydet", "Ctrl+S", self.save_requested),
             ("Farklı Kaydet", "Ctrl+Shift+S", self.save_requested),
+            ("Yazıcıya Gönder", "Ctrl+P", self.print_requested),
             None,  # Ayraç için None
             ("Toplu İşlem", "Ctrl+B", self.batch_process_requested),
             None,
@@ -67,6 +71,7 @@ class MenuBar(QMenuBar):
         actions = [
             ("Geri Al", "Ctrl+Z", self.undo_requested),
             ("Yinele", "Ctrl+Y", self.redo_requested),
+            ("Kırpmayı Geri Al", None, self.undo_crop_requested),
             None,
             ("Ayarlar", None, self.preferences_requested)
         ]
@@ -96,6 +101,7 @@ class MenuBar(QMenuBar):
         actions = [
             ("Modelleri İndir", None, self.download_models_requested),  # Yeni menü ögesi
             ("Toplu İşlem", None, self.batch_process_requested),
+            ("Büyük Görüntü Dönüştür", None, self.large_image_requested),
             ("Ayarlar", None, self.preferences_requested)
         ]
         
@@ -1,7 +1,9 @@
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QStackedWidget, QCheckBox, QPushButton
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QStackedWidget, QCheckBox,
+                             QPushButton, QComboBox)
 from PyQt6.QtCore import Qt, pyqtSignal
 from widgets import StencilTypeSelector
 from slider_widgets import LabeledSlider
+from core.print_size import PrintSize
 import logging
 
 class StencilTools(QWidget):
@@ -10,6 +12,7 @@ class StencilTools(QWidget):
     # Sinyaller
     settings_changed = pyqtSignal(str, dict)  # (stencil_type, settings)
     apply_model_settings = pyqtSignal(str, dict)  # Model tabanlı işlemler için
+    print_size_changed = pyqtSignal(object)  # PrintSize ya da None
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -52,6 +55,9 @@ class StencilTools(QWidget):
         
         layout.addWidget(self.settings_stack)
         
+        # Baskı boyutu ayarları
+        layout.addWidget(self.create_print_settings())
+        
         # Onayla butonu
         self.apply_button = QPushButton("Onayla")
         self.apply_button.clicked.connect(self.on_apply_clicked)
@@ -164,6 +170,75 @@ class StencilTools(QWidget):
         
         return widget
 
+    def create_print_settings(self) -> QWidget:
+        widget = QWidget()
+        layout = QVBoxLayout(widget)
+        
+        self.print_check = QCheckBox("Baskı Boyutunda İşle")
+        self.print_check.toggled.connect(self.on_print_mode_toggled)
+        layout.addWidget(self.print_check)
+        
+        # 0: en-boy oranından hesaplanır
+        self.print_width = LabeledSlider("Genişlik (mm)", 0, 600, 150, 1, 0)
+        self.print_height = LabeledSlider("Yükseklik (mm)", 0, 600, 0, 1, 0)
+        for slider in [self.print_width, self.print_height]:
+            self.connect_slider(slider, self.on_print_settings_changed)
+            layout.addWidget(slider)
+        
+        dpi_layout = QHBoxLayout()
+        dpi_layout.addWidget(QLabel("DPI"))
+        self.print_dpi = QComboBox()
+        self.print_dpi.addItems([str(dpi) for dpi in PrintSize.COMMON_DPI])
+        self.print_dpi.setCurrentText("300")
+        self.print_dpi.currentIndexChanged.connect(self.on_print_settings_changed)
+        dpi_layout.addWidget(self.print_dpi)
+        layout.addLayout(dpi_layout)
+        
+        self.set_print_controls_enabled(False)
+        return widget
+
+    def unit_sliders(self):
+        """Baskı kipinde milimetreye geçen çekirdek ayarları: (slider, piksel, mm)
+
+        Her birim (etiket, min, max, adım, ondalık) olarak verilir.
+        """
+        blur = (("Bulanıklık", 1, 21, 1, 1), ("Bulanıklık (mm)", 0.1, 2.0, 0.05, 2))
+        thickness = (("Çizgi Kalınlığı", 0.5, 10, 0.1, 1), ("Çizgi Kalınlığı (mm)", 0.05, 2.0, 0.05, 2))
+        block = (("Block Size", 3, 99, 2, 1), ("Block Size (mm)", 0.3, 8.0, 0.1, 1))
+        return [
+            (self.basic_blur, *blur), (self.basic_thickness, *thickness),
+            (self.block_size, *block), (self.adaptive_blur, *blur),
+            (self.adaptive_thickness, *thickness), (self.sketch_thickness, *thickness)
+        ]
+
+    def set_print_controls_enabled(self, enabled):
+        for control in [self.print_width, self.print_height, self.print_dpi]:
+            control.setEnabled(enabled)
+
+    def get_print_size(self):
+        """Baskı kipi açıksa hedef boyut, değilse None"""
+        if not self.print_check.isChecked():
+            return None
+        return PrintSize(self.print_width.value(), self.print_height.value(),
+                         int(self.print_dpi.currentText()))
+
+    def on_print_mode_toggled(self, enabled):
+        self.set_print_controls_enabled(enabled)
+        # Değerler aynı fiziksel boyutu korumak için birimler arasında çevrilir
+        pixels_per_mm = int(self.print_dpi.currentText()) / PrintSize.MM_PER_INCH
+        for slider, pixel_unit, mm_unit in self.unit_sliders():
+            if enabled:
+                slider.reconfigure(*mm_unit[:3], slider.value() / pixels_per_mm, *mm_unit[3:])
+            else:
+                slider.reconfigure(*pixel_unit[:3], round(slider.value() * pixels_per_mm), *pixel_unit[3:])
+        self.on_print_settings_changed()
+
+    def on_print_settings_changed(self):
+        print_size = self.get_print_size()
+        self.print_size_changed.emit(print_size)
+        logging.debug(f"Baskı boyutu gönderildi: {print_size}")
+        self.emit_current_settings()
+
     def connect_slider(self, slider, callback):
         """Slider'a callback bağla"""
         slider.valueChanged.connect(callback)
@@ -1,10 +1,43 @@
 import cv2
 import numpy as np
 import logging
+from core.cancellation import check_cancelled, report_progress, sub_progress
 
 class AdvancedSketchProcessor:
+    # Gürültü azaltma şerit yüksekliği; iptal ve ilerleme şeritler arasında kontrol edilir
+    DENOISE_STRIP_HEIGHT = 256
+
+    @staticmethod
+    def denoise_strips(image: np.ndarray, h: float, template_window: int = 7,
+                       search_window: int = 21, token=None, progress=None) -> np.ndarray:
+        """fastNlMeansDenoising'i örtüşen yatay şeritlerde uygula
+
+        Kenar payı arama ve şablon pencerelerinin yarıçapı kadar olduğundan
+        sonuç tüm görüntüyü tek seferde işlemekle birebir aynıdır.
+        """
+        height = image.shape[0]
+        step = AdvancedSketchProcessor.DENOISE_STRIP_HEIGHT
+        margin = search_window // 2 + template_window // 2
+        result = np.empty_like(image)
+
+        for y in range(0, height, step):
+            check_cancelled(token)
+            y0 = max(0, y - margin)
+            y1 = min(height, y + step + margin)
+            strip = cv2.fastNlMeansDenoising(
+                image[y0:y1],
+                h=h,
+                templateWindowSize=template_window,
+                searchWindowSize=search_window
+            )
+            rows = min(step, height - y)
+            result[y:y + rows] = strip[y - y0:y - y0 + rows]
+            report_progress(progress, (y + rows) / height)
+
+        return result
+
     @staticmethod
-    def preprocess_image(image: np.ndarray, settings: dict) -> np.ndarray:
+    def preprocess_image(image: np.ndarray, settings: dict, token=None, progress=None) -> np.ndarray:
         """Görüntü ön işleme"""
         try:
             # Ayarları al
@@ -21,11 +54,14 @@ class AdvancedSketchProcessor:
             enhanced = clahe.apply(l)
             
             # Gürültü azaltma (detay koruma seviyesine göre)
-            denoised = cv2.fastNlMeansDenoising(
+            check_cancelled(token)
+            denoised = AdvancedSketchProcessor.denoise_strips(
                 enhanced,
                 h=10 * (1 - detail_preservation),
-                templateWindowSize=7,
-                searchWindowSize=21
+                template_window=7,
+                search_window=21,
+                token=token,
+                progress=progress
             )
 
             # Keskinleştirme
@@ -93,18 +129,23 @@ class AdvancedSketchProcessor:
             return None
 
     @staticmethod
-    def portrait_to_sketch(image: np.ndarray, settings: dict) -> np.ndarray:
+    def portrait_to_sketch(image: np.ndarray, settings: dict, token=None, progress=None) -> np.ndarray:
         """Gelişmiş portre-çizim dönüşümü"""
         try:
-            # Ön işleme
-            preprocessed = AdvancedSketchProcessor.preprocess_image(image, settings)
+            # Ön işleme (sürenin büyük kısmı gürültü azaltmada)
+            preprocessed = AdvancedSketchProcessor.preprocess_image(
+                image, settings, token,
+                sub_progress(progress, 0.0, 0.9)
+            )
             if preprocessed is None:
                 return None
+            check_cancelled(token)
 
             # Stencil maskesi oluştur
             stencil = AdvancedSketchProcessor.create_stencil_mask(preprocessed, settings)
             if stencil is None:
                 return None
+            check_cancelled(token)
 
             # Son işlemler
             if settings.get('invert_output', True):
@@ -116,6 +157,7 @@ class AdvancedSketchProcessor:
                 edges = cv2.Canny(preprocessed, 100, 200)
                 stencil = cv2.addWeighted(stencil, 0.7, edges, 0.3, 0)
 
+            report_progress(progress, 1.0)
             return stencil
 
         except Exception as e:
@@ -123,7 +165,7 @@ class AdvancedSketchProcessor:
             return None
 
     @staticmethod
-    def artistic_sketch(image: np.ndarray, settings: dict) -> np.ndarray:
+    def artistic_sketch(image: np.ndarray, settings: dict, token=None, progress=None) -> np.ndarray:
         """Sanatsal çizim dönüşümü"""
         try:
             # Ön işleme ayarlarını güncelle
@@ -138,9 +180,13 @@ class AdvancedSketchProcessor:
             })
 
             # Ön işleme
-            preprocessed = AdvancedSketchProcessor.preprocess_image(image, artistic_settings)
+            preprocessed = AdvancedSketchProcessor.preprocess_image(
+                image, artistic_settings, token,
+                sub_progress(progress, 0.0, 0.9)
+            )
             if preprocessed is None:
                 return None
+            check_cancelled(token)
 
             # Ana işlem
             # XDoG (eXtended Difference of Gaussians) benzeri efekt
@@ -163,6 +209,7 @@ class AdvancedSketchProcessor:
             if settings.get('invert_output', True):
                 enhanced = cv2.bitwise_not(enhanced)
 
+            report_progress(progress, 1.0)
             return enhanced
 
         except Exception as e:
@@ -1,66 +1,400 @@
-import replicate
-import cv2
-import numpy as np
+import asyncio
+import base64
+import hashlib
+import json
 import logging
 import os
-import tempfile
-from typing import Optional
-import requests
-from PIL import Image
-import io
+import random
+import sys
+import time
+import traceback
+from typing import Dict, List, Optional, Sequence
+
+import aiohttp
+import cv2
+import numpy as np
+
+
+class AIRequestError(Exception):
+    """Tahmin servisi isteği kalıcı olarak başarısız oldu"""
+
+
+class _Transient(Exception):
+    """Yeniden denenebilir yanıt (429, 5xx)"""
+
+    def __init__(self, status: int, retry_after: Optional[float] = None):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+class AIResultCache:
+    """(görüntü özeti, prompt, parametreler) anahtarlı disk önbelleği
+
+    Sonuç, servisin döndürdüğü PNG baytlarıyla <anahtar>.png olarak tutulur.
+    Yazım geçici dosya + os.replace ile yapılır; yarım dosya hiç okunmaz.
+    """
+
+    SUFFIX = ".png"
+    CACHE_ENV = "STENCIL_AI_CACHE"
+
+    def __init__(self, root: str):
+        self.root = root
+
+    @classmethod
+    def default_root(cls) -> str:
+        """Ortam değişkeni ya da çalıştırılabilir dosyanın yanındaki cache/ai klasörü"""
+        env_root = os.environ.get(cls.CACHE_ENV)
+        if env_root:
+            return env_root
+        if getattr(sys, 'frozen', False):
+            base_dir = os.path.dirname(sys.executable)
+        else:
+            base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        return os.path.join(base_dir, "cache", "ai")
+
+    @staticmethod
+    def image_digest(image: np.ndarray) -> str:
+        """Piksellerin, boyutun ve veri tipinin SHA-256 özeti"""
+        digest = hashlib.sha256(f"{image.shape}{image.dtype}".encode())
+        digest.update(np.ascontiguousarray(image).data)
+        return digest.hexdigest()
+
+    @staticmethod
+    def key(image_digest: str, prompt: str, negative_prompt: str, params: dict, version: str) -> str:
+        payload = json.dumps(
+            [image_digest, prompt, negative_prompt, params, version], sort_keys=True
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, key + self.SUFFIX)
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self.path(key), "rb") as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logging.warning(f"AI önbelleği okunamadı: {str(e)}")
+            return None
+
+    def put(self, key: str, data: bytes) -> None:
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            temp_path = self.path(key) + ".part"
+            with open(temp_path, "wb") as file:
+                file.write(data)
+            os.replace(temp_path, self.path(key))
+        except OSError as e:
+            logging.warning(f"AI önbelleğine yazılamadı: {str(e)}")
+
 
 class AIProcessor:
-    """AI tabanlı görüntü işleme sınıfı"""
-    
-    def __init__(self):
+    """AI tabanlı görüntü işleme sınıfı
+
+    ControlNet tahminleri asyncio ile yürütülür: tek aiohttp oturumu
+    bağlantıları havuzlar, görüntü diske yazılmadan data URI olarak
+    gönderilir, her istek zaman aşımı ve geri çekilmeli yeniden denemeyle
+    yapılır. Aynı anda en çok max_concurrent tahmin çalışır. Aynı görüntü,
+    prompt ve parametrelerle gelen istek disk önbelleğinden döner; aynı anda
+    gelen eş istekler tek tahmini paylaşır.
+    """
+
+    API_URL = "https://api.replicate.com/v1"
+    # Yerel sahte sunucu ya da vekil için taban adres
+    API_URL_ENV = "STENCIL_AI_API_URL"
+    MODEL_VERSION = "aff48af9c68d162388d230a2ab003f68d2638d88307bdaf1c2f1ac95079c9613"
+    DEFAULT_PROMPT = "detailed stencil art, black and white, high contrast"
+    DEFAULT_NEGATIVE_PROMPT = "color, blurry, noisy, unrealistic, low quality"
+    DEFAULT_PARAMS = {"num_inference_steps": 20, "guidance_scale": 9}
+
+    MAX_CONCURRENT = 4
+    POOL_SIZE = 16
+    CONNECT_TIMEOUT = 10
+    REQUEST_TIMEOUT = 60
+    # Tahminin başlayıp bitmesi için toplam süre (sn)
+    PREDICTION_TIMEOUT = 600
+    POLL_INTERVAL = 1.0
+    MAX_POLL_INTERVAL = 5.0
+    RETRIES = 4
+    BACKOFF = 0.5
+    MAX_BACKOFF = 10.0
+
+    def __init__(self, api_url: Optional[str] = None, api_token: Optional[str] = None,
+                 cache_dir: Optional[str] = None, use_cache: bool = True,
+                 max_concurrent: int = MAX_CONCURRENT, poll_interval: float = POLL_INTERVAL):
         # API anahtarını environ'dan al
-        self.api_token = os.getenv('REPLICATE_API_TOKEN')
+        self.api_token = api_token or os.getenv('REPLICATE_API_TOKEN')
         if not self.api_token:
             logging.warning("REPLICATE_API_TOKEN bulunamadı!")
-        
-    def process_with_controlnet(
-        self,
-        image: np.ndarray,
-        prompt: str = "detailed stencil art, black and white, high contrast",
-        negative_prompt: str = "color, blurry, noisy, unrealistic, low quality",
-    ) -> Optional[np.ndarray]:
-        """ControlNet ile stencil oluştur"""
+        self.api_url = (api_url or os.getenv(self.API_URL_ENV) or self.API_URL).rstrip("/")
+        self.cache = AIResultCache(cache_dir or AIResultCache.default_root()) if use_cache else None
+        self.max_concurrent = max(1, max_concurrent)
+        self.poll_interval = poll_interval
+        self.stats = {"requests": 0, "retries": 0, "predictions": 0, "cache_hits": 0, "shared": 0}
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    # ----------------------------------------------------------------- oturum
+
+    async def __aenter__(self) -> "AIProcessor":
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def open(self) -> None:
+        """Bağlantı havuzunu kur (çalışan olay döngüsüne bağlıdır)"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.POOL_SIZE),
+                timeout=aiohttp.ClientTimeout(
+                    total=self.REQUEST_TIMEOUT, connect=self.CONNECT_TIMEOUT
+                )
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+
+    async def close(self) -> None:
+        """Süren tahminleri iptal et ve bağlantıları kapat"""
+        tasks = list(self._inflight.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _api_headers(self) -> dict:
+        # Anahtar yalnızca API'ye gider, çıktı adreslerine gönderilmez
+        headers = {"Content-Type": "application/json"}
+        if self.api_token:
+            headers["Authorization"] = f"Bearer {self.api_token}"
+        return headers
+
+    # ----------------------------------------------------------------- istekler
+
+    @staticmethod
+    def _retry_after(response: aiohttp.ClientResponse) -> Optional[float]:
         try:
-            # Görüntüyü geçici dosyaya kaydet
-            with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp_file:
-                cv2.imwrite(tmp_file.name, image)
-                
-                # ControlNet modelini çalıştır
-                output = replicate.run(
-                    "jagilley/controlnet-canny:aff48af9c68d162388d230a2ab003f68d2638d88307bdaf1c2f1ac95079c9613",
-                    input={
-                        "image": open(tmp_file.name, "rb"),
-                        "prompt": prompt,
-                        "negative_prompt": negative_prompt,
-                        "num_inference_steps": 20,
-                        "guidance_scale": 9
-                    }
+            return float(response.headers.get("Retry-After", ""))
+        except ValueError:
+            return None
+
+    # Tahmin oluşturma isteğinin sunucuya hiç ulaşmadığı kesin olan yanıtlar
+    SAFE_CREATE_STATUSES = (429, 503)
+
+    @classmethod
+    def _retryable(cls, error: Exception, idempotent: bool) -> bool:
+        """Yeniden denemek aynı tahminin iki kez ücretlendirilmesine yol açmaz mı
+
+        Sorgular her geçici hatada yeniden denenebilir. Tahmin oluşturma
+        yalnızca gövde gönderilmeden kurulamayan bağlantıda ve 429/503
+        yanıtında yinelenir; zaman aşımı ya da kopan bağlantıda sunucu isteği
+        kabul etmiş olabilir.
+        """
+        if idempotent:
+            return True
+        if isinstance(error, _Transient):
+            return error.status in cls.SAFE_CREATE_STATUSES
+        return isinstance(error, aiohttp.ClientConnectorError)
+
+    async def _request(self, method: str, url: str, expect_json: bool = True,
+                       idempotent: bool = True, **kwargs):
+        """Zaman aşımlı istek; geçici hatalar geri çekilerek yeniden denenir
+
+        idempotent=False (tahmin oluşturma) ise yalnızca isteğin sunucuya
+        ulaşmadığı kesin olan hatalar yeniden denenir.
+        """
+        attempt = 0
+        while True:
+            self.stats["requests"] += 1
+            try:
+                async with self._session.request(method, url, **kwargs) as response:
+                    if response.status == 429 or response.status >= 500:
+                        raise _Transient(response.status, self._retry_after(response))
+                    if response.status >= 400:
+                        text = await response.text()
+                        raise AIRequestError(f"HTTP {response.status}: {text[:200]}")
+                    if expect_json:
+                        return await response.json(content_type=None)
+                    return await response.read()
+            except (aiohttp.ClientError, asyncio.TimeoutError, _Transient) as e:
+                if not self._retryable(e, idempotent):
+                    raise AIRequestError(
+                        f"{method} {url} başarısız, tekrar tahmin oluşmasın diye yeniden denenmedi: "
+                        f"{str(e) or type(e).__name__}"
+                    ) from e
+                attempt += 1
+                if attempt > self.RETRIES:
+                    raise AIRequestError(
+                        f"{method} {url} {self.RETRIES} yeniden denemede başarısız: {str(e) or type(e).__name__}"
+                    ) from e
+                self.stats["retries"] += 1
+                retry_after = getattr(e, "retry_after", None)
+                if retry_after:
+                    # Sunucunun istediği bekleme de sınırlıdır; uzun bir Retry-After
+                    # eşzamanlılık slotunu tutarak işçiyi bekletmesin
+                    delay = min(retry_after, self.MAX_BACKOFF)
+                else:
+                    # Eşzamanlı istekler aynı anda geri dönmesin diye rastgele yayılır
+                    delay = random.uniform(0.5, 1.0) * min(
+                        self.MAX_BACKOFF, self.BACKOFF * 2 ** (attempt - 1)
+                    )
+                logging.warning(f"AI isteği başarısız ({str(e) or type(e).__name__}), "
+                                f"{delay:.2f} sn sonra yeniden denenecek")
+                await asyncio.sleep(delay)
+
+    async def _create_prediction(self, png: bytes, prompt: str, negative_prompt: str,
+                                 params: dict) -> dict:
+        """Tahmini başlat; görüntü bellekten data URI olarak gönderilir"""
+        image_uri = "data:image/png;base64," + base64.b64encode(png).decode("ascii")
+        body = {
+            "version": self.MODEL_VERSION,
+            "input": {
+                "image": image_uri,
+                "prompt": prompt,
+                "negative_prompt": negative_prompt,
+                **params
+            }
+        }
+        prediction = await self._request(
+            "POST", f"{self.api_url}/predictions", idempotent=False, json=body,
+            headers=self._api_headers()
+        )
+        self.stats["predictions"] += 1
+        return prediction
+
+    async def _wait_prediction(self, prediction: dict):
+        """Tahmin bitene kadar artan aralıklarla sorgula; çıktıyı döndür"""
+        deadline = time.perf_counter() + self.PREDICTION_TIMEOUT
+        interval = self.poll_interval
+        urls = prediction.get("urls") or {}
+        try:
+            while True:
+                status = prediction.get("status")
+                if status == "succeeded":
+                    return prediction.get("output")
+                if status in ("failed", "canceled"):
+                    raise AIRequestError(f"Tahmin {status}: {prediction.get('error')}")
+                if time.perf_counter() + interval > deadline:
+                    raise AIRequestError(f"Tahmin {self.PREDICTION_TIMEOUT} sn içinde bitmedi")
+                await asyncio.sleep(interval)
+                interval = min(self.MAX_POLL_INTERVAL, interval * 1.5)
+                prediction = await self._request(
+                    "GET", urls.get("get") or f"{self.api_url}/predictions/{prediction['id']}",
+                    headers=self._api_headers()
                 )
-                
-                # Geçici dosyayı sil
-                os.unlink(tmp_file.name)
-                
-                if output and isinstance(output, list) and len(output) > 0:
-                    # URL'den görüntüyü al
-                    response = requests.get(output[0])
-                    if response.status_code == 200:
-                        # Bytes'ı numpy array'e çevir
-                        image_bytes = io.BytesIO(response.content)
-                        pil_image = Image.open(image_bytes)
-                        return cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
-                    
-                logging.error("AI işleme başarısız oldu")
-                return None
-                
+        except (AIRequestError, asyncio.CancelledError):
+            # Biten ya da bırakılan tahmin sunucuda çalışmaya devam etmesin
+            if urls.get("cancel") and prediction.get("status") not in ("succeeded", "failed", "canceled"):
+                try:
+                    async with self._session.post(urls["cancel"], headers=self._api_headers()):
+                        pass
+                except Exception:
+                    logging.debug(traceback.format_exc())
+            raise
+
+    async def _predict(self, key: str, png: bytes, prompt: str, negative_prompt: str,
+                       params: dict) -> bytes:
+        async with self._semaphore:
+            prediction = await self._create_prediction(png, prompt, negative_prompt, params)
+            output = await self._wait_prediction(prediction)
+            url = output[0] if isinstance(output, list) and output else output
+            if not isinstance(url, str) or not url:
+                raise AIRequestError("Tahmin çıktı üretmedi")
+            data = await self._request("GET", url, expect_json=False)
+        # Hata sayfası ya da yarım gövde önbelleğe girip kalıcı olarak dönmesin
+        if cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_UNCHANGED) is None:
+            raise AIRequestError(f"Tahmin çıktısı görüntü olarak çözülemedi ({len(data)} bayt)")
+        if self.cache is not None:
+            self.cache.put(key, data)
+        return data
+
+    # ----------------------------------------------------------------- arayüz
+
+    async def fetch_controlnet(self, image: np.ndarray, prompt: str = DEFAULT_PROMPT,
+                               negative_prompt: str = DEFAULT_NEGATIVE_PROMPT, **params) -> bytes:
+        """Sonucun PNG baytları; önbellekte varsa API'ye gidilmez, hatada istisna yükselir"""
+        params = {**self.DEFAULT_PARAMS, **params}
+        key = AIResultCache.key(
+            AIResultCache.image_digest(image), prompt, negative_prompt, params, self.MODEL_VERSION
+        )
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.stats["cache_hits"] += 1
+                return cached
+
+        await self.open()
+        task = self._inflight.get(key)
+        if task is None:
+            ok, encoded = cv2.imencode(".png", image)
+            if not ok:
+                raise AIRequestError("Görüntü PNG olarak kodlanamadı")
+            task = asyncio.ensure_future(
+                self._predict(key, encoded.tobytes(), prompt, negative_prompt, params)
+            )
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.stats["shared"] += 1
+        # Bir çağıranın iptali aynı tahmini bekleyen diğerlerini etkilemez
+        return await asyncio.shield(task)
+
+    async def process_async(self, image: np.ndarray, prompt: str = DEFAULT_PROMPT,
+                            negative_prompt: str = DEFAULT_NEGATIVE_PROMPT,
+                            **params) -> Optional[np.ndarray]:
+        """ControlNet ile stencil oluştur (olay döngüsü içinden)"""
+        try:
+            data = await self.fetch_controlnet(image, prompt, negative_prompt, **params)
+            result = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+            if result is None:
+                logging.error("AI işleme başarısız oldu: çıktı çözülemedi")
+            return result
         except Exception as e:
             logging.error(f"AI işleme hatası: {str(e)}")
+            logging.debug(traceback.format_exc())
             return None
-            
+
+    async def process_batch_async(self, images: Sequence[np.ndarray], prompt: str = DEFAULT_PROMPT,
+                                  negative_prompt: str = DEFAULT_NEGATIVE_PROMPT,
+                                  **params) -> List[Optional[np.ndarray]]:
+        """Görüntüleri aynı oturumla, en çok max_concurrent eşzamanlı tahminle işle"""
+        await self.open()
+        return await asyncio.gather(*(
+            self.process_async(image, prompt, negative_prompt, **params) for image in images
+        ))
+
+    async def _run(self, coroutine):
+        try:
+            return await coroutine
+        finally:
+            await self.close()
+
+    def process_with_controlnet(
+        self,
+        image: np.ndarray,
+        prompt: str = DEFAULT_PROMPT,
+        negative_prompt: str = DEFAULT_NEGATIVE_PROMPT,
+        **params
+    ) -> Optional[np.ndarray]:
+        """ControlNet ile stencil oluştur
+
+        Kendi olay döngüsünü açar; çalışan bir döngü içinden process_async
+        kullanılmalıdır.
+        """
+        return asyncio.run(self._run(self.process_async(image, prompt, negative_prompt, **params)))
+
+    def process_batch(self, images: Sequence[np.ndarray], prompt: str = DEFAULT_PROMPT,
+                      negative_prompt: str = DEFAULT_NEGATIVE_PROMPT,
+                      **params) -> List[Optional[np.ndarray]]:
+        """Toplu işlem: bağlantılar ve eşzamanlılık sınırı tüm görüntülerce paylaşılır"""
+        return asyncio.run(self._run(self.process_batch_async(images, prompt, negative_prompt, **params)))
+
     @staticmethod
     def prepare_image_for_controlnet(image: np.ndarray, settings: dict) -> np.ndarray:
         """Görüntüyü ControlNet için hazırla"""
@@ -74,7 +408,7 @@ class AIProcessor:
                 threshold2=float(settings.get("threshold2", 200))
             )
             return edges
-            
+
         except Exception as e:
             logging.error(f"Görüntü hazırlama hatası: {str(e)}")
-            return None
\ No newline at end of file
+            return None
@@ -0,0 +1,88 @@
+import logging
+from typing import Callable, Optional
+
+import numpy as np
+
+from core.shared_image import SharedImage, SharedImageHandle
+
+ProgressCallback = Callable[[float], None]
+
+
+class RenderCancelled(BaseException):
+    """İşlem iptal edildi
+
+    Exception yerine BaseException'dan türer; böylece işlemcilerdeki genel
+    `except Exception` blokları iptali hata sanıp yutmaz.
+    """
+
+
+class CancellationToken:
+    """Thread'ler ve worker süreçleri arasında paylaşılan iptal bayrağı
+
+    Bayrak ve ilerleme değeri küçük bir paylaşılan bellek bloğunda durur;
+    worker yalnızca tanıtıcıyı alır, GUI tarafı aynı bloğu okur/yazar.
+    """
+
+    _CANCELLED = 0
+    _PROGRESS = 1
+
+    def __init__(self, shared: Optional[SharedImage] = None):
+        if shared is None:
+            shared = SharedImage.create((2,), np.float32)
+            shared.array[:] = 0.0
+        self._shared = shared
+
+    @classmethod
+    def attach(cls, handle: SharedImageHandle) -> 'CancellationToken':
+        """Worker sürecinde mevcut bayrağa bağlan"""
+        return cls(SharedImage.attach(handle))
+
+    @property
+    def handle(self) -> SharedImageHandle:
+        return self._shared.handle
+
+    @property
+    def cancelled(self) -> bool:
+        flags = self._shared.array
+        return flags is None or bool(flags[self._CANCELLED])
+
+    @property
+    def progress(self) -> float:
+        flags = self._shared.array
+        return 0.0 if flags is None else float(flags[self._PROGRESS])
+
+    def cancel(self) -> None:
+        if self._shared.array is not None:
+            self._shared.array[self._CANCELLED] = 1.0
+
+    def report(self, fraction: float) -> None:
+        """İlerlemeyi kaydet (0-1)"""
+        if self._shared.array is not None:
+            self._shared.array[self._PROGRESS] = fraction
+
+    def raise_if_cancelled(self) -> None:
+        if self.cancelled:
+            raise RenderCancelled()
+
+    def close(self) -> None:
+        self._shared.close()
+
+
+def check_cancelled(token: Optional[CancellationToken]) -> None:
+    """İptal istenmişse RenderCancelled fırlat"""
+    if token is not None and token.cancelled:
+        logging.debug("İşlem iptal isteği alındı")
+        raise RenderCancelled()
+
+
+def report_progress(progress: Optional[ProgressCallback], fraction: float) -> None:
+    """İlerleme geri çağrısı varsa 0-1 aralığında çağır"""
+    if progress is not None:
+        progress(min(1.0, max(0.0, fraction)))
+
+
+def sub_progress(progress: Optional[ProgressCallback], start: float, end: float) -> Optional[ProgressCallback]:
+    """Bir alt aşamanın 0-1 ilerlemesini üst aşamanın [start, end] aralığına eşle"""
+    if progress is None:
+        return None
+    return lambda fraction: report_progress(progress, start + (end - start) * fraction)
@@ -0,0 +1,109 @@
+import logging
+import os
+import sys
+from dataclasses import dataclass
+from typing import Optional
+
+import cv2
+
+
+@dataclass(frozen=True)
+class ComputeBudget:
+    """Toplam çekirdek bütçesinin süreçlere ve thread havuzlarına dağılımı"""
+    mode: str
+    total_cores: int
+    process_workers: int
+    threads_per_worker: int
+    main_threads: int
+
+
+class ComputeResources:
+    """OpenCV, torch ve worker havuzu thread sayılarını tek yerden yönetir
+
+    Her kütüphanenin kendi havuzunu tüm çekirdeklere açması aşırı abonelik
+    yaratır; burada bütçe bir kez bölünür ve tüm havuzlar ona göre ayarlanır.
+    """
+
+    INTERACTIVE = "interactive"
+    BATCH = "batch"
+    CORES_ENV = "STENCIL_CPU_CORES"
+
+    _budget: Optional[ComputeBudget] = None
+    _thread_limit: Optional[int] = None
+
+    @classmethod
+    def available_cores(cls) -> int:
+        """Kullanılabilir çekirdek sayısı (ortam değişkeni ile sınırlanabilir)"""
+        env_value = os.environ.get(cls.CORES_ENV)
+        if env_value:
+            try:
+                return max(1, int(env_value))
+            except ValueError:
+                logging.warning(f"Geçersiz {cls.CORES_ENV} değeri: {env_value}")
+        if hasattr(os, "sched_getaffinity"):
+            return max(1, len(os.sched_getaffinity(0)))
+        return max(1, os.cpu_count() or 1)
+
+    @classmethod
+    def plan(cls, mode: str = INTERACTIVE, total_cores: Optional[int] = None) -> ComputeBudget:
+        """Mod için çekirdek dağılımını hesapla"""
+        total = max(1, total_cores or cls.available_cores())
+        # GUI olay döngüsü için bir çekirdek ayrılır
+        usable = max(1, total - 1)
+
+        if mode == cls.BATCH:
+            # Verim: çok sayıda az thread'li worker
+            threads_per_worker = 2 if usable >= 4 else 1
+            workers = max(1, usable // threads_per_worker)
+            main_threads = 1
+        else:
+            # Gecikme: az sayıda çok thread'li worker
+            workers = 1 if usable < 4 else 2
+            main_threads = max(1, usable // (workers + 1))
+            threads_per_worker = max(1, (usable - main_threads) // workers)
+
+        return ComputeBudget(mode, total, workers, threads_per_worker, main_threads)
+
+    @classmethod
+    def configure(cls, mode: str = INTERACTIVE, total_cores: Optional[int] = None) -> ComputeBudget:
+        """Bütçeyi belirle ve bu sürecin thread havuzlarına uygula"""
+        budget = cls.plan(mode, total_cores)
+        cls._budget = budget
+        cls.apply_thread_limit(budget.main_threads)
+        logging.info(
+            f"Hesaplama bütçesi ({budget.mode}): {budget.total_cores} çekirdek, "
+            f"{budget.process_workers} worker x {budget.threads_per_worker} thread, "
+            f"ana süreç {budget.main_threads} thread"
+        )
+        return budget
+
+    @classmethod
+    def budget(cls) -> ComputeBudget:
+        """Geçerli bütçe (henüz ayarlanmadıysa etkileşimli varsayılan)"""
+        if cls._budget is None:
+            cls._budget = cls.plan(cls.INTERACTIVE)
+        return cls._budget
+
+    @classmethod
+    def apply_thread_limit(cls, threads: int) -> None:
+        """OpenCV ve (yüklüyse) torch thread sayısını ayarla"""
+        threads = max(1, int(threads))
+        cls._thread_limit = threads
+        # Sonradan başlatılan OpenMP/MKL havuzları da aynı sınırı görsün
+        os.environ["OMP_NUM_THREADS"] = str(threads)
+        os.environ["MKL_NUM_THREADS"] = str(threads)
+        cv2.setNumThreads(threads)
+
+        cls.sync_torch_threads()
+
+    @classmethod
+    def sync_torch_threads(cls) -> None:
+        """torch sonradan yüklendiyse sınırı ona da uygula"""
+        torch = sys.modules.get("torch")
+        if torch is not None and cls._thread_limit is not None:
+            torch.set_num_threads(cls._thread_limit)
+
+    @staticmethod
+    def worker_initializer(threads: int) -> None:
+        """Worker süreçleri başlarken çağrılır"""
+        ComputeResources.apply_thread_limit(threads)
@@ -1,30 +1,27 @@
-import cv2
-import numpy as np
 import logging
 
 class CropProcessor:
     @staticmethod
-    def process_crop(image, rect, pixmap):
+    def crop_roi(image, rect, pixmap):
+        """Pixmap üzerindeki seçimi görüntü koordinatlarında (x, y, w, h) bölgeye çevir"""
         if not all([image is not None, rect is not None, pixmap is not None]):
             logging.warning("Kırpma için gerekli parametreler eksik")
             return None
-            
+
         try:
             scale_x = image.shape[1] / pixmap.width()
             scale_y = image.shape[0] / pixmap.height()
-            
+
             x = max(0, int(rect.x() * scale_x))
             y = max(0, int(rect.y() * scale_y))
             w = min(int(rect.width() * scale_x), image.shape[1] - x)
             h = min(int(rect.height() * scale_y), image.shape[0] - y)
-            
+
             if w > 0 and h > 0:
-                cropped = image[y:y+h, x:x+w]
-                logging.info(f"Görüntü başarıyla kırpıldı: {w}x{h}")
-                return cropped
-                
+                return (x, y, w, h)
+
         except Exception as e:
-            logging.error(f"Kırpma işlemi hatası: {str(e)}")
+            logging.error(f"Kırpma bölgesi hatası: {str(e)}")
             return None
-        
-        return None
\ No newline at end of file
+
+        return None
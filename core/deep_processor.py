@@ -1,93 +1,222 @@
 import cv2
 import numpy as np
 import logging
-import os
-import urllib.request
+from core.cancellation import check_cancelled, report_progress, sub_progress
+from core.dnn_pool import DnnConfig, DnnNetPool
+from core.inference_batcher import InferenceBatcher
+from core.model_store import ModelStore
+from core.stage_cache import slice_roi, view_roi
 
 class DeepProcessor:
     """Derin öğrenme tabanlı görüntü işleme"""
     
-    MODEL_URL = "https://raw.githubusercontent.com/opencv/opencv_extra/master/testdata/dnn/hed_pretrained_bsds.caffemodel"
-    PROTO_URL = "https://raw.githubusercontent.com/opencv/opencv_3rdparty/master/hed/deploy.prototxt"
+    # Büyük görüntülerde ileri geçiş örtüşen karolarla yapılır;
+    # iptal ve ilerleme karolar arasında kontrol edilir
+    TILE_SIZE = 768
+    TILE_MARGIN = 64
+    # Karolar ve toplu işlemdeki görüntüler tek blob'da işlenir; VGG ara
+    # katmanları büyük olduğundan grup toplam piksel sayısıyla da sınırlanır
+    MAX_BATCH = 8
+    MAX_WAIT_MS = 10.0
+    MAX_BATCH_PIXELS = 2 * (TILE_SIZE + 2 * TILE_MARGIN) ** 2
+    MEAN = (104.00698793, 116.66876762, 122.67891434)
+    # Isınma geçişi girdisi: HED beş havuzlama katmanı için 16'nın katı
+    WARMUP_SIZE = 64
     
-    def __init__(self):
-        self.model_path = "models/hed_model.caffemodel"
-        self.proto_path = "models/deploy.prototxt"
-        self._ensure_model_exists()
+    def __init__(self, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS, bucket=1, config=None,
+                 store=None):
+        self.store = store or ModelStore.default()
+        # Son işlenen görüntü ve HED kenar haritası; kırpılmış görüntü bunun
+        # bir görünümüyse harita yeniden hesaplanmadan dilimlenir
+        self._edge_cache = None
+        # Arka uç/hedef ve havuz boyutu: STENCIL_DNN_* ortam değişkenleri
+        self.config = config or DnnConfig.from_env()
+        # cv2.dnn.Net thread güvenli değil: her kuyruk worker'ı havuzdan ayrı
+        # bir ağ ödünç alır, eşzamanlı çizimler birbirini beklemez.
+        # bucket > 1: farklı boyutlu karolar dolgulanıp aynı blob'a alınır
+        self.batcher = InferenceBatcher(
+            self._forward_batch, max_batch, max_wait_ms, bucket,
+            self.MAX_BATCH_PIXELS, name="HED", workers=self.config.pool_size
+        )
         
         try:
-            self.net = cv2.dnn.readNetFromCaffe(self.proto_path, self.model_path)
+            # Dosyalar bir kez doğrulanıp bellek eşlemesiyle açılır; havuzdaki
+            # her ağ aynı sayfalardan okunur
+            for spec in ModelStore.HED:
+                self.store.ensure(spec)
+            self._proto = self.store.map(ModelStore.HED_PROTO.name)
+            self._weights = self.store.map(ModelStore.HED_MODEL.name)
+            self.nets = DnnNetPool(self._load_net, self.config, self._warm_up_net)
             logging.info("HED model başarıyla yüklendi")
         except Exception as e:
             logging.error(f"Model yükleme hatası: {str(e)}")
-            self.net = None
+            self.nets = None
 
-    def _ensure_model_exists(self):
-        """Model dosyalarının varlığını kontrol et ve indir"""
-        if not os.path.exists('models'):
-            os.makedirs('models')
-            
-        if not os.path.exists(self.model_path):
-            logging.info("HED model indiriliyor...")
-            urllib.request.urlretrieve(self.MODEL_URL, self.model_path)
-            
-        if not os.path.exists(self.proto_path):
-            logging.info("Proto dosyası indiriliyor...")
-            urllib.request.urlretrieve(self.PROTO_URL, self.proto_path)
+    def _load_net(self):
+        return cv2.dnn.readNetFromCaffe(self._proto, self._weights)
+
+    def _warm_up_net(self, net):
+        """Küçük bir girdiyle ileri geçiş: katman bellekleri ilk çizimden önce ayrılır"""
+        size = self.WARMUP_SIZE
+        net.setInput(cv2.dnn.blobFromImage(
+            np.zeros((size, size, 3), np.uint8), 1.0, (size, size), self.MEAN, False, False
+        ))
+        net.forward()
+
+    def _forward_batch(self, batch: np.ndarray) -> np.ndarray:
+        """Aynı boyuttaki parçalar için tek ileri geçişte HED kenar haritaları"""
+        height, width = batch.shape[1:3]
+        inp = cv2.dnn.blobFromImages(
+            list(batch), 
+            scalefactor=1.0, 
+            size=(width, height),
+            mean=self.MEAN,
+            swapRB=False, 
+            crop=False
+        )
+        with self.nets.acquire() as net:
+            net.setInput(inp)
+            edges = net.forward()[:, 0]
+        if edges.shape[1:] != (height, width):
+            edges = np.stack([cv2.resize(part, (width, height)) for part in edges])
+        return edges
+
+    def _tile_windows(self, shape):
+        """(hedef, kenar paylı pencere) çiftleri"""
+        height, width = shape[:2]
+        tile = self.TILE_SIZE
+        margin = self.TILE_MARGIN
+        
+        if max(height, width) <= tile:
+            tiles = [(0, 0, width, height)]
+        else:
+            tiles = [
+                (x, y, min(tile, width - x), min(tile, height - y))
+                for y in range(0, height, tile)
+                for x in range(0, width, tile)
+            ]
+        windows = []
+        for x, y, w, h in tiles:
+            x0, y0 = max(0, x - margin), max(0, y - margin)
+            x1, y1 = min(width, x + w + margin), min(height, y + h + margin)
+            windows.append(((x, y, w, h), (x0, y0, x1, y1)))
+        return windows
+
+    @staticmethod
+    def _assemble(shape, windows, parts) -> np.ndarray:
+        edges = np.empty(shape[:2], np.float32)
+        for ((x, y, w, h), (x0, y0, _, _)), part in zip(windows, parts):
+            edges[y:y + h, x:x + w] = part[y - y0:y - y0 + h, x - x0:x - x0 + w]
+        return edges
+
+    def forward_tiled(self, image: np.ndarray, token=None, progress=None) -> np.ndarray:
+        """HED ileri geçişini örtüşen karolar halinde çalıştır"""
+        windows = self._tile_windows(image.shape)
+        parts = self.batcher.map(
+            [image[y0:y1, x0:x1] for _, (x0, y0, x1, y1) in windows], token, progress
+        )
+        return self._assemble(image.shape, windows, parts)
 
-    def process_hed(self, image: np.ndarray, settings: dict) -> np.ndarray:
+    def edge_map(self, image: np.ndarray, token=None, progress=None) -> np.ndarray:
+        """HED kenar haritası; önceki görüntünün içindeki bölgeler önbellekten gelir"""
+        if self._edge_cache is not None:
+            source, edges = self._edge_cache
+            roi = view_roi(image, source)
+            if roi is not None:
+                logging.debug(f"HED haritası önbellekten alındı: {roi}")
+                report_progress(progress, 1.0)
+                return slice_roi(edges, roi)
+
+        edges = self.forward_tiled(image, token, progress)
+        self._edge_cache = (image, edges)
+        return edges
+
+    def process_hed(self, image: np.ndarray, settings: dict, token=None, progress=None) -> np.ndarray:
         """HED modeli ile kenar tespiti"""
         try:
-            if self.net is None:
+            if self.nets is None:
                 raise Exception("Model yüklenemedi!")
 
-            # Görüntüyü hazırla
-            height, width = image.shape[:2]
-            inp = cv2.dnn.blobFromImage(
-                image, 
-                scalefactor=1.0, 
-                size=(width, height),
-                mean=(104.00698793, 116.66876762, 122.67891434),
-                swapRB=False, 
-                crop=False
-            )
-            
             # Modeli çalıştır
-            self.net.setInput(inp)
-            edges = self.net.forward()
-            edges = edges[0, 0]
-            edges = cv2.resize(edges, (width, height))
-            
-            # Eşikleme ve temizleme
-            threshold = float(settings.get("threshold", 50)) / 100.0
-            edges = cv2.threshold(edges, threshold, 1, cv2.THRESH_BINARY)[1]
-            
-            # Görüntüyü 0-255 aralığına normalize et
-            edges = (edges * 255).astype(np.uint8)
-            
-            # Çizgi kalınlığı
-            thickness = max(1, int(settings.get("line_thickness", 2)))
-            kernel = np.ones((thickness, thickness), np.uint8)
-            edges = cv2.dilate(edges, kernel, iterations=1)
-            
-            # Gürültü azaltma
-            if settings.get("denoise", True):
-                edges = cv2.medianBlur(edges, 3)
+            edges = self.edge_map(
+                image, token,
+                sub_progress(progress, 0.0, 0.9)
+            )
+            check_cancelled(token)
             
-            # Sonucu tersine çevir (beyaz arka plan, siyah çizgiler)
-            return cv2.bitwise_not(edges)
+            report_progress(progress, 1.0)
+            return self._edges_to_stencil(edges, settings)
             
         except Exception as e:
             logging.error(f"HED işleme hatası: {str(e)}")
             return None
 
-    def deep_artistic_stencil(self, image: np.ndarray, settings: dict) -> np.ndarray:
+    def process_hed_batch(self, images, settings: dict, token=None, progress=None):
+        """Birden çok görüntüyü HED ile birlikte işle
+
+        Tüm görüntülerin karoları kuyruğa birlikte verilir; aynı boyuttaki
+        karolar görüntü sınırı gözetmeden tek blob'da işlenir. Sonuçlar
+        girdi sırasıyla döner, hata olursa None.
+        """
+        try:
+            if self.nets is None:
+                raise Exception("Model yüklenemedi!")
+
+            windows = [self._tile_windows(image.shape) for image in images]
+            crops = [
+                image[y0:y1, x0:x1]
+                for image, image_windows in zip(images, windows)
+                for _, (x0, y0, x1, y1) in image_windows
+            ]
+            parts = self.batcher.map(crops, token, sub_progress(progress, 0.0, 0.9))
+
+            results, first = [], 0
+            for image, image_windows in zip(images, windows):
+                check_cancelled(token)
+                count = len(image_windows)
+                edges = self._assemble(image.shape, image_windows, parts[first:first + count])
+                results.append(self._edges_to_stencil(edges, settings))
+                first += count
+            report_progress(progress, 1.0)
+            return results
+
+        except Exception as e:
+            logging.error(f"Toplu HED işleme hatası: {str(e)}")
+            return None
+
+    @staticmethod
+    def _edges_to_stencil(edges: np.ndarray, settings: dict) -> np.ndarray:
+        """HED olasılık haritasından stencil"""
+        # Eşikleme ve temizleme
+        threshold = float(settings.get("threshold", 50)) / 100.0
+        edges = cv2.threshold(edges, threshold, 1, cv2.THRESH_BINARY)[1]
+        
+        # Görüntüyü 0-255 aralığına normalize et
+        edges = (edges * 255).astype(np.uint8)
+        
+        # Çizgi kalınlığı
+        thickness = max(1, int(settings.get("line_thickness", 2)))
+        kernel = np.ones((thickness, thickness), np.uint8)
+        edges = cv2.dilate(edges, kernel, iterations=1)
+        
+        # Gürültü azaltma
+        if settings.get("denoise", True):
+            edges = cv2.medianBlur(edges, 3)
+        
+        # Sonucu tersine çevir (beyaz arka plan, siyah çizgiler)
+        return cv2.bitwise_not(edges)
+
+    def deep_artistic_stencil(self, image: np.ndarray, settings: dict, token=None, progress=None) -> np.ndarray:
         """Gelişmiş sanatsal stencil efekti"""
         try:
             # İlk olarak HED ile kenarları bul
-            edges = self.process_hed(image, settings)
+            edges = self.process_hed(
+                image, settings, token,
+                sub_progress(progress, 0.0, 0.9)
+            )
             if edges is None:
                 return None
+            check_cancelled(token)
                 
             # Kontrast ve detay ayarlamaları
             detail_level = float(settings.get("detail_level", 50)) / 100.0
@@ -113,6 +242,7 @@ class DeepProcessor:
                 threshold = int(255 * detail_level)
                 final = cv2.threshold(adjusted, threshold, 255, cv2.THRESH_BINARY)[1]
             
+            report_progress(progress, 1.0)
             return final
             
         except Exception as e:
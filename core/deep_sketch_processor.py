@@ -1,11 +1,14 @@
 import torch
 import torch.nn as nn
-import torchvision.transforms as transforms
 import numpy as np
 import cv2
-import yaml
 import logging
 import os
+import copy
+import time
+import traceback
+from core.compute_resources import ComputeResources
+from core.sketch_inference import SketchInference
 
 class APDrawingModel(nn.Module):
     def __init__(self):
@@ -33,78 +36,211 @@ class APDrawingModel(nn.Module):
     def forward(self, x):
         return self.layers(x)
 
-class DeepSketchProcessor:
-    def __init__(self):
+class DeepSketchProcessor(SketchInference):
+    """APDrawing modeliyle çizim üretimi
+
+    CPU'da hızlı çıkarım için model channels_last düzenine alınır, isteğe
+    göre TorchScript ile dondurulur ya da torch.compile ile derlenir ve
+    kalibrasyon görüntüleri verilirse int8'e nicelenir. Yükleme sırasında
+    ısınma geçişi yapılır; ilk gerçek çağrı derleme maliyetini ödemez.
+    """
+
+    # "script": iz alınıp dondurulmuş TorchScript, "compile": torch.compile
+    # (ilk çağrıda derleme için C derleyicisi ve ~30 sn gerekir), None: eager
+    COMPILE_MODES = ("script", "compile", None)
+    WARMUP_RUNS = 2
+
+    def __init__(self, compile_mode="script", quantize=False, tiled=True,
+                 batch_size=4, max_side=2048, max_wait_ms=10.0):
+        if compile_mode not in self.COMPILE_MODES:
+            raise ValueError(f"Geçersiz derleme kipi: {compile_mode}")
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-        self.model = None
-        self.transform = transforms.Compose([
-            transforms.ToTensor(),
-            transforms.Normalize(mean=[0.5, 0.5, 0.5], std=[0.5, 0.5, 0.5])
-        ])
+        # torch kendi varsayılan havuzunu değil, ortak bütçeyi kullansın
+        ComputeResources.sync_torch_threads()
+        self.compile_mode = compile_mode
+        self.quantize = quantize
+        super().__init__(tiled, batch_size, max_side, max_wait_ms)
+        # Doğruluk karşılaştırması için optimize edilmemiş float32 model
+        self.float_model = None
 
-    def load_model(self, model_path):
+    def load_model(self, model_path, calibration_images=None):
+        """Modeli yükle, çıkarım için hazırla ve ısındır
+
+        calibration_images: int8 niceleme için örnek görüntüler; quantize
+        açıkken verilmezse model float32 kalır.
+        """
         try:
             if not os.path.exists(model_path):
                 raise FileNotFoundError(f"Model dosyası bulunamadı: {model_path}")
 
-            self.model = APDrawingModel().to(self.device)
+            model = APDrawingModel().to(self.device)
             state_dict = torch.load(model_path, map_location=self.device)
-            self.model.load_state_dict(state_dict)
-            self.model.eval()
+            model.load_state_dict(state_dict)
+            model.eval()
+            self.float_model = model
+            self.model = self.optimize_model(model, calibration_images)
+            self.warm_up()
             logging.info("Model başarıyla yüklendi")
             return True
         except Exception as e:
             logging.error(f"Model yükleme hatası: {str(e)}")
+            logging.debug(traceback.format_exc())
             return False
 
+    def optimize_model(self, model, calibration_images=None):
+        """Çıkarım için hızlandırılmış model kopyası"""
+        example = self.preprocess_image(
+            np.zeros((self.INPUT_SIZE, self.INPUT_SIZE, 3), np.uint8)
+        )
+        if self.quantize:
+            if self.device.type != 'cpu':
+                logging.warning("int8 niceleme yalnızca CPU'da destekleniyor, atlandı")
+            elif not calibration_images:
+                logging.warning("int8 niceleme için kalibrasyon görüntüsü verilmedi, atlandı")
+            else:
+                return self.quantize_model(model, calibration_images)
+
+        # NHWC: oneDNN konvolüsyonları yeniden düzenleme yapmadan çalışır
+        optimized = copy.deepcopy(model).to(memory_format=torch.channels_last)
+        if self.compile_mode == "script":
+            with torch.inference_mode(False), torch.no_grad():
+                # Dondurma ağırlıkları sabitler, conv + relu kaynaştırılır
+                optimized = torch.jit.freeze(torch.jit.trace(optimized, example))
+        elif self.compile_mode == "compile":
+            optimized = torch.compile(optimized)
+        logging.info(f"Çıkarım modeli hazırlandı: {self.compile_mode or 'eager'}, channels_last")
+        return optimized
+
+    def quantize_model(self, model, calibration_images):
+        """Eğitim sonrası statik int8 niceleme (FX)
+
+        Dinamik niceleme yalnızca Linear/RNN katmanlarını kapsar; bu model
+        tamamen konvolüsyon olduğundan aktivasyon aralıkları kalibrasyon
+        görüntülerinden ölçülür.
+        """
+        from torch.ao.quantization import get_default_qconfig_mapping
+        from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+
+        engine = 'x86' if 'x86' in torch.backends.quantized.supported_engines else 'qnnpack'
+        torch.backends.quantized.engine = engine
+        examples = [self.preprocess_image(image) for image in calibration_images]
+        prepared = prepare_fx(copy.deepcopy(model), get_default_qconfig_mapping(engine), (examples[0],))
+        with torch.no_grad():
+            for example in examples:
+                prepared(example)
+        quantized = convert_fx(prepared)
+        logging.info(f"Model int8'e nicelendi: {engine}, {len(examples)} kalibrasyon görüntüsü")
+        return quantized
+
+    def warm_up(self):
+        """Boş girdilerle birkaç geçiş: TorchScript profili ve bellek havuzları hazırlanır"""
+        if self.model is None:
+            return
+        start = time.perf_counter()
+        example = self.preprocess_image(
+            np.zeros((self.INPUT_SIZE, self.INPUT_SIZE, 3), np.uint8)
+        )
+        with torch.inference_mode():
+            for _ in range(self.WARMUP_RUNS):
+                self.model(example)
+        logging.info(f"Model ısındırıldı: {1000 * (time.perf_counter() - start):.0f} ms")
+
+    def _to_tensor(self, batch):
+        """(N, H, W, 3) uint8 diziyi [-1, 1] aralığında NCHW tensöre çevir
+
+        HWC dizinin NCHW görünümü zaten channels_last düzenindedir; kopya
+        yalnızca float dönüşümünde yapılır.
+        """
+        tensor = torch.from_numpy(np.ascontiguousarray(batch)).permute(0, 3, 1, 2)
+        return tensor.to(self.device, torch.float32).mul_(1 / 127.5).sub_(1.0)
+
     def preprocess_image(self, image):
-        # Görüntüyü model için hazırla
-        if len(image.shape) == 2:
-            image = cv2.cvtColor(image, cv2.COLOR_GRAY2RGB)
-        
-        # Görüntüyü 512x512'ye yeniden boyutlandır
-        image = cv2.resize(image, (512, 512))
-        
-        # Normalizasyon ve tensor dönüşümü
-        tensor = self.transform(image)
-        tensor = tensor.unsqueeze(0).to(self.device)
-        
-        return tensor
+        return self._to_tensor(self._prepare(image)[None])
 
     def postprocess_output(self, output):
-        # Model çıktısını görüntüye dönüştür
-        output = output.cpu().detach().numpy()
-        output = np.transpose(output[0], (1, 2, 0))
-        output = ((output + 1) * 127.5).astype(np.uint8)
-        
-        # Tek kanala dönüştür
-        if output.shape[-1] > 1:
-            output = cv2.cvtColor(output, cv2.COLOR_RGB2GRAY)
-        
-        return output
-
-    def process_image(self, image, settings=None):
-        """Görüntüyü işle ve sketch'e dönüştür"""
-        try:
-            if self.model is None:
-                raise ValueError("Model yüklenmemiş!")
+        # Model çıktısını görüntüye dönüştür (tek kanallı)
+        return self._to_uint8(output[0, 0].float().cpu().numpy())
 
-            with torch.no_grad():
-                # Görüntüyü hazırla
-                input_tensor = self.preprocess_image(image)
-                
-                # Model çıktısını al
-                output = self.model(input_tensor)
-                
-                # Çıktıyı işle
-                result = self.postprocess_output(output)
-                
-                # Orijinal boyuta döndür
-                if image.shape[:2] != result.shape[:2]:
-                    result = cv2.resize(result, (image.shape[1], image.shape[0]))
-                
-                return result
+    def _forward_batch(self, batch):
+        """Kuyruk thread'inde çalışır: (N, H, W, 3) uint8 -> (N, H, W) çıktı [-1, 1]"""
+        with torch.inference_mode():
+            return self.model(self._to_tensor(batch))[:, 0].float().cpu().numpy()
+
+    ONNX_OPSET = 13
+
+    @staticmethod
+    def export_onnx(model_path, onnx_path, opset=ONNX_OPSET):
+        """Ağırlıkları ONNX'e aktar: torch'suz çalışma yolu (OnnxSketchProcessor) için
 
+        Giriş (N, 3, H, W) float [-1, 1], çıkış (N, 1, H, W); grup ve
+        uzamsal boyutlar dinamiktir, H ve W 8'in katı olmalıdır.
+        """
+        try:
+            model = APDrawingModel()
+            model.load_state_dict(torch.load(model_path, map_location='cpu'))
+            model.eval()
+            example = torch.zeros(1, 3, DeepSketchProcessor.INPUT_SIZE, DeepSketchProcessor.INPUT_SIZE)
+            axes = {0: 'batch', 2: 'height', 3: 'width'}
+            temp_path = onnx_path + '.part'
+            with torch.no_grad():
+                torch.onnx.export(
+                    model, example, temp_path,
+                    input_names=['input'], output_names=['output'],
+                    dynamic_axes={'input': axes, 'output': axes},
+                    opset_version=opset, dynamo=False
+                )
+            os.replace(temp_path, onnx_path)
+            logging.info(f"ONNX modeli kaydedildi: {onnx_path}")
+            return True
         except Exception as e:
-            logging.error(f"Görüntü işleme hatası: {str(e)}")
-            return None
+            logging.error(f"ONNX aktarma hatası: {str(e)}")
+            logging.debug(traceback.format_exc())
+            return False
+
+    @staticmethod
+    def compare_variants(model_path, images, calibration_images=None, runs=3):
+        """Optimize çıkarım kiplerinin gecikme ve doğruluk raporu
+
+        Her kip float32 eager çıktısıyla karşılaştırılır: en büyük fark
+        (0-255), PSNR (dB) ve 128 eşiğiyle ikili stencil uyumu (%).
+        """
+        variants = [
+            ("float32", dict(compile_mode=None)),
+            ("channels_last", dict(compile_mode=None)),
+            ("script", dict(compile_mode="script")),
+            ("int8", dict(compile_mode=None, quantize=True))
+        ]
+        report = {}
+        baseline_outputs = None
+        for name, options in variants:
+            processor = DeepSketchProcessor(**options)
+            if not processor.load_model(model_path, calibration_images or images):
+                continue
+            if name == "float32":
+                # Referans: hiç optimize edilmemiş model, varsayılan (NCHW) bellek düzeni
+                float_model = processor.float_model
+                processor.model = lambda tensor: float_model(tensor.contiguous())
+            outputs, timings = [], []
+            for image in images:
+                processor.process_image(image)
+                start = time.perf_counter()
+                for _ in range(runs):
+                    result = processor.process_image(image)
+                timings.append((time.perf_counter() - start) / runs)
+                outputs.append(result)
+            if baseline_outputs is None:
+                baseline_outputs = outputs
+            errors = [cv2.absdiff(out, ref) for out, ref in zip(outputs, baseline_outputs)]
+            mse = float(np.mean([np.mean(np.square(e, dtype=np.float64)) for e in errors]))
+            agreement = np.mean([
+                np.mean((out > 127) == (ref > 127)) for out, ref in zip(outputs, baseline_outputs)
+            ])
+            report[name] = {
+                "latency_ms": 1000 * float(np.mean(timings)),
+                "max_error": int(max(int(e.max()) for e in errors)),
+                "psnr_db": float('inf') if mse == 0 else 10 * np.log10(255 ** 2 / mse),
+                "stencil_agreement": 100 * float(agreement)
+            }
+            processor.batcher.close()
+            logging.info(f"Çıkarım kipi {name}: {report[name]}")
+        return report
@@ -0,0 +1,129 @@
+import cv2
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+
+@dataclass(frozen=True)
+class DnnConfig:
+    """OpenCV DNN arka ucu, hedefi ve ağ havuzu boyutu
+
+    backend: "opencv" (varsayılan) ya da "openvino" (Inference Engine
+    derlemede varsa). precision: "fp32" ya da "fp16" (CPU'da FP16 hedefi).
+    İstenen birleşim bu OpenCV derlemesinde yoksa OpenCV/FP32'ye düşülür.
+    """
+    backend: str = "opencv"
+    precision: str = "fp32"
+    pool_size: int = 2
+
+    BACKEND_ENV = "STENCIL_DNN_BACKEND"
+    PRECISION_ENV = "STENCIL_DNN_PRECISION"
+    POOL_ENV = "STENCIL_DNN_POOL"
+
+    @classmethod
+    def from_env(cls) -> "DnnConfig":
+        """Ortam değişkenlerinden yapılandırma (verilmeyenler varsayılan)"""
+        pool_size = cls.pool_size
+        env_pool = os.environ.get(cls.POOL_ENV)
+        if env_pool:
+            try:
+                pool_size = max(1, int(env_pool))
+            except ValueError:
+                logging.warning(f"Geçersiz {cls.POOL_ENV} değeri: {env_pool}")
+        return cls(
+            backend=os.environ.get(cls.BACKEND_ENV, cls.backend).lower(),
+            precision=os.environ.get(cls.PRECISION_ENV, cls.precision).lower(),
+            pool_size=pool_size
+        )
+
+    def resolve(self):
+        """Bu derlemede kullanılabilir (arka uç, hedef) kimlikleri"""
+        backends = {
+            "opencv": cv2.dnn.DNN_BACKEND_OPENCV,
+            "openvino": cv2.dnn.DNN_BACKEND_INFERENCE_ENGINE
+        }
+        targets = {
+            "fp32": cv2.dnn.DNN_TARGET_CPU,
+            "fp16": cv2.dnn.DNN_TARGET_CPU_FP16
+        }
+        backend = backends.get(self.backend)
+        target = targets.get(self.precision)
+        if backend is None or target is None:
+            logging.warning(f"Bilinmeyen DNN ayarı: {self.backend}/{self.precision}, OpenCV/FP32 kullanılıyor")
+            return cv2.dnn.DNN_BACKEND_OPENCV, cv2.dnn.DNN_TARGET_CPU
+
+        available = cv2.dnn.getAvailableTargets(backend)
+        if target in available:
+            return backend, target
+        if cv2.dnn.DNN_TARGET_CPU in available:
+            logging.warning(f"DNN hedefi {self.precision} {self.backend} için yok, FP32 kullanılıyor")
+            return backend, cv2.dnn.DNN_TARGET_CPU
+        logging.warning(f"DNN arka ucu {self.backend} bu OpenCV derlemesinde yok, OpenCV/FP32 kullanılıyor")
+        return cv2.dnn.DNN_BACKEND_OPENCV, cv2.dnn.DNN_TARGET_CPU
+
+
+class DnnNetPool:
+    """Isındırılmış cv2.dnn.Net örnekleri havuzu
+
+    cv2.dnn.Net setInput/forward çağrılarında iç durum tuttuğundan bir
+    örnek aynı anda tek thread'de kullanılmalıdır. İlk ağ hemen yüklenir
+    (dosya hataları başta yakalanır); diğerleri ilk ihtiyaçta, en çok
+    pool_size adet oluşturulur. Her ağ havuza girmeden önce küçük bir
+    girdiyle ısındırılır.
+    """
+
+    def __init__(self, load_net: Callable[[], "cv2.dnn.Net"], config: Optional[DnnConfig] = None,
+                 warm_up: Optional[Callable[["cv2.dnn.Net"], None]] = None):
+        self.load_net = load_net
+        self.config = config or DnnConfig()
+        self.warm_up = warm_up
+        self.backend, self.target = self.config.resolve()
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 1
+        self._idle.put(self._create(1))
+
+    @property
+    def size(self) -> int:
+        return self.config.pool_size
+
+    def _create(self, index):
+        start = time.perf_counter()
+        net = self.load_net()
+        net.setPreferableBackend(self.backend)
+        net.setPreferableTarget(self.target)
+        if self.warm_up is not None:
+            self.warm_up(net)
+        logging.info(f"DNN ağı {index}/{self.size} hazır: "
+                     f"{1000 * (time.perf_counter() - start):.0f} ms")
+        return net
+
+    @contextmanager
+    def acquire(self):
+        """Boştaki bir ağı ödünç al; hepsi kullanımdaysa biri boşalana kadar bekle"""
+        try:
+            net = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                index = self._created + 1 if self._created < self.size else None
+                if index is not None:
+                    # Yer kilit içinde ayrılır, yükleme kilit dışında yapılır
+                    self._created = index
+            if index is None:
+                net = self._idle.get()
+            else:
+                try:
+                    net = self._create(index)
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+        try:
+            yield net
+        finally:
+            self._idle.put(net)
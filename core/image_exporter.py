@@ -0,0 +1,377 @@
+import numpy as np
+import logging
+import os
+import struct
+import subprocess
+import time
+import traceback
+import zlib
+from dataclasses import dataclass
+from typing import BinaryIO, Dict, List, Tuple, Union
+
+from core.cancellation import RenderCancelled, check_cancelled, report_progress
+from core.packed_mask import PackedMask
+from core.tiled_image import TiledTiffWriter
+
+
+@dataclass
+class ExportOptions:
+    """Kayıt biçimi ve sıkıştırma ayarları"""
+    format: str = "png1"
+    # zlib seviyesi (0-9); PNG ve Deflate TIFF için
+    level: int = 6
+    strategy: str = "Varsayılan"
+    png_filter: str = "Yok"
+    # Raster biçimlerinde yazıcıya bildirilen çözünürlük
+    dpi: int = 300
+
+
+class PngStreamWriter:
+    """Gri ya da 1 bitlik PNG'yi bant bant sıkıştırıp diske yazan akış yazıcısı
+
+    Her bant satır filtresinden geçirilip tek bir zlib akışına verilir;
+    çıkan parçalar ayrı IDAT blokları olarak hemen dosyaya yazılır.
+    """
+
+    def __init__(self, path: str, width: int, height: int, bit_depth: int = 8,
+                 level: int = 6, strategy: int = zlib.Z_DEFAULT_STRATEGY, png_filter: int = 0):
+        self.path = path
+        self.width = width
+        self.height = height
+        self.png_filter = png_filter
+        self.row_bytes = width if bit_depth == 8 else (width + 7) // 8
+        self.rows_written = 0
+        # Up filtresi için bir önceki bandın son satırı
+        self._previous = np.zeros(self.row_bytes, np.uint8)
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS, 9, strategy)
+        self._file = open(path, 'wb')
+        self._file.write(b'\x89PNG\r\n\x1a\n')
+        self._chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, bit_depth, 0, 0, 0, 0))
+
+    def _chunk(self, kind: bytes, data: bytes) -> None:
+        self._file.write(struct.pack('>I', len(data)) + kind + data +
+                         struct.pack('>I', zlib.crc32(kind + data) & 0xFFFFFFFF))
+
+    def _filter(self, rows: np.ndarray) -> np.ndarray:
+        """Satırları filtre baytıyla birlikte filtrelenmiş halde döndür"""
+        raw = np.empty((rows.shape[0], self.row_bytes + 1), np.uint8)
+        raw[:, 0] = self.png_filter
+        if self.png_filter == 1:
+            # Sub: soldaki bayttan fark (uint8 taşması PNG'deki mod 256'dır)
+            raw[:, 1] = rows[:, 0]
+            np.subtract(rows[:, 1:], rows[:, :-1], out=raw[:, 2:])
+        elif self.png_filter == 2:
+            # Up: üstteki satırdan fark
+            np.subtract(rows[0], self._previous, out=raw[0, 1:])
+            np.subtract(rows[1:], rows[:-1], out=raw[1:, 1:])
+        else:
+            raw[:, 1:] = rows
+        return raw
+
+    def write_rows(self, rows: np.ndarray) -> None:
+        """Sıradaki satırları ekle (HxW uint8, 1 bitte Hx ceil(W/8) paketli)"""
+        if rows.ndim != 2 or rows.shape[1] != self.row_bytes:
+            raise ValueError(f"Beklenmeyen satır boyutu: {rows.shape}")
+        if self.rows_written + rows.shape[0] > self.height:
+            raise ValueError("Görüntü yüksekliği aşıldı")
+        if not len(rows):
+            return
+        data = self._compressor.compress(self._filter(rows).data)
+        self._previous = rows[-1].copy()
+        self.rows_written += rows.shape[0]
+        if data:
+            self._chunk(b'IDAT', data)
+
+    def close(self) -> None:
+        """zlib akışını bitir, IEND yaz ve dosyayı kapat"""
+        if self._file is None:
+            return
+        try:
+            if self.rows_written != self.height:
+                raise ValueError(f"Eksik satır: {self.rows_written}/{self.height}")
+            self._chunk(b'IDAT', self._compressor.flush())
+            self._chunk(b'IEND', b'')
+        finally:
+            self._file.close()
+            self._file = None
+
+    def abort(self) -> None:
+        """Yarım kalan dosyayı sil"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        try:
+            os.remove(self.path)
+        except OSError as e:
+            logging.debug(f"Yarım dosya silinemedi: {str(e)}")
+
+
+class RasterStreamWriter:
+    """Termal yazıcılar için 1 bitlik raster akışı (PBM P4 ya da PCL)
+
+    Satırlar geldikçe yazılır ve bant sonunda akış boşaltılır; yazıcı ya da
+    boru (pipe) karşısındaki süreç ilk bandı tüm görüntü bitmeden alır.
+    Hedef dosya yolu ya da açık bir ikili akış olabilir. Her iki biçimde de
+    1 siyah demektir, paketli maskenin tersidir.
+    """
+
+    ESC = b'\x1b'
+
+    def __init__(self, target: Union[str, BinaryIO], width: int, height: int,
+                 kind: str = "pbm", dpi: int = 300):
+        if kind not in ("pbm", "pcl"):
+            raise ValueError(f"Desteklenmeyen raster biçimi: {kind}")
+        self.width = width
+        self.height = height
+        self.kind = kind
+        self.row_bytes = (width + 7) // 8
+        self.rows_written = 0
+        self.path = target if isinstance(target, str) else None
+        self._file = open(target, 'wb') if self.path else target
+        # Satır sonundaki boş (beyaz) baytlar taşınmaz; bitiş maskesi
+        self._pad_mask = np.uint8((0xFF << (-width % 8)) & 0xFF)
+        if kind == "pbm":
+            header = f"P4\n# {dpi} DPI\n{width} {height}\n".encode('ascii')
+        else:
+            esc = self.ESC
+            # Sıfırla, çözünürlük, kaynak boyutu, sıkıştırmasız raster başlat
+            header = (esc + b'E' + esc + b'*t%dR' % dpi + esc + b'*r%dS' % width +
+                      esc + b'*r%dT' % height + esc + b'*b0M' + esc + b'*r1A')
+        self._file.write(header)
+        self._file.flush()
+
+    def write_rows(self, rows: np.ndarray) -> None:
+        """Sıradaki paketli satırları ekle (1 beyaz, Hx ceil(W/8))"""
+        if rows.ndim != 2 or rows.shape[1] != self.row_bytes:
+            raise ValueError(f"Beklenmeyen satır boyutu: {rows.shape}")
+        if self.rows_written + rows.shape[0] > self.height:
+            raise ValueError("Görüntü yüksekliği aşıldı")
+        black = np.invert(rows)
+        # Dolgu bitleri beyaz (0) kalmalı
+        black[:, -1] &= self._pad_mask
+        if self.kind == "pbm":
+            self._file.write(black.data)
+        else:
+            # Her satırın son siyah baytına kadar olan kısmı gönderilir
+            nonzero = black != 0
+            lengths = np.where(nonzero.any(axis=1),
+                               self.row_bytes - np.argmax(nonzero[:, ::-1], axis=1), 0)
+            prefix = self.ESC + b'*b'
+            self._file.write(b''.join(
+                prefix + b'%dW' % length + row[:length].tobytes()
+                for row, length in zip(black, lengths.tolist())
+            ))
+        self.rows_written += rows.shape[0]
+        self._file.flush()
+
+    def close(self) -> None:
+        """Raster'ı bitir; dosyayı yalnızca kendisi açtıysa kapatır"""
+        if self._file is None:
+            return
+        try:
+            if self.rows_written != self.height:
+                raise ValueError(f"Eksik satır: {self.rows_written}/{self.height}")
+            if self.kind == "pcl":
+                self._file.write(self.ESC + b'*rB' + self.ESC + b'E')
+            self._file.flush()
+        finally:
+            if self.path:
+                self._file.close()
+            self._file = None
+
+    def abort(self) -> None:
+        """Yarım kalan dosyayı sil; akış hedefi açık bırakılır"""
+        if self._file is None:
+            return
+        if not self.path:
+            self._file = None
+            return
+        self._file.close()
+        self._file = None
+        try:
+            os.remove(self.path)
+        except OSError as e:
+            logging.debug(f"Yarım dosya silinemedi: {str(e)}")
+
+
+class ImageExporter:
+    """Stencil'i seçilen biçimde, bant bant ve iptal edilebilir şekilde kaydeder
+
+    Dosya önce geçici adla yazılır, tamamlanınca yerine taşınır; iptal ya
+    da hata durumunda eski dosya bozulmaz.
+    """
+
+    # anahtar: (dosya filtresi, uzantı, bit derinliği)
+    FORMATS: Dict[str, Tuple[str, str, int]] = {
+        "png1": ("1 bit PNG (*.png)", ".png", 1),
+        "g4": ("CCITT G4 TIFF (*.tif)", ".tif", 1),
+        "tiff1": ("Sıkıştırmasız 1 bit TIFF (*.tif)", ".tif", 1),
+        "png8": ("8 bit PNG (*.png)", ".png", 8),
+        "tiff8": ("Sıkıştırmasız 8 bit TIFF (*.tif)", ".tif", 8),
+        "deflate8": ("Hızlı Deflate TIFF (*.tif)", ".tif", 8),
+        "pbm": ("PBM Raster (*.pbm)", ".pbm", 1),
+        "pcl": ("PCL Raster (*.pcl)", ".pcl", 1)
+    }
+    RASTER_FORMATS = ("pbm", "pcl")
+    # Sıkıştırma seviyesi/stratejisi yalnızca zlib kullanan biçimlerde anlamlı
+    COMPRESSED_FORMATS = ("png1", "png8", "deflate8")
+
+    STRATEGIES = {
+        "Varsayılan": zlib.Z_DEFAULT_STRATEGY,
+        "Filtreli": zlib.Z_FILTERED,
+        "Yalnızca Huffman": zlib.Z_HUFFMAN_ONLY,
+        "RLE": zlib.Z_RLE,
+        "Sabit Huffman": zlib.Z_FIXED
+    }
+    PNG_FILTERS = {"Yok": 0, "Sub": 1, "Up": 2}
+
+    # Her adımda işlenen satır sayısı; ilerleme ve iptal bu aralıkla denetlenir
+    BAND_ROWS = 256
+
+    @staticmethod
+    def format_for_filter(selected_filter: str) -> str:
+        for key, (name, _, _) in ImageExporter.FORMATS.items():
+            if name == selected_filter:
+                return key
+        return "png8"
+
+    @staticmethod
+    def with_extension(file_name: str, export_format: str) -> str:
+        extension = ImageExporter.FORMATS[export_format][1]
+        if extension == ".tif" and file_name.lower().endswith(('.tif', '.tiff')):
+            return file_name
+        if not file_name.lower().endswith(extension):
+            file_name += extension
+        return file_name
+
+    @staticmethod
+    def _rows(image: Union[PackedMask, np.ndarray], y: int, rows: int, bits: int) -> np.ndarray:
+        """Bandı istenen bit derinliğinde döndür; paketli maske bütünüyle açılmaz"""
+        if bits == 1:
+            return image.bits[y:y + rows]
+        if isinstance(image, PackedMask):
+            return image.unpack((0, y, image.width, rows))
+        return image[y:y + rows]
+
+    @staticmethod
+    def _create_writer(path: str, width: int, height: int, options: ExportOptions):
+        export_format = options.format
+        bits = ImageExporter.FORMATS[export_format][2]
+        if export_format in ("png1", "png8"):
+            return PngStreamWriter(
+                path, width, height, bits, options.level,
+                ImageExporter.STRATEGIES.get(options.strategy, zlib.Z_DEFAULT_STRATEGY),
+                ImageExporter.PNG_FILTERS.get(options.png_filter, 0)
+            )
+        if export_format in ImageExporter.RASTER_FORMATS:
+            return RasterStreamWriter(path, width, height, export_format, options.dpi)
+        if export_format == "deflate8":
+            return TiledTiffWriter(path, width, height, bits_per_sample=bits,
+                                   compression=TiledTiffWriter.COMPRESSION_DEFLATE,
+                                   level=options.level)
+        return TiledTiffWriter(path, width, height, bits_per_sample=bits)
+
+    @staticmethod
+    def _write_bands(image: Union[PackedMask, np.ndarray], writer, bits: int,
+                     token=None, progress=None) -> None:
+        """Görüntüyü bant bant yazıcıya aktar ve yazıcıyı kapat"""
+        height = image.shape[0]
+        for y in range(0, height, ImageExporter.BAND_ROWS):
+            check_cancelled(token)
+            rows = min(ImageExporter.BAND_ROWS, height - y)
+            writer.write_rows(ImageExporter._rows(image, y, rows, bits))
+            report_progress(progress, (y + rows) / height)
+        writer.close()
+
+    @staticmethod
+    def stream(image: Union[PackedMask, np.ndarray], target: BinaryIO, options: ExportOptions,
+               token=None, progress=None) -> None:
+        """1 bitlik raster'ı açık bir akışa (boru, soket) bant bant yaz
+
+        Akış kapatılmaz; iptalde RenderCancelled yükselir.
+        """
+        if options.format not in ImageExporter.RASTER_FORMATS:
+            raise ValueError(f"Akış yalnızca raster biçimlerinde desteklenir: {options.format}")
+        if not isinstance(image, PackedMask):
+            image = PackedMask.from_array(image)
+        height, width = image.shape
+        writer = RasterStreamWriter(target, width, height, options.format, options.dpi)
+        try:
+            ImageExporter._write_bands(image, writer, 1, token, progress)
+        except BaseException:
+            writer.abort()
+            raise
+
+    @staticmethod
+    def send_to_command(image: Union[PackedMask, np.ndarray], command: List[str],
+                        options: ExportOptions, token=None, progress=None) -> bool:
+        """Raster'ı bir sürecin (yazıcı kuyruğu, yerel yazıcı taklidi) girişine aktar"""
+        process = None
+        start = time.perf_counter()
+        try:
+            process = subprocess.Popen(command, stdin=subprocess.PIPE)
+            ImageExporter.stream(image, process.stdin, options, token, progress)
+            process.stdin.close()
+            code = process.wait()
+            if code != 0:
+                logging.error(f"Yazıcı komutu hata ile bitti: {command} ({code})")
+                return False
+            elapsed = time.perf_counter() - start
+            logging.info(f"Stencil yazıcıya gönderildi: {' '.join(command)} ({elapsed:.2f} sn)")
+            return True
+
+        except RenderCancelled:
+            logging.info("Yazıcıya gönderme iptal edildi")
+        except Exception as e:
+            logging.error(f"Yazıcıya gönderme hatası: {str(e)}")
+            logging.debug(traceback.format_exc())
+
+        if process is not None:
+            # Yarım raster basılmasın diye süreç durdurulur
+            process.kill()
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+            process.wait()
+        return False
+
+    @staticmethod
+    def export(image: Union[PackedMask, np.ndarray], file_name: str, options: ExportOptions,
+               token=None, progress=None) -> bool:
+        """Görüntüyü seçilen biçimde kaydet; iptal edilirse False döner"""
+        temp_name = file_name + '.part'
+        writer = None
+        start = time.perf_counter()
+        try:
+            bits = ImageExporter.FORMATS[options.format][2]
+            if bits == 1 and not isinstance(image, PackedMask):
+                # Gri tonlu sonuç 1 bit kaydedilirken eşiklenir
+                image = PackedMask.from_array(image)
+            height, width = image.shape[:2]
+
+            if options.format == "g4":
+                data = image.encode_g4_tiff(token, progress)
+                with open(temp_name, 'wb') as f:
+                    f.write(data)
+            else:
+                writer = ImageExporter._create_writer(temp_name, width, height, options)
+                ImageExporter._write_bands(image, writer, bits, token, progress)
+
+            os.replace(temp_name, file_name)
+            elapsed = time.perf_counter() - start
+            logging.info(f"Stencil kaydedildi: {file_name} ({os.path.getsize(file_name)} bayt, "
+                         f"{elapsed:.2f} sn)")
+            return True
+
+        except RenderCancelled:
+            logging.info("Kayıt iptal edildi")
+        except Exception as e:
+            logging.error(f"Kayıt hatası: {str(e)}")
+            logging.debug(traceback.format_exc())
+
+        if writer is not None:
+            writer.abort()
+        elif os.path.exists(temp_name):
+            os.remove(temp_name)
+        return False
@@ -0,0 +1,123 @@
+import cv2
+import mmap
+import numpy as np
+import logging
+import struct
+import traceback
+from typing import Optional
+
+
+class ImageLoader:
+    """Dosyadan görüntü çözme: bellek eşlemeli okuma, küçültülmüş hızlı
+    çözme ve EXIF yönlendirmesi"""
+
+    # Küçültülmüş çözme yalnızca ölçekli DCT destekleyen JPEG'de hızlıdır
+    JPEG_SIGNATURE = b'\xff\xd8'
+    # Bu boyutun altındaki dosyalar zaten hızlı çözülür, önizleme gereksiz
+    PREVIEW_MIN_BYTES = 1024 * 1024
+
+    REDUCED_FLAGS = {
+        2: cv2.IMREAD_REDUCED_COLOR_2,
+        4: cv2.IMREAD_REDUCED_COLOR_4,
+        8: cv2.IMREAD_REDUCED_COLOR_8
+    }
+
+    @staticmethod
+    def exif_orientation(data: np.ndarray) -> int:
+        """JPEG APP1 (Exif) bloğundan yönlendirme etiketini oku (1-8)"""
+        try:
+            buf = memoryview(data)
+            if bytes(buf[:2]) != ImageLoader.JPEG_SIGNATURE:
+                return 1
+            pos = 2
+            while pos + 4 <= len(buf):
+                if buf[pos] != 0xFF:
+                    return 1
+                marker = buf[pos + 1]
+                # SOS ile görüntü verisi başlar, sonrasında Exif aranmaz
+                if marker == 0xDA:
+                    return 1
+                length = struct.unpack('>H', buf[pos + 2:pos + 4])[0]
+                if marker == 0xE1 and bytes(buf[pos + 4:pos + 10]) == b'Exif\x00\x00':
+                    return ImageLoader._tiff_orientation(bytes(buf[pos + 10:pos + 2 + length]))
+                pos += 2 + length
+        except Exception as e:
+            logging.debug(f"Exif okuma hatası: {str(e)}")
+        return 1
+
+    @staticmethod
+    def _tiff_orientation(tiff: bytes) -> int:
+        order = '<' if tiff[:2] == b'II' else '>'
+        ifd_offset = struct.unpack(order + 'I', tiff[4:8])[0]
+        count = struct.unpack(order + 'H', tiff[ifd_offset:ifd_offset + 2])[0]
+        for index in range(count):
+            entry = ifd_offset + 2 + index * 12
+            tag = struct.unpack(order + 'H', tiff[entry:entry + 2])[0]
+            if tag == 0x0112:
+                value = struct.unpack(order + 'H', tiff[entry + 8:entry + 10])[0]
+                return value if 1 <= value <= 8 else 1
+        return 1
+
+    @staticmethod
+    def apply_orientation(image: np.ndarray, orientation: int) -> np.ndarray:
+        """EXIF yönlendirmesine göre görüntüyü döndür/çevir"""
+        if orientation in (2, 4, 5, 7):
+            image = cv2.flip(image, 1)
+        rotations = {
+            3: cv2.ROTATE_180, 4: cv2.ROTATE_180,
+            5: cv2.ROTATE_90_COUNTERCLOCKWISE, 6: cv2.ROTATE_90_CLOCKWISE,
+            7: cv2.ROTATE_90_CLOCKWISE, 8: cv2.ROTATE_90_COUNTERCLOCKWISE
+        }
+        if orientation in rotations:
+            image = cv2.rotate(image, rotations[orientation])
+        return image
+
+    @staticmethod
+    def decode(data: np.ndarray, reduction: int = 1) -> Optional[np.ndarray]:
+        """Kodlanmış baytları çöz; reduction 2/4/8 ise küçültülmüş çöz
+
+        OpenCV sürümleri imdecode'da yönlendirmeyi farklı ele aldığından
+        yönlendirme burada açıkça uygulanır.
+        """
+        flags = ImageLoader.REDUCED_FLAGS.get(reduction, cv2.IMREAD_COLOR)
+        image = cv2.imdecode(data, flags | cv2.IMREAD_IGNORE_ORIENTATION)
+        if image is None:
+            return None
+        return ImageLoader.apply_orientation(image, ImageLoader.exif_orientation(data))
+
+    @staticmethod
+    def preview_reduction(data: np.ndarray) -> int:
+        """Hızlı önizleme için küçültme oranı; 1 ise önizleme yapılmaz"""
+        if len(data) < ImageLoader.PREVIEW_MIN_BYTES:
+            return 1
+        if bytes(memoryview(data)[:2]) != ImageLoader.JPEG_SIGNATURE:
+            return 1
+        return 4
+
+    @staticmethod
+    def load(file_name: str, preview_callback=None) -> Optional[np.ndarray]:
+        """Dosyayı bellek eşlemesiyle oku ve tam çözünürlükte çöz
+
+        preview_callback verilirse ve dosya büyük bir JPEG ise önce
+        küçültülmüş hali çözülüp geri çağrıya verilir.
+        """
+        try:
+            with open(file_name, 'rb') as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                # Dosya belleğe kopyalanmadan doğrudan çözücüye verilir
+                data = np.frombuffer(mapped, dtype=np.uint8)
+                try:
+                    reduction = ImageLoader.preview_reduction(data)
+                    if preview_callback is not None and reduction > 1:
+                        preview = ImageLoader.decode(data, reduction)
+                        if preview is not None:
+                            preview_callback(preview, reduction)
+                    return ImageLoader.decode(data)
+                finally:
+                    # mmap kapanmadan önce buffer referansı bırakılmalı
+                    del data
+
+        except Exception as e:
+            logging.error(f"Görüntü yükleme hatası: {str(e)}")
+            logging.debug(traceback.format_exc())
+            return None
@@ -0,0 +1,70 @@
+import logging
+import math
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+class ImagePyramid:
+    """Tembel oluşturulan görüntü piramidi
+
+    Seviye 0 görüntünün kendisidir (kopyalanmaz); her üst seviye bir
+    öncekinin INTER_AREA ile yarıya küçültülmüş halidir ve yalnızca ilk
+    istendiğinde hesaplanır.
+    """
+
+    def __init__(self, image: np.ndarray, tile_size: int = 256, min_size: int = 256):
+        self.tile_size = tile_size
+        self._levels: List[Optional[np.ndarray]] = [image]
+        h, w = image.shape[:2]
+        # En küçük seviye min_size'a sığana kadar
+        count = 1
+        while max(h, w) > min_size:
+            h, w = (h + 1) // 2, (w + 1) // 2
+            count += 1
+        self._levels.extend([None] * (count - 1))
+
+    @property
+    def width(self) -> int:
+        return self._levels[0].shape[1]
+
+    @property
+    def height(self) -> int:
+        return self._levels[0].shape[0]
+
+    @property
+    def level_count(self) -> int:
+        return len(self._levels)
+
+    def level(self, index: int) -> np.ndarray:
+        """İstenen seviyeyi döndür, gerekiyorsa oluştur"""
+        index = max(0, min(index, self.level_count - 1))
+        if self._levels[index] is None:
+            previous = self.level(index - 1)
+            h, w = previous.shape[:2]
+            size = ((w + 1) // 2, (h + 1) // 2)
+            self._levels[index] = cv2.resize(previous, size, interpolation=cv2.INTER_AREA)
+            logging.debug(f"Piramit seviyesi oluşturuldu: {index} ({size[0]}x{size[1]})")
+        return self._levels[index]
+
+    def level_for_scale(self, scale: float) -> int:
+        """Ekrandaki ölçek için yeterli çözünürlükteki en küçük seviye"""
+        if scale <= 0:
+            return self.level_count - 1
+        index = int(math.floor(math.log2(1.0 / scale))) if scale < 1.0 else 0
+        return max(0, min(index, self.level_count - 1))
+
+    def tile_grid(self, level: int) -> Tuple[int, int]:
+        """Seviyedeki karo sütun ve satır sayısı"""
+        factor = 2 ** level
+        w = math.ceil(self.width / factor)
+        h = math.ceil(self.height / factor)
+        return math.ceil(w / self.tile_size), math.ceil(h / self.tile_size)
+
+    def tile(self, level: int, column: int, row: int) -> np.ndarray:
+        """Seviyedeki tek karo (kopyasız görünüm)"""
+        image = self.level(level)
+        x = column * self.tile_size
+        y = row * self.tile_size
+        return image[y:y + self.tile_size, x:x + self.tile_size]
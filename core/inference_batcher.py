@@ -0,0 +1,194 @@
+import cv2
+import numpy as np
+import logging
+import queue
+import threading
+import time
+import traceback
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Callable, List, Optional
+
+from core.cancellation import check_cancelled, report_progress
+
+
+class InferenceBatcher:
+    """Derin model çağrılarını tek ileri geçişte toplayan kuyruk
+
+    Farklı thread'lerden (ya da aynı çağrıdan toplu halde) gelen görüntüler
+    bir kuyruğa alınır; tek bir worker thread aynı boyuttaki girdileri
+    max_batch'e kadar toplar, run_batch ile tek blob/tensör halinde işler
+    ve sonuçları isteklere dağıtır. İlk istekten sonra en çok max_wait_ms
+    kadar yeni girdi beklenir: 0 gecikmeyi, büyük değer verimi öne alır.
+
+    bucket > 1 ise boyutlar bu katın üstüne yuvarlanır; aynı kovadaki
+    girdiler yansıtmalı dolguyla kova boyutuna getirilir ve çıktılar
+    özgün boyuta kırpılır. max_pixels verilirse bir gruptaki toplam piksel
+    sayısı bununla sınırlanır: büyük karolar küçük gruplarla, küçük
+    görüntüler max_batch'e kadar toplanır (ara katman belleği gruba orantılı).
+
+    run_batch (N, H, W[, C]) diziyi alır, ilk ekseni N olan çıktı döndürür.
+    workers > 1 ise gruplar o kadar thread'de eşzamanlı işlenir; run_batch
+    bu durumda thread güvenli olmalıdır (örneğin her çağrıda havuzdan ayrı
+    bir model alarak). Tek worker'da modeller yalnızca o thread'de çağrılır.
+    """
+
+    def __init__(self, run_batch: Callable[[np.ndarray], np.ndarray],
+                 max_batch: int = 8, max_wait_ms: float = 10.0,
+                 bucket: int = 1, max_pixels: Optional[int] = None,
+                 name: str = "Çıkarım", workers: int = 1):
+        if max_batch < 1:
+            raise ValueError(f"Geçersiz grup boyutu: {max_batch}")
+        self.run_batch = run_batch
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self.bucket = max(1, bucket)
+        self.max_pixels = max_pixels
+        self.name = name
+        self.workers = max(1, workers)
+        self._queue = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self.batches = 0
+        self.items = 0
+
+    def _bucket_shape(self, shape):
+        h, w = shape[:2]
+        b = self.bucket
+        return (-(-h // b) * b, -(-w // b) * b) + tuple(shape[2:])
+
+    def _group_limit(self, key):
+        if not self.max_pixels:
+            return self.max_batch
+        return max(1, min(self.max_batch, self.max_pixels // (key[0] * key[1])))
+
+    def submit(self, image: np.ndarray) -> Future:
+        """Görüntüyü kuyruğa ekle; sonuç Future üzerinden gelir"""
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(f"{self.name} kuyruğu kapatıldı")
+            if not self._threads:
+                self._threads = [
+                    threading.Thread(target=self._run, name=f"{self.name} kuyruğu {index + 1}",
+                                     daemon=True)
+                    for index in range(self.workers)
+                ]
+                for thread in self._threads:
+                    thread.start()
+        self._queue.put((self._bucket_shape(image.shape), image, future))
+        return future
+
+    def map(self, images: List[np.ndarray], token=None, progress=None) -> List[np.ndarray]:
+        """Görüntülerin hepsini kuyruğa ekle ve sonuçları sırayla topla
+
+        İptal edilirse henüz işlenmemiş istekler kuyruktan düşürülür.
+        """
+        futures = [self.submit(image) for image in images]
+        results = []
+        try:
+            for index, future in enumerate(futures):
+                while True:
+                    check_cancelled(token)
+                    try:
+                        results.append(future.result(timeout=0.05))
+                        break
+                    except FutureTimeoutError:
+                        continue
+                report_progress(progress, (index + 1) / len(futures))
+        finally:
+            for future in futures:
+                future.cancel()
+        return results
+
+    def close(self, wait: bool = True):
+        """Yeni istekleri reddet; kuyruktakiler bitince thread'i durdur"""
+        with self._lock:
+            self._closed = True
+            threads = list(self._threads)
+        # Her worker bir kapatma işareti alır
+        for _ in threads:
+            self._queue.put(None)
+        if wait:
+            for thread in threads:
+                thread.join()
+
+    def _take(self, timeout: Optional[float]):
+        """Kuyruktan bir istek al; None: kapatma işareti, False: zaman aşımı"""
+        try:
+            if timeout is not None and timeout <= 0:
+                return self._queue.get_nowait()
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return False
+
+    def _collect(self, pending, stopping=False):
+        """İlk bekleyen isteğin kovasından grup sınırı kadar istek topla
+
+        pending: bu worker'ın kuyruktan aldığı ama kovası henüz dolmamış
+        istekler; yerinde güncellenir. Kapatma işaretini almış worker
+        kuyruktan okumaz: kalan işaretler diğer worker'larındır.
+        """
+        if not pending:
+            item = self._take(None)
+            if item is None:
+                return [], True
+            pending.append(item)
+
+        key = pending[0][0]
+        limit = self._group_limit(key)
+        deadline = time.perf_counter() + self.max_wait_ms / 1000.0
+        while not stopping and sum(1 for item in pending if item[0] == key) < limit:
+            item = self._take(deadline - time.perf_counter())
+            if item is False:
+                break
+            if item is None:
+                stopping = True
+                break
+            pending.append(item)
+
+        group, rest = [], []
+        for item in pending:
+            if item[0] == key and len(group) < limit:
+                group.append(item)
+            else:
+                rest.append(item)
+        pending[:] = rest
+        return group, stopping
+
+    def _run(self):
+        pending = []
+        stopping = False
+        while not stopping or pending:
+            group, stopping = self._collect(pending, stopping)
+            # Çağıranın iptal ettiği istekler işlenmez
+            group = [item for item in group if item[2].set_running_or_notify_cancel()]
+            if group:
+                self._process(group)
+
+    def _process(self, group):
+        key = group[0][0]
+        height, width = key[:2]
+        try:
+            batch = np.empty((len(group),) + key, group[0][1].dtype)
+            for slot, (_, image, _) in zip(batch, group):
+                h, w = image.shape[:2]
+                if (h, w) == (height, width):
+                    slot[...] = image
+                else:
+                    padded = cv2.copyMakeBorder(image, 0, height - h, 0, width - w,
+                                                cv2.BORDER_REFLECT_101)
+                    slot[...] = padded.reshape(slot.shape)
+            outputs = self.run_batch(batch)
+            with self._lock:
+                self.batches += 1
+                self.items += len(group)
+            for output, (_, image, future) in zip(outputs, group):
+                h, w = image.shape[:2]
+                future.set_result(output[:h, :w])
+        except Exception as e:
+            logging.error(f"{self.name} grubu hatası: {str(e)}")
+            logging.debug(traceback.format_exc())
+            for _, _, future in group:
+                future.set_exception(e)
@@ -0,0 +1,260 @@
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import traceback
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from core.resumable_download import ResumableDownload
+
+
+class ModelIntegrityError(Exception):
+    """Kayıtlı model dosyası eksik, yarım ya da içeriği değişmiş"""
+
+
+@dataclass(frozen=True)
+class ModelSpec:
+    """Depodaki bir modelin adı, dosya uzantısı ve indirme kaynakları
+
+    sha256 biliniyorsa indirilen dosya onunla doğrulanır; bilinmiyorsa ilk
+    tam indirmenin özeti manifeste yazılır ve sonraki yüklemeler ona göre
+    denetlenir.
+    """
+    name: str
+    suffix: str
+    urls: Tuple[str, ...]
+    sha256: Optional[str] = None
+    title: str = ""
+
+
+class ModelStore:
+    """İçerik adresli model deposu
+
+    Dosyalar models/objects/<sha256><uzantı> olarak, mantıksal adlar
+    models/manifest.json içinde tutulur. Kurulum geçici dosyaya yazılıp
+    os.replace ile tamamlanır; yarım indirme hiçbir zaman geçerli sayılmaz.
+    Aynı içerik iki kez indirilmez, bozulan dosya ilk çıkarımda değil
+    yüklemede yakalanır.
+    """
+
+    MANIFEST = "manifest.json"
+    OBJECTS = "objects"
+    CHUNK_SIZE = 1024 * 1024
+
+    HED_MODEL = ModelSpec(
+        "hed_model", ".caffemodel",
+        (
+            "https://raw.githubusercontent.com/opencv/opencv_extra/master/testdata/dnn/hed_pretrained_bsds.caffemodel",
+            "https://raw.githubusercontent.com/ashukid/hed-edge-detector/refs/heads/master/hed_pretrained_bsds.caffemodel",
+        ),
+        title="HED Model"
+    )
+    HED_PROTO = ModelSpec(
+        "hed_proto", ".prototxt",
+        (
+            "https://raw.githubusercontent.com/opencv/opencv_3rdparty/master/hed/deploy.prototxt",
+            "https://raw.githubusercontent.com/ashukid/hed-edge-detector/refs/heads/master/deploy.prototxt",
+        ),
+        title="Proto Dosyası"
+    )
+    # HED tabanlı stencil tiplerinin ihtiyaç duyduğu modeller
+    HED = (HED_MODEL, HED_PROTO)
+
+    _default: Optional["ModelStore"] = None
+
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()
+
+    @classmethod
+    def default_root(cls) -> str:
+        """Çalıştırılabilir dosyanın (exe ya da betik) yanındaki models klasörü"""
+        if getattr(sys, 'frozen', False):
+            base_dir = os.path.dirname(sys.executable)
+        else:
+            base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        return os.path.join(base_dir, "models")
+
+    @classmethod
+    def default(cls) -> "ModelStore":
+        if cls._default is None:
+            cls._default = cls(cls.default_root())
+        return cls._default
+
+    # ----------------------------------------------------------------- manifest
+
+    def _manifest_path(self) -> str:
+        return os.path.join(self.root, self.MANIFEST)
+
+    def _read_manifest(self) -> Dict[str, dict]:
+        try:
+            with open(self._manifest_path(), encoding="utf-8") as file:
+                return json.load(file).get("models", {})
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logging.error(f"Model manifesti okunamadı: {str(e)}")
+            return {}
+
+    def _write_manifest(self, models: Dict[str, dict]) -> None:
+        temp_path = self._manifest_path() + ".part"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump({"models": models}, file, indent=2, sort_keys=True)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self._manifest_path())
+
+    def entry(self, name: str) -> Optional[dict]:
+        return self._read_manifest().get(name)
+
+    # ----------------------------------------------------------------- sorgular
+
+    def path(self, name: str) -> Optional[str]:
+        """Kurulu modelin yolu; kayıt yoksa ya da boyut tutmuyorsa None
+
+        Hızlı denetimdir (yalnızca boyut); içerik map/verify ile doğrulanır.
+        """
+        entry = self.entry(name)
+        if entry is None:
+            return None
+        path = os.path.join(self.root, entry["file"])
+        try:
+            if os.path.getsize(path) != entry["size"]:
+                logging.warning(f"Model dosyası boyutu tutmuyor: {name}")
+                return None
+        except OSError:
+            return None
+        return path
+
+    def is_installed(self, name: str) -> bool:
+        return self.path(name) is not None
+
+    def missing(self, specs=HED):
+        """Kurulu olmayan modellerin tanımları"""
+        return [spec for spec in specs if not self.is_installed(spec.name)]
+
+    @staticmethod
+    def _digest(data) -> str:
+        digest = hashlib.sha256()
+        view = memoryview(data)
+        step = ModelStore.CHUNK_SIZE * 8
+        for start in range(0, len(view), step):
+            digest.update(view[start:start + step])
+        return digest.hexdigest()
+
+    def map(self, name: str, verify: bool = True) -> np.ndarray:
+        """Modeli salt okunur bellek eşlemesiyle aç
+
+        Dönen uint8 dizi cv2.dnn'in bellekten okuma yollarına doğrudan
+        verilebilir; dosya Python tarafında kopyalanmaz. verify ile içerik
+        manifestteki SHA-256 ile karşılaştırılır.
+        """
+        path = self.path(name)
+        if path is None:
+            raise ModelIntegrityError(f"Model kurulu değil ya da eksik: {name}")
+        data = np.memmap(path, dtype=np.uint8, mode='r')
+        if verify and self._digest(data) != self.entry(name)["sha256"]:
+            del data
+            self._discard(name)
+            raise ModelIntegrityError(f"Model dosyası bozuk (SHA-256 tutmuyor): {name}")
+        return data
+
+    def _discard(self, name: str) -> None:
+        """Bozuk dosyayı ve ona işaret eden kayıtları sil: sonraki ensure yeniden indirir"""
+        with self._lock:
+            models = self._read_manifest()
+            file = models[name]["file"]
+            models = {key: entry for key, entry in models.items() if entry["file"] != file}
+            self._write_manifest(models)
+            try:
+                os.remove(os.path.join(self.root, file))
+            except OSError as e:
+                logging.warning(f"Bozuk model dosyası silinemedi: {str(e)}")
+
+    def verify(self, name: str) -> bool:
+        try:
+            self.map(name)
+            return True
+        except ModelIntegrityError as e:
+            logging.error(str(e))
+            return False
+
+    # ------------------------------------------------------------------- kurulum
+
+    def staging_path(self, spec: ModelSpec) -> str:
+        """İndirmenin yazılacağı geçici dosya (depo ile aynı dosya sisteminde)"""
+        return os.path.join(self.root, self.OBJECTS, f"{spec.name}{spec.suffix}.download")
+
+    def install(self, spec: ModelSpec, source_path: str, source: str = "") -> str:
+        """Tamamlanmış dosyayı depoya taşı ve manifeste kaydet
+
+        Dosya özeti hesaplanır, beklenen özetle karşılaştırılır ve
+        objects/<sha256> adıyla yerine konur (aynı dosya sisteminde taşıma,
+        kopya yok). Kurulu yol döner.
+        """
+        if os.path.getsize(source_path) == 0:
+            os.remove(source_path)
+            raise ModelIntegrityError(f"İndirilen {spec.name} boş")
+        digest = hashlib.sha256()
+        with open(source_path, "rb") as file:
+            for block in iter(lambda: file.read(self.CHUNK_SIZE), b""):
+                digest.update(block)
+        digest = digest.hexdigest()
+        if spec.sha256 and digest != spec.sha256.lower():
+            os.remove(source_path)
+            raise ModelIntegrityError(
+                f"İndirilen {spec.name} beklenen SHA-256 ile uyuşmuyor: {digest}"
+            )
+
+        relative = os.path.join(self.OBJECTS, digest + spec.suffix)
+        target = os.path.join(self.root, relative)
+        with self._lock:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            if os.path.exists(target):
+                # Aynı içerik zaten depoda
+                os.remove(source_path)
+            else:
+                os.replace(source_path, target)
+            models = self._read_manifest()
+            models[spec.name] = {
+                "file": relative.replace(os.sep, "/"),
+                "sha256": digest,
+                "size": os.path.getsize(target),
+                "source": source,
+                "installed": datetime.now().isoformat(timespec="seconds")
+            }
+            self._write_manifest(models)
+        logging.info(f"Model kuruldu: {spec.name} -> {relative}")
+        return target
+
+    def download(self, spec: ModelSpec, url: str, token=None, progress=None) -> str:
+        """Kaynaktan geçici dosyaya indir
+
+        Yarım kalan indirme staging + '.part' olarak durur ve bir sonraki
+        çağrıda kaldığı yerden sürer; eksik gelen dosya reddedilir.
+        """
+        staging = self.staging_path(spec)
+        os.makedirs(os.path.dirname(staging), exist_ok=True)
+        return ResumableDownload(url, staging, token=token, progress=progress).run()
+
+    def ensure(self, spec: ModelSpec) -> str:
+        """Model kuruluysa yolunu döndür, değilse kaynaklardan sırayla indirip kur"""
+        path = self.path(spec.name)
+        if path is not None:
+            return path
+        errors = []
+        for url in spec.urls:
+            try:
+                logging.info(f"{spec.title or spec.name} indiriliyor: {url}")
+                return self.install(spec, self.download(spec, url), url)
+            except Exception as e:
+                logging.warning(f"İndirme başarısız ({url}): {str(e)}")
+                logging.debug(traceback.format_exc())
+                errors.append(str(e))
+        raise ModelIntegrityError(f"{spec.name} indirilemedi: {'; '.join(errors)}")
@@ -0,0 +1,69 @@
+import cv2
+import numpy as np
+import logging
+import os
+import traceback
+from core.dnn_pool import DnnConfig, DnnNetPool
+from core.sketch_inference import SketchInference
+
+
+class OnnxSketchProcessor(SketchInference):
+    """APDrawing modelinin torch gerektirmeyen çalışma yolu
+
+    DeepSketchProcessor.export_onnx ile aktarılan model OpenCV DNN ile
+    çalıştırılır; yalnızca cv2 ve numpy gerekir. Karolama, harmanlama ve
+    toplu işlem torch yoluyla aynıdır, çıktılar float hassasiyetinde örtüşür.
+    Arka uç/hedef DnnConfig'ten gelir; kuyruk worker'ları havuzdan ayrı
+    ağlar ödünç alır.
+    """
+
+    WARMUP_RUNS = 1
+    # (x - 127.5) / 127.5: torch yolundaki [-1, 1] normalizasyonu
+    SCALE = 1 / 127.5
+    MEAN = (127.5, 127.5, 127.5)
+
+    def __init__(self, tiled=True, batch_size=4, max_side=2048, max_wait_ms=10.0, config=None):
+        self.config = config or DnnConfig.from_env()
+        super().__init__(tiled, batch_size, max_side, max_wait_ms, self.config.pool_size)
+
+    def load_model(self, model_path):
+        """ONNX modelini yükle ve ısındır"""
+        try:
+            if not os.path.exists(model_path):
+                raise FileNotFoundError(f"Model dosyası bulunamadı: {model_path}")
+
+            self.model = DnnNetPool(
+                lambda: cv2.dnn.readNetFromONNX(model_path), self.config, self._warm_up_net
+            )
+            logging.info("ONNX modeli başarıyla yüklendi")
+            return True
+        except Exception as e:
+            logging.error(f"ONNX model yükleme hatası: {str(e)}")
+            logging.debug(traceback.format_exc())
+            self.model = None
+            return False
+
+    def _blob(self, batch):
+        height, width = batch.shape[1:3]
+        return cv2.dnn.blobFromImages(
+            list(batch),
+            scalefactor=self.SCALE,
+            size=(width, height),
+            mean=self.MEAN,
+            swapRB=False,
+            crop=False
+        )
+
+    def _warm_up_net(self, net):
+        """Küçük bir girdiyle ileri geçiş: katman bellekleri ilk çağrıdan önce ayrılır"""
+        size = self.MODEL_STRIDE * 8
+        for _ in range(self.WARMUP_RUNS):
+            net.setInput(self._blob(np.zeros((1, size, size, 3), np.uint8)))
+            net.forward()
+
+    def _forward_batch(self, batch):
+        """Kuyruk thread'inde çalışır: (N, H, W, 3) uint8 -> (N, H, W) çıktı [-1, 1]"""
+        blob = self._blob(batch)
+        with self.model.acquire() as net:
+            net.setInput(blob)
+            return net.forward()[:, 0]
@@ -0,0 +1,246 @@
+import cv2
+import numpy as np
+import struct
+from typing import List, Optional, Tuple, Union
+
+from core.cancellation import check_cancelled, report_progress
+from core.stage_cache import Roi
+
+
+class PackedMask:
+    """Siyah-beyaz stencil için bit başına bir piksel tutan maske
+
+    np.packbits düzenindedir (satır başına ceil(w/8) bayt, MSB önce);
+    1 beyaz (255), 0 siyah (0) demektir. 8 bitlik diziye göre 8 kat
+    az yer kaplar ve PNG/TIFF'in 1 bitlik satır düzeniyle aynıdır.
+    """
+
+    def __init__(self, bits: np.ndarray, width: int):
+        self.bits = bits
+        self.width = width
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return (self.bits.shape[0], self.width)
+
+    @property
+    def nbytes(self) -> int:
+        return self.bits.nbytes
+
+    @staticmethod
+    def is_binary(image: np.ndarray) -> bool:
+        """Görüntü yalnızca 0 ve 255 değerlerinden mi oluşuyor"""
+        if image is None or image.dtype != np.uint8 or image.ndim != 2:
+            return False
+        return cv2.countNonZero(cv2.inRange(image, 1, 254)) == 0
+
+    @classmethod
+    def from_array(cls, image: np.ndarray) -> 'PackedMask':
+        """8 bitlik görüntüyü 128 eşiğiyle paketle"""
+        return cls(np.packbits(image > 127, axis=1), image.shape[1])
+
+    @classmethod
+    def pack_if_binary(cls, image: np.ndarray) -> Union['PackedMask', np.ndarray]:
+        """İkili görüntüyü paketle, gri tonlu görüntüyü olduğu gibi bırak"""
+        if cls.is_binary(image):
+            return cls.from_array(image)
+        return image
+
+    @staticmethod
+    def to_array(image: Union['PackedMask', np.ndarray]) -> np.ndarray:
+        """Paketli ya da düz görüntüden 8 bitlik dizi"""
+        if isinstance(image, PackedMask):
+            return image.unpack()
+        return image
+
+    def unpack(self, roi: Optional[Roi] = None) -> np.ndarray:
+        """0/255 değerli 8 bitlik diziye aç; roi verilirse yalnızca o bölgeyi"""
+        if roi is None:
+            roi = (0, 0, self.width, self.bits.shape[0])
+        x, y, w, h = roi
+        # Yalnızca bölgeyi kapsayan baytlar açılır
+        first, last = x // 8, (x + w + 7) // 8
+        bits = np.unpackbits(self.bits[y:y + h, first:last], axis=1)
+        offset = x - first * 8
+        return bits[:, offset:offset + w] * np.uint8(255)
+
+    def encode_g4_tiff(self, token=None, progress=None) -> bytes:
+        """CCITT Grup 4 (T.6) sıkıştırmalı tek şeritli TIFF"""
+        height = self.bits.shape[0]
+        data = CCITTG4Encoder.encode(self, token, progress)
+        # Başlık + veri + IFD; Photometric 0 (WhiteIsZero): 1 siyah
+        ifd_offset = 8 + len(data) + (len(data) & 1)
+        entries = [
+            (256, 4, self.width),
+            (257, 4, height),
+            (258, 3, 1),
+            (259, 3, 4),
+            (262, 3, 0),
+            (273, 4, 8),
+            (277, 3, 1),
+            (278, 4, height),
+            (279, 4, len(data)),
+            (293, 4, 0)
+        ]
+        ifd = struct.pack('<H', len(entries))
+        for tag, type_id, value in entries:
+            if type_id == 3:
+                ifd += struct.pack('<HHIHH', tag, type_id, 1, value, 0)
+            else:
+                ifd += struct.pack('<HHII', tag, type_id, 1, value)
+        ifd += struct.pack('<I', 0)
+        return (b'II' + struct.pack('<HI', 42, ifd_offset) + data +
+                b'\0' * (len(data) & 1) + ifd)
+
+
+class CCITTG4Encoder:
+    """ITU-T T.6 (CCITT Grup 4) kodlayıcı
+
+    Her satır bir önceki satıra göre geçiş (pass), dikey ve yatay kiplerle
+    kodlanır; akış libtiff'in Fax3Encode2DRow'u ile aynıdır. Satırlardaki
+    renk değişim noktaları NumPy ile bulunur, kodlama yalnızca bu noktalar
+    üzerinde döner.
+    """
+
+    WHITE_TERMINATING = [
+        '00110101', '000111', '0111', '1000', '1011', '1100', '1110', '1111',
+        '10011', '10100', '00111', '01000', '001000', '000011', '110100', '110101',
+        '101010', '101011', '0100111', '0001100', '0001000', '0010111', '0000011', '0000100',
+        '0101000', '0101011', '0010011', '0100100', '0011000', '00000010', '00000011', '00011010',
+        '00011011', '00010010', '00010011', '00010100', '00010101', '00010110', '00010111', '00101000',
+        '00101001', '00101010', '00101011', '00101100', '00101101', '00000100', '00000101', '00001010',
+        '00001011', '01010010', '01010011', '01010100', '01010101', '00100100', '00100101', '01011000',
+        '01011001', '01011010', '01011011', '01001010', '01001011', '00110010', '00110011', '00110100'
+    ]
+    BLACK_TERMINATING = [
+        '0000110111', '010', '11', '10', '011', '0011', '0010', '00011',
+        '000101', '000100', '0000100', '0000101', '0000111', '00000100', '00000111', '000011000',
+        '0000010111', '0000011000', '0000001000', '00001100111', '00001101000', '00001101100',
+        '00000110111', '00000101000', '00000010111', '00000011000', '000011001010', '000011001011',
+        '000011001100', '000011001101', '000001101000', '000001101001', '000001101010', '000001101011',
+        '000011010010', '000011010011', '000011010100', '000011010101', '000011010110', '000011010111',
+        '000001101100', '000001101101', '000011011010', '000011011011', '000001010100', '000001010101',
+        '000001010110', '000001010111', '000001100100', '000001100101', '000001010010', '000001010011',
+        '000000100100', '000000110111', '000000111000', '000000100111', '000000101000', '000001011000',
+        '000001011001', '000000101011', '000000101100', '000001011010', '000001100110', '000001100111'
+    ]
+    # 64'ün katları: 64, 128, ... 1728
+    WHITE_MAKEUP = [
+        '11011', '10010', '010111', '0110111', '00110110', '00110111', '01100100', '01100101',
+        '01101000', '01100111', '011001100', '011001101', '011010010', '011010011', '011010100',
+        '011010101', '011010110', '011010111', '011011000', '011011001', '011011010', '011011011',
+        '010011000', '010011001', '010011010', '011000', '010011011'
+    ]
+    BLACK_MAKEUP = [
+        '0000001111', '000011001000', '000011001001', '000001011011', '000000110011', '000000110100',
+        '000000110101', '0000001101100', '0000001101101', '0000001001010', '0000001001011',
+        '0000001001100', '0000001001101', '0000001110010', '0000001110011', '0000001110100',
+        '0000001110101', '0000001110110', '0000001110111', '0000001010010', '0000001010011',
+        '0000001010100', '0000001010101', '0000001011010', '0000001011011', '0000001100100',
+        '0000001100101'
+    ]
+    # İki renk için ortak: 1792, 1856, ... 2560
+    EXTENDED_MAKEUP = [
+        '00000001000', '00000001100', '00000001101', '000000010010', '000000010011',
+        '000000010100', '000000010101', '000000010110', '000000010111', '000000011100',
+        '000000011101', '000000011110', '000000011111'
+    ]
+
+    PASS = '0001'
+    HORIZONTAL = '001'
+    # b1 - a1 farkı (-3..3) -> dikey kip kodu
+    VERTICAL = {-3: '0000011', -2: '000011', -1: '011', 0: '1', 1: '010', 2: '000010', 3: '0000010'}
+    EOFB = '000000000001' * 2
+    # İptal ve ilerleme bu kadar satırda bir denetlenir
+    PROGRESS_ROWS = 256
+
+    _spans = None
+
+    @classmethod
+    def _makeup(cls, run: int, black: bool) -> str:
+        if run >= 1792:
+            return cls.EXTENDED_MAKEUP[(run - 1792) // 64]
+        table = cls.BLACK_MAKEUP if black else cls.WHITE_MAKEUP
+        return table[run // 64 - 1]
+
+    @classmethod
+    def _span(cls, run: int, black: bool) -> str:
+        codes = []
+        while run >= 2624:
+            codes.append(cls.EXTENDED_MAKEUP[-1])
+            run -= 2560
+        if run >= 64:
+            codes.append(cls._makeup(run, black))
+            run -= (run // 64) * 64
+        codes.append((cls.BLACK_TERMINATING if black else cls.WHITE_TERMINATING)[run])
+        return ''.join(codes)
+
+    @staticmethod
+    def _changes(black: np.ndarray) -> List[np.ndarray]:
+        """Her satırdaki renk değişim noktaları (satır beyazla başlar)"""
+        padded = np.zeros((black.shape[0], black.shape[1] + 1), np.int8)
+        padded[:, 1:] = black
+        rows, columns = np.nonzero(np.diff(padded, axis=1))
+        splits = np.searchsorted(rows, np.arange(1, black.shape[0]))
+        return np.split(columns, splits)
+
+    @classmethod
+    def _span_tables(cls) -> Tuple[List[str], List[str]]:
+        """2624'ten kısa tüm koşular için hazır kodlar (beyaz, siyah)"""
+        if cls._spans is None:
+            cls._spans = (
+                [cls._span(run, False) for run in range(2624)],
+                [cls._span(run, True) for run in range(2624)]
+            )
+        return cls._spans
+
+    @classmethod
+    def encode(cls, mask: PackedMask, token=None, progress=None) -> bytes:
+        width, height = mask.width, mask.bits.shape[0]
+        white_spans, black_spans = cls._span_tables()
+        vertical = cls.VERTICAL
+        out = []
+        append = out.append
+        # Değişim listeleri; sondaki width'ler "bulunamadı" bekçisidir
+        sentinel = [width, width, width]
+        reference = sentinel
+        for row, changes in enumerate(cls._changes(mask.unpack() == 0)):
+            if row % cls.PROGRESS_ROWS == 0:
+                check_cancelled(token)
+                report_progress(progress, row / height)
+            coding = changes.tolist() + sentinel
+            # a0 başta satırın solundaki hayali beyaz pikseldir (-1).
+            # k. değişimde piksel k çiftse siyaha, tekse beyaza döner.
+            a0, black, ka, kr = -1, 0, 0, 0
+            while True:
+                while coding[ka] <= a0:
+                    ka += 1
+                a1 = coding[ka]
+                while reference[kr] <= a0:
+                    kr += 1
+                # b1: a0'ın sağında, rengi a0'ınkinin tersi olan ilk değişim
+                kb = kr if (kr & 1) == black else kr + 1
+                b1, b2 = reference[kb], reference[kb + 1]
+                if b2 < a1:
+                    append(cls.PASS)
+                    a0 = b2
+                elif -3 <= b1 - a1 <= 3:
+                    append(vertical[b1 - a1])
+                    a0 = a1
+                    black ^= 1
+                else:
+                    a2 = coding[ka + 1]
+                    append(cls.HORIZONTAL)
+                    first, second = (black_spans, white_spans) if black else (white_spans, black_spans)
+                    run1, run2 = a1 - max(a0, 0), a2 - a1
+                    append(first[run1] if run1 < 2624 else cls._span(run1, bool(black)))
+                    append(second[run2] if run2 < 2624 else cls._span(run2, not black))
+                    a0 = a2
+                if a0 >= width:
+                    break
+            reference = coding
+
+        append(cls.EOFB)
+        bits = ''.join(out)
+        bits += '0' * (-len(bits) % 8)
+        return np.packbits(np.frombuffer(bits.encode('ascii'), np.uint8) - 48).tobytes()
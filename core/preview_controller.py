@@ -0,0 +1,67 @@
+import logging
+import math
+from typing import Dict, Tuple
+
+
+class PreviewScaleController:
+    """Gecikme bütçesine göre önizleme ölçeğini seçen geri besleme denetleyicisi
+
+    Her stencil tipi için megapiksel başına işlem süresi (ms/MP) üstel
+    hareketli ortalama ile izlenir. Makine yükü ve görüntü boyutu bu
+    ölçüme yansıdığı için seçilen ölçek kendiliğinden uyum sağlar.
+    """
+
+    # Ölçek basamakları: küçük ölçümsel dalgalanmalar çözünürlüğü oynatmasın
+    SCALES = (1.0, 0.75, 0.5, 0.375, 0.25, 0.1875, 0.125, 0.0625)
+
+    # Henüz ölçüm yokken kullanılan başlangıç tahminleri (ms/MP)
+    DEFAULT_MS_PER_MP = {
+        "Temel": 10.0,
+        "Adaptif": 12.0,
+        "Karakalem": 15.0,
+        "Derin Stencil": 1000.0,
+        "Sanatsal Stencil": 1000.0
+    }
+
+    def __init__(self, target_ms: float = 50.0, smoothing: float = 0.3):
+        self.target_ms = target_ms
+        self.smoothing = smoothing
+        self.ms_per_mp: Dict[str, float] = {}
+        self.current_scale: Dict[str, float] = {}
+
+    def record(self, stencil_type: str, pixels: int, elapsed_ms: float) -> None:
+        """Tamamlanan bir işlemin süresini kaydet"""
+        if pixels <= 0 or elapsed_ms <= 0:
+            return
+        sample = elapsed_ms / (pixels / 1e6)
+        previous = self.ms_per_mp.get(stencil_type)
+        if previous is None:
+            self.ms_per_mp[stencil_type] = sample
+        else:
+            self.ms_per_mp[stencil_type] = previous + self.smoothing * (sample - previous)
+        logging.debug(f"Önizleme süresi kaydedildi - {stencil_type}: {elapsed_ms:.1f} ms "
+                      f"({self.ms_per_mp[stencil_type]:.1f} ms/MP)")
+
+    def estimate_ms(self, stencil_type: str, image_shape: Tuple[int, ...], scale: float) -> float:
+        """Verilen ölçekte tahmini işlem süresi"""
+        megapixels = image_shape[0] * image_shape[1] / 1e6
+        ms_per_mp = self.ms_per_mp.get(
+            stencil_type, self.DEFAULT_MS_PER_MP.get(stencil_type, 100.0)
+        )
+        return ms_per_mp * megapixels * scale * scale
+
+    def choose_scale(self, stencil_type: str, image_shape: Tuple[int, ...]) -> float:
+        """Hedef gecikmeye sığan en büyük önizleme ölçeğini seç"""
+        full_ms = self.estimate_ms(stencil_type, image_shape, 1.0)
+        ideal = 1.0 if full_ms <= 0 else math.sqrt(self.target_ms / full_ms)
+
+        scale = self.SCALES[-1]
+        for candidate in self.SCALES:
+            if candidate <= ideal:
+                scale = candidate
+                break
+
+        if self.current_scale.get(stencil_type) != scale:
+            logging.info(f"Önizleme ölçeği ({stencil_type}): %{scale * 100:.0f}")
+        self.current_scale[stencil_type] = scale
+        return scale
@@ -0,0 +1,76 @@
+import cv2
+import numpy as np
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from core.stencil_processors import StencilProcessor
+
+
+@dataclass(frozen=True)
+class PrintSize:
+    """Hedef baskı boyutu ve çözünürlüğü
+
+    Genişlik ya da yükseklikten biri 0 ise diğeri görüntünün en-boy
+    oranından hesaplanır; ikisi de verilirse görüntü bu kutuya sığdırılır.
+    Baskı kipinde çekirdek ayarları (çizgi kalınlığı, bulanıklık, blok
+    boyutu) milimetre cinsindendir ve işlemden önce piksele çevrilir.
+    """
+    width_mm: float
+    height_mm: float = 0.0
+    dpi: int = 300
+
+    MM_PER_INCH = 25.4
+    # Termal stencil yazıcılarında yaygın çözünürlükler
+    COMMON_DPI = (203, 300, 600)
+
+    @property
+    def pixels_per_mm(self) -> float:
+        return self.dpi / self.MM_PER_INCH
+
+    def to_pixels(self, mm: float) -> float:
+        return mm * self.pixels_per_mm
+
+    def source_pixels_per_mm(self, shape: Tuple[int, ...]) -> float:
+        """Görüntü yeniden örneklenmeden baskı boyutuna basılırsa mm başına piksel"""
+        w = shape[1]
+        target_w = self.target_size(shape)[0]
+        return self.pixels_per_mm * w / target_w
+
+    def target_size(self, shape: Tuple[int, ...]) -> Tuple[int, int]:
+        """Görüntünün baskı çözünürlüğündeki (genişlik, yükseklik) boyutu"""
+        h, w = shape[:2]
+        scales = []
+        if self.width_mm > 0:
+            scales.append(self.to_pixels(self.width_mm) / w)
+        if self.height_mm > 0:
+            scales.append(self.to_pixels(self.height_mm) / h)
+        if not scales:
+            return (w, h)
+        scale = min(scales)
+        return (max(1, int(round(w * scale))), max(1, int(round(h * scale))))
+
+    def resample(self, image: np.ndarray) -> np.ndarray:
+        """Görüntüyü tek adımda baskı çözünürlüğüne getir"""
+        h, w = image.shape[:2]
+        size = self.target_size(image.shape)
+        if size == (w, h):
+            return image
+        # Küçültmede alan ortalaması örtüşmeyi önler, büyütmede Lanczos keskin kalır
+        interpolation = cv2.INTER_AREA if size[0] < w else cv2.INTER_LANCZOS4
+        resampled = cv2.resize(image, size, interpolation=interpolation)
+        logging.info(f"Baskı çözünürlüğüne örneklendi: {w}x{h} -> {size[0]}x{size[1]} "
+                     f"({self.dpi} DPI)")
+        return resampled
+
+    def pixel_settings(self, settings: Dict[str, Any],
+                       source_shape: Optional[Tuple[int, ...]] = None) -> Dict[str, Any]:
+        """Milimetre cinsindeki çekirdek ayarlarını piksele çevir
+
+        Varsayılan olarak baskı çözünürlüğüne örneklenmiş görüntü içindir.
+        source_shape verilirse görüntü kendi çözünürlüğünde işlenecektir
+        (karolu dönüştürme); milimetreler o çözünürlükte çevrilir.
+        """
+        pixels_per_mm = (self.pixels_per_mm if source_shape is None
+                         else self.source_pixels_per_mm(source_shape))
+        return StencilProcessor.scaled_settings(settings, pixels_per_mm)
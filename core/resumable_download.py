@@ -0,0 +1,277 @@
+import http.client
+import json
+import logging
+import os
+import re
+import socket
+import threading
+import time
+import traceback
+import urllib.error
+import urllib.request
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from typing import Callable, List, Optional
+
+from core.cancellation import check_cancelled, report_progress
+
+
+class DownloadError(Exception):
+    """İndirme yeniden denemelere rağmen tamamlanamadı"""
+
+
+class _Stopped(Exception):
+    """Başka bir parça başarısız oldu; bu parça da durur"""
+
+
+class _ShortRead(Exception):
+    """Bağlantı aralık bitmeden kapandı; kalan kısım yeniden istenir"""
+
+
+class ResumableDownload:
+    """Kaldığı yerden devam eden, isteğe göre paralel aralıklarla indirme
+
+    Veri path + '.part' dosyasına yazılır; her aralığın ilerlemesi
+    path + '.part.json' içinde tutulur. Kesilen ya da iptal edilen indirme
+    bir sonraki çalıştırmada HTTP Range ile kaldığı yerden sürer; sunucu
+    dosyayı değiştirmişse (boyut, ETag, Last-Modified) baştan başlanır.
+    Sunucu aralık destekliyorsa ve dosya yeterince büyükse en çok
+    connections bağlantıyla paralel indirilir. Okuma tamponu hızlı
+    bağlantıda büyür, yavaşta küçülür; iptal ve ilerleme her okumada
+    denetlenir. Dosya yalnızca tamamlanınca path adına taşınır.
+    """
+
+    PART_SUFFIX = ".part"
+    STATE_SUFFIX = ".part.json"
+    MIN_BUFFER = 64 * 1024
+    MAX_BUFFER = 4 * 1024 * 1024
+    # Tampon, okuma bu sürelerden kısa/uzun sürerse büyütülür/küçültülür (sn)
+    FAST_READ = 0.05
+    SLOW_READ = 0.5
+    # Paralel aralık başına en az bayt: küçük dosyalar tek bağlantıyla iner
+    MIN_RANGE = 4 * 1024 * 1024
+    RETRIES = 5
+    BACKOFF = 0.5
+    TIMEOUT = 30
+    STATE_INTERVAL = 0.5
+    HEADERS = {'User-Agent': 'Mozilla/5.0'}
+
+    # Geçici hatalar: yeniden denenir (4xx dışındaki HTTP hataları dahil)
+    TRANSIENT = (urllib.error.URLError, http.client.HTTPException, socket.timeout,
+                 ConnectionError, _ShortRead)
+
+    def __init__(self, url: str, path: str, connections: int = 4, token=None,
+                 progress: Optional[Callable[[float], None]] = None):
+        self.url = url
+        self.path = path
+        self.part_path = path + self.PART_SUFFIX
+        self.state_path = path + self.STATE_SUFFIX
+        self.connections = max(1, connections)
+        self.token = token
+        self.progress = progress
+        self.size = None
+        self.validator = None
+        self.accepts_ranges = False
+        # [başlangıç, bitiş (hariç; boyut bilinmiyorsa None), inen bayt]
+        self.ranges: List[list] = []
+        self.retries = 0
+        self.resumed_bytes = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._state_saved = 0.0
+
+    # ---------------------------------------------------------------- durum
+
+    def _retry(self, error, attempt, position):
+        """Geçici hatada geri çekilerek bekle; kalıcı hatayı ya da son denemeyi yükselt"""
+        if isinstance(error, urllib.error.HTTPError) and 400 <= error.code < 500 and error.code != 429:
+            raise error
+        with self._lock:
+            self.retries += 1
+        if attempt > self.RETRIES:
+            raise DownloadError(f"{self.RETRIES} denemede indirilemedi: {str(error)}")
+        delay = self.BACKOFF * 2 ** (attempt - 1)
+        logging.warning(f"İndirme kesildi ({str(error)}), {delay:.1f} sn sonra "
+                        f"{position}. bayttan devam edilecek")
+        self._wait(delay)
+
+    def _probe(self):
+        """Boyut, aralık desteği ve sürüm bilgisini tek baytlık istekle öğren"""
+        attempt = 0
+        while True:
+            try:
+                return self._probe_once()
+            except self.TRANSIENT as e:
+                attempt += 1
+                self._retry(e, attempt, 0)
+
+    def _probe_once(self):
+        request = urllib.request.Request(self.url, headers={**self.HEADERS, 'Range': 'bytes=0-0'})
+        with urllib.request.urlopen(request, timeout=self.TIMEOUT) as response:
+            headers = response.headers
+            self.validator = headers.get('ETag') or headers.get('Last-Modified')
+            match = re.match(r'bytes \d+-\d+/(\d+)', headers.get('Content-Range') or '')
+            if response.status == 206 and match:
+                self.accepts_ranges = True
+                self.size = int(match.group(1))
+            else:
+                length = headers.get('Content-Length')
+                self.size = int(length) if length else None
+
+    def _load_state(self) -> bool:
+        """Önceki yarım indirmeyi devral; sunucudaki dosya değiştiyse False"""
+        try:
+            with open(self.state_path, encoding="utf-8") as file:
+                state = json.load(file)
+        except (OSError, ValueError):
+            return False
+        if (not self.accepts_ranges or not os.path.exists(self.part_path)
+                or state.get("url") != self.url or state.get("size") != self.size
+                or state.get("validator") != self.validator):
+            return False
+        self.ranges = state["ranges"]
+        self.resumed_bytes = sum(done for _, _, done in self.ranges)
+        return True
+
+    def _save_state(self, force=False):
+        now = time.perf_counter()
+        with self._lock:
+            if not force and now - self._state_saved < self.STATE_INTERVAL:
+                return
+            self._state_saved = now
+            state = {"url": self.url, "size": self.size, "validator": self.validator,
+                     "ranges": [list(r) for r in self.ranges]}
+            temp_path = self.state_path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as file:
+                json.dump(state, file)
+            os.replace(temp_path, self.state_path)
+
+    def _plan(self):
+        """Yeni indirme: aralıkları böl, dosyayı hedef boyutta aç"""
+        count = 1
+        if self.accepts_ranges and self.size:
+            count = max(1, min(self.connections, self.size // self.MIN_RANGE))
+        if self.size is None:
+            self.ranges = [[0, None, 0]]
+        else:
+            step = -(-self.size // count)
+            self.ranges = [[start, min(self.size, start + step), 0]
+                           for start in range(0, self.size, step)] or [[0, 0, 0]]
+        with open(self.part_path, "wb") as file:
+            if self.size:
+                file.truncate(self.size)
+
+    # ---------------------------------------------------------------- aktarım
+
+    def _report(self):
+        if self.size:
+            with self._lock:
+                done = sum(r[2] for r in self.ranges)
+            report_progress(self.progress, done / self.size)
+
+    def _wait(self, seconds):
+        """İptal ve durdurmayı gözeterek bekle"""
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            check_cancelled(self.token)
+            if self._stop.wait(min(0.05, max(0.0, deadline - time.perf_counter()))):
+                raise _Stopped()
+
+    def _fetch(self, index):
+        """Bir aralığı indir; bağlantı koparsa kaldığı yerden yeniden dene"""
+        attempt = 0
+        buffer = self.MIN_BUFFER
+        with open(self.part_path, "r+b") as out_file:
+            while True:
+                start, end, done = self.ranges[index]
+                if end is not None and start + done >= end:
+                    return
+                try:
+                    headers = dict(self.HEADERS)
+                    if self.accepts_ranges:
+                        last = '' if end is None else end - 1
+                        headers['Range'] = f"bytes={start + done}-{last}"
+                    request = urllib.request.Request(self.url, headers=headers)
+                    with urllib.request.urlopen(request, timeout=self.TIMEOUT) as response:
+                        if response.status != 206 and start + done > 0:
+                            if len(self.ranges) > 1:
+                                raise DownloadError("Sunucu aralık isteğini yok saydı")
+                            # Tek akış: baştan yazılır
+                            with self._lock:
+                                self.ranges[index][2] = done = 0
+                        out_file.seek(start + done)
+                        while True:
+                            check_cancelled(self.token)
+                            if self._stop.is_set():
+                                raise _Stopped()
+                            wanted = buffer if end is None else min(buffer, end - start - done)
+                            if wanted <= 0:
+                                break
+                            began = time.perf_counter()
+                            data = response.read(wanted)
+                            elapsed = time.perf_counter() - began
+                            if not data:
+                                break
+                            out_file.write(data)
+                            done += len(data)
+                            with self._lock:
+                                self.ranges[index][2] = done
+                            attempt = 0
+                            # Hızlı bağlantıda daha az sistem çağrısı, yavaşta sık iptal denetimi
+                            if len(data) == wanted and elapsed < self.FAST_READ:
+                                buffer = min(self.MAX_BUFFER, buffer * 2)
+                            elif elapsed > self.SLOW_READ:
+                                buffer = max(self.MIN_BUFFER, buffer // 2)
+                            self._report()
+                            self._save_state()
+                    if end is None:
+                        return
+                    if start + done < end:
+                        raise _ShortRead(f"Bağlantı erken kapandı: {start + done}/{end}")
+                except self.TRANSIENT as e:
+                    attempt += 1
+                    self._retry(e, attempt, start + done)
+
+    def run(self) -> str:
+        """İndir ve tamamlanan dosyayı path'e taşı; yarım dosya bir sonraki çağrıya kalır"""
+        self._probe()
+        if self._load_state():
+            logging.info(f"İndirme kaldığı yerden sürüyor: {self.resumed_bytes}/{self.size} bayt")
+        else:
+            self._plan()
+        logging.info(f"İndiriliyor: {self.url} ({self.size or '?'} bayt, "
+                     f"{len(self.ranges)} bağlantı)")
+        self._save_state(force=True)
+
+        pending = [index for index, (start, end, done) in enumerate(self.ranges)
+                   if end is None or start + done < end]
+        try:
+            if len(pending) == 1:
+                self._fetch(pending[0])
+            elif pending:
+                with ThreadPoolExecutor(len(pending), thread_name_prefix="İndirme") as pool:
+                    futures = [pool.submit(self._fetch, index) for index in pending]
+                    wait(futures, return_when=FIRST_EXCEPTION)
+                    # İlk hata diğer parçaları durdurur; asıl hata yükseltilir
+                    self._stop.set()
+                    wait(futures)
+                errors = [f.exception() for f in futures
+                          if f.exception() is not None and not isinstance(f.exception(), _Stopped)]
+                if errors:
+                    raise errors[0]
+        finally:
+            try:
+                self._save_state(force=True)
+            except OSError:
+                logging.debug(traceback.format_exc())
+
+        written = sum(done for _, _, done in self.ranges)
+        if self.size is not None and written != self.size:
+            raise DownloadError(f"İndirme eksik: {written}/{self.size} bayt")
+        if self.size is None:
+            # Boyut bilinmiyordu: dosya inen kadar kısaltılır
+            with open(self.part_path, "r+b") as file:
+                file.truncate(written)
+        os.replace(self.part_path, self.path)
+        os.remove(self.state_path)
+        report_progress(self.progress, 1.0)
+        return self.path
@@ -0,0 +1,89 @@
+import sys
+import weakref
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class SharedImageHandle:
+    """Paylaşılan bellekteki görüntüye işaret eden küçük, pickle'lanabilir tanıtıcı"""
+    name: str
+    shape: Tuple[int, ...]
+    dtype: str
+
+    @property
+    def nbytes(self) -> int:
+        return int(np.prod(self.shape)) * np.dtype(self.dtype).itemsize
+
+
+class SharedImage:
+    """multiprocessing.shared_memory üzerinde duran NumPy görüntüsü
+
+    GUI süreci görüntüyü bir kez yayınlar (owner=True), worker süreçleri
+    yalnızca tanıtıcıyı alıp aynı belleğe kopyasız bağlanır.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, shape: Tuple[int, ...],
+                 dtype: str, owner: bool):
+        self._shm = shm
+        self._owner = owner
+        self._handle = SharedImageHandle(shm.name, tuple(int(s) for s in shape), np.dtype(dtype).str)
+        self.array: Optional[np.ndarray] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+    @classmethod
+    def create(cls, shape: Tuple[int, ...], dtype=np.uint8) -> 'SharedImage':
+        """Verilen boyutta boş bir paylaşılan tampon oluştur"""
+        nbytes = max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize)
+        shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        return cls(shm, shape, np.dtype(dtype).str, owner=True)
+
+    @classmethod
+    def from_array(cls, image: np.ndarray) -> 'SharedImage':
+        """Diziyi paylaşılan belleğe tek seferde kopyala"""
+        shared = cls.create(image.shape, image.dtype)
+        np.copyto(shared.array, image)
+        return shared
+
+    @classmethod
+    def attach(cls, handle: SharedImageHandle) -> 'SharedImage':
+        """Başka bir süreçte oluşturulmuş tampona bağlan"""
+        if sys.version_info >= (3, 13):
+            # Bağlanan süreç bloğun ömrünü yönetmez
+            shm = shared_memory.SharedMemory(name=handle.name, track=False)
+        else:
+            shm = shared_memory.SharedMemory(name=handle.name)
+        return cls(shm, handle.shape, handle.dtype, owner=False)
+
+    @property
+    def handle(self) -> SharedImageHandle:
+        return self._handle
+
+    @property
+    def closed(self) -> bool:
+        return self.array is None
+
+    def close(self) -> None:
+        """Bağlantıyı kapat; sahibi ise bloğu sistemden kaldır"""
+        if self.array is None:
+            return
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+        # NumPy view'ları buffer export'u tutmaz; eşleme dışarıda view varken
+        # kapatılırsa onlar geçersiz belleği gösterir. Türeyen view'lar kök
+        # diziyi base olarak tuttuğundan eşleme, kök dizi toplandığında
+        # (son view bırakılınca) kapatılır.
+        array, self.array = self.array, None
+        weakref.finalize(array, self._shm.close).atexit = False
+        del array
+
+    def __enter__(self) -> 'SharedImage':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,200 @@
+import cv2
+import numpy as np
+import logging
+import traceback
+from abc import ABC, abstractmethod
+from core.cancellation import check_cancelled, report_progress, sub_progress
+from core.inference_batcher import InferenceBatcher
+
+
+class SketchInference(ABC):
+    """APDrawing çizim modeli için çalışma ortamından bağımsız çıkarım
+
+    Karolama, harmanlama, toplama kuyruğu ve ön/son işleme burada; alt
+    sınıflar modeli yükler ve _forward_batch ile bir grubu çalıştırır
+    (torch: DeepSketchProcessor, OpenCV DNN/ONNX: OnnxSketchProcessor).
+    Bu modül torch içe aktarmaz.
+    """
+
+    INPUT_SIZE = 512
+    # Karolu çıkarım: model tamamen konvolüsyonel (adım 8), her boyutta çalışır.
+    # Karolar TILE_OVERLAP kadar örtüşür; kenardan TILE_CONTEXT (alıcı alan
+    # yarıçapı ~26 px) içindeki pikseller harmanlamada ağırlık almaz.
+    TILE_SIZE = 512
+    TILE_OVERLAP = 96
+    TILE_CONTEXT = 32
+    MODEL_STRIDE = 8
+
+    def __init__(self, tiled=True, batch_size=4, max_side=2048, max_wait_ms=10.0, workers=1):
+        # tiled=False: eski davranış, görüntü 512x512'ye sıkıştırılır
+        self.tiled = tiled
+        # Aynı boyuttaki karolar/görüntüler en çok batch_size'lık gruplarla
+        # tek ileri geçişte işlenir; ilk girdiden sonra max_wait_ms beklenir
+        self.batch_size = batch_size
+        self.batcher = InferenceBatcher(
+            self._forward_batch, batch_size, max_wait_ms, name="Çizim modeli", workers=workers
+        )
+        # Uzun kenar bunu aşarsa önce küçültülür (None: her zaman doğal çözünürlük)
+        self.max_side = max_side
+        self.model = None
+
+    @abstractmethod
+    def _forward_batch(self, batch):
+        """Kuyruk thread'inde çalışır: (N, H, W, 3) uint8 -> (N, H, W) çıktı [-1, 1]"""
+
+    def _prepare(self, image):
+        # Görüntüyü model için hazırla
+        if len(image.shape) == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2RGB)
+        
+        # Görüntüyü 512x512'ye yeniden boyutlandır
+        if image.shape[:2] != (self.INPUT_SIZE, self.INPUT_SIZE):
+            image = cv2.resize(image, (self.INPUT_SIZE, self.INPUT_SIZE))
+        return image
+
+    @staticmethod
+    def _to_uint8(output):
+        return ((output + 1) * 127.5).astype(np.uint8)
+
+    @staticmethod
+    def _tile_starts(length, tile, step):
+        if length <= tile:
+            return [0]
+        return list(range(0, length - tile, step)) + [length - tile]
+
+    @classmethod
+    def _blend_weights(cls, length, lead, trail):
+        """Karo ağırlığı: komşusu olan kenarda bağlam bandı 0, ardından doğrusal artış"""
+        position = np.arange(length, dtype=np.float32) + 0.5
+        ramp = max(1, cls.TILE_OVERLAP - 2 * cls.TILE_CONTEXT)
+        weights = np.ones(length, np.float32)
+        if lead:
+            weights = np.minimum(weights, np.clip((position - cls.TILE_CONTEXT) / ramp, 0, 1))
+        if trail:
+            weights = np.minimum(weights, np.clip((length - position - cls.TILE_CONTEXT) / ramp, 0, 1))
+        return weights
+
+    def _plan_tiles(self, image):
+        """Görüntüyü model adımına dolgula ve örtüşen karolara böl"""
+        if len(image.shape) == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2RGB)
+        height, width = image.shape[:2]
+        source = image
+        if self.max_side and max(height, width) > self.max_side:
+            scale = self.max_side / max(height, width)
+            source = cv2.resize(image, (max(1, round(width * scale)), max(1, round(height * scale))),
+                                interpolation=cv2.INTER_AREA)
+        h, w = source.shape[:2]
+
+        # Model adımı 8: boyutlar 8'in katına yansıtmalı dolgu ile tamamlanır
+        stride = self.MODEL_STRIDE
+        padded = cv2.copyMakeBorder(source, 0, -h % stride, 0, -w % stride, cv2.BORDER_REFLECT_101)
+        ph, pw = padded.shape[:2]
+        tile_h, tile_w = min(self.TILE_SIZE, ph), min(self.TILE_SIZE, pw)
+        step_h, step_w = tile_h - self.TILE_OVERLAP, tile_w - self.TILE_OVERLAP
+        tiles = [(y, x) for y in self._tile_starts(ph, tile_h, step_h)
+                 for x in self._tile_starts(pw, tile_w, step_w)]
+        crops = [padded[y:y + tile_h, x:x + tile_w] for y, x in tiles]
+        return (height, width), (h, w), (ph, pw), (tile_h, tile_w), tiles, crops
+
+    def _blend_tiles(self, plan, outputs):
+        """Karo çıktılarını örtüşme bölgelerinde yumuşak geçişle birleştir"""
+        (height, width), (h, w), (ph, pw), (tile_h, tile_w), tiles, _ = plan
+        accumulated = np.zeros((ph, pw), np.float32)
+        weight_sum = np.zeros((ph, pw), np.float32)
+        for (y, x), tile in zip(tiles, outputs):
+            weights = np.outer(
+                self._blend_weights(tile_h, y > 0, y + tile_h < ph),
+                self._blend_weights(tile_w, x > 0, x + tile_w < pw)
+            )
+            accumulated[y:y + tile_h, x:x + tile_w] += tile * weights
+            weight_sum[y:y + tile_h, x:x + tile_w] += weights
+
+        blended = accumulated[:h, :w] / weight_sum[:h, :w]
+        result = ((blended + 1) * 127.5).astype(np.uint8)
+        if (h, w) != (height, width):
+            result = cv2.resize(result, (width, height), interpolation=cv2.INTER_LINEAR)
+        return result
+
+    def process_tiled(self, image, token=None, progress=None):
+        """Görüntüyü en-boy oranını bozmadan örtüşen karolarla işle
+
+        Karolar toplama kuyruğunda batch_size'lık gruplar halinde tek ileri
+        geçişte işlenir, çıktılar örtüşme bölgelerinde harmanlanır.
+        """
+        plan = self._plan_tiles(image)
+        outputs = self.batcher.map(plan[-1], token, sub_progress(progress, 0.05, 0.95))
+        result = self._blend_tiles(plan, outputs)
+        logging.debug(f"Karolu çıkarım: {plan[1][1]}x{plan[1][0]}, {len(plan[-1])} karo, "
+                      f"grup {self.batch_size}")
+        return result
+
+    def process_batch(self, images, settings=None, token=None, progress=None):
+        """Birden çok görüntüyü birlikte işle
+
+        Tüm görüntülerin karoları (karosuz kipte 512x512 girdileri) kuyruğa
+        birlikte verilir; aynı boyuttakiler görüntü sınırı gözetmeden
+        gruplanır. Sonuçlar girdi sırasıyla döner, hata olursa None.
+        """
+        try:
+            if self.model is None:
+                raise ValueError("Model yüklenmemiş!")
+
+            if not self.tiled:
+                inputs = [self._prepare(image) for image in images]
+                outputs = self.batcher.map(inputs, token, progress)
+                return [
+                    cv2.resize(self._to_uint8(output), (image.shape[1], image.shape[0]))
+                    for image, output in zip(images, outputs)
+                ]
+
+            plans = [self._plan_tiles(image) for image in images]
+            crops = [crop for plan in plans for crop in plan[-1]]
+            outputs = self.batcher.map(crops, token, sub_progress(progress, 0.0, 0.95))
+            results, first = [], 0
+            for plan in plans:
+                count = len(plan[-1])
+                results.append(self._blend_tiles(plan, outputs[first:first + count]))
+                first += count
+            report_progress(progress, 1.0)
+            return results
+
+        except Exception as e:
+            logging.error(f"Toplu görüntü işleme hatası: {str(e)}")
+            logging.debug(traceback.format_exc())
+            return None
+
+    def process_image(self, image, settings=None, token=None, progress=None):
+        """Görüntüyü işle ve sketch'e dönüştür"""
+        try:
+            if self.model is None:
+                raise ValueError("Model yüklenmemiş!")
+
+            if self.tiled:
+                result = self.process_tiled(image, token, progress)
+                report_progress(progress, 1.0)
+                return result
+
+            # Görüntüyü hazırla
+            check_cancelled(token)
+            prepared = self._prepare(image)
+            report_progress(progress, 0.1)
+            
+            # Model çıktısını al; eşzamanlı çağrılarla aynı gruba girer
+            output = self.batcher.map([prepared], token)[0]
+            report_progress(progress, 0.9)
+            
+            # Çıktıyı işle
+            check_cancelled(token)
+            result = self._to_uint8(output)
+            
+            # Orijinal boyuta döndür
+            if image.shape[:2] != result.shape[:2]:
+                result = cv2.resize(result, (image.shape[1], image.shape[0]))
+            
+            report_progress(progress, 1.0)
+            return result
+
+        except Exception as e:
+            logging.error(f"Görüntü işleme hatası: {str(e)}")
+            return None
@@ -0,0 +1,112 @@
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+# Kaynak görüntü koordinatlarında bölge: (x, y, genişlik, yükseklik)
+Roi = Tuple[int, int, int, int]
+
+
+def full_roi(shape: Tuple[int, ...]) -> Roi:
+    """Görüntünün tamamını kapsayan bölge"""
+    return (0, 0, int(shape[1]), int(shape[0]))
+
+
+def roi_contains(outer: Roi, inner: Roi) -> bool:
+    ox, oy, ow, oh = outer
+    ix, iy, iw, ih = inner
+    return ox <= ix and oy <= iy and ix + iw <= ox + ow and iy + ih <= oy + oh
+
+
+def expand_roi(roi: Roi, margin: int, shape: Tuple[int, ...]) -> Roi:
+    """Bölgeyi her yönde kenar payı kadar büyüt, görüntü sınırında kes"""
+    x, y, w, h = roi
+    x0, y0 = max(0, x - margin), max(0, y - margin)
+    x1 = min(int(shape[1]), x + w + margin)
+    y1 = min(int(shape[0]), y + h + margin)
+    return (x0, y0, x1 - x0, y1 - y0)
+
+
+def slice_roi(image: np.ndarray, roi: Roi) -> np.ndarray:
+    """Bölgeyi kopyasız görünüm olarak döndür"""
+    x, y, w, h = roi
+    return image[y:y + h, x:x + w]
+
+
+def view_roi(view: np.ndarray, base: np.ndarray) -> Optional[Roi]:
+    """view, base'in içindeki dikdörtgen bir görünümse bölgesini döndür"""
+    if view.ndim < 2 or view.ndim != base.ndim or view.dtype != base.dtype:
+        return None
+    if view.strides != base.strides or view.shape[2:] != base.shape[2:]:
+        return None
+    if min(base.strides[:2]) <= 0:
+        return None
+    offset = view.__array_interface__['data'][0] - base.__array_interface__['data'][0]
+    if offset < 0:
+        return None
+    y, rest = divmod(offset, base.strides[0])
+    x, rest = divmod(rest, base.strides[1])
+    h, w = view.shape[:2]
+    if rest or x + w > base.shape[1] or y + h > base.shape[0]:
+        return None
+    return (int(x), int(y), int(w), int(h))
+
+
+class StageCache:
+    """Kaynak görüntü için hesaplanmış sonuçların bölge farkındalıklı önbelleği
+
+    Her kayıt hangi bölge için hesaplandığını bilir; istenen bölge bir
+    kaydın içinde kalıyorsa sonuç yeniden hesaplanmadan görünüm olarak
+    döner. Kırpma ve kırpmayı geri alma böylece önceki işi kullanır.
+    Kayıtlar dizi ya da nbytes/unpack(roi) sunan paketli maske olabilir.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, Any, Roi], Any]" = OrderedDict()
+        self._bytes = 0
+
+    @staticmethod
+    def params_key(settings: Dict[str, Any]) -> Tuple:
+        return tuple(sorted(settings.items()))
+
+    def get(self, stage: str, settings: Dict[str, Any], roi: Roi,
+            exact: bool = False) -> Optional[np.ndarray]:
+        """Bölgeyi kapsayan kayıttan sonucu döndür
+
+        exact: işlem yerel değilse yalnızca aynı bölge için hesaplanmış
+        sonuç kullanılabilir
+        """
+        params = self.params_key(settings)
+        for key, result in reversed(self._entries.items()):
+            entry_stage, entry_params, entry_roi = key
+            if entry_stage != stage or entry_params != params:
+                continue
+            if entry_roi == roi or (not exact and roi_contains(entry_roi, roi)):
+                self._entries.move_to_end(key)
+                x, y, w, h = roi
+                local = (x - entry_roi[0], y - entry_roi[1], w, h)
+                logging.debug(f"Ara sonuç önbellekten alındı: {stage} {roi}")
+                if isinstance(result, np.ndarray):
+                    return slice_roi(result, local)
+                # Paketli maske: yalnızca bölge açılır
+                return result.unpack(local)
+        return None
+
+    def put(self, stage: str, settings: Dict[str, Any], roi: Roi, result) -> None:
+        key = (stage, self.params_key(settings), roi)
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous.nbytes
+        if result.nbytes > self.max_bytes:
+            return
+        self._entries[key] = result
+        self._bytes += result.nbytes
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.nbytes
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
@@ -1,18 +1,26 @@
 import cv2
 import numpy as np
 import logging
+import threading
 import traceback
 from dataclasses import dataclass, field
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Union, Callable
 from datetime import datetime
-import os
-import urllib.request
+from core.model_store import ModelStore
+from core.packed_mask import PackedMask
+from core.print_size import PrintSize
+from core.shared_image import SharedImage
+from core.stage_cache import Roi, StageCache, full_roi, slice_roi
+from core.stencil_processors import StencilProcessor
 
 @dataclass
 class StencilState:
     """Stencil durumunu tutan sınıf"""
     original_image: Optional[np.ndarray] = None
     processed_image: Optional[np.ndarray] = None
+    # İkili sonuçların 1 bitlik hali; kayıt ve geçmiş bunu kullanır,
+    # processed_image yalnızca ekranda gösterilen 8 bitlik kopyadır
+    processed_mask: Optional[PackedMask] = None
     stencil_type: str = "Temel"
     settings: Dict[str, Dict[str, Any]] = None
     last_modified: datetime = field(default_factory=datetime.now)
@@ -54,36 +62,38 @@ class StencilState:
 
 class StateManager:
     """Program durumunu yöneten sınıf"""
-    MODEL_PATH = "models/hed_model.caffemodel"
-    PROTO_PATH = "models/deploy.prototxt"
-    MODEL_URL = "https://raw.githubusercontent.com/opencv/opencv_extra/master/testdata/dnn/hed_pretrained_bsds.caffemodel"
-    PROTO_URL = "https://raw.githubusercontent.com/opencv/opencv_3rdparty/master/hed/deploy.prototxt"
 
     def __init__(self):
         self.state = StencilState()
-        self.history: List[np.ndarray] = []
+        # İkili sonuçlar paketli (PackedMask), gri tonlular 8 bit saklanır
+        self.history: List[Union[np.ndarray, PackedMask]] = []
         self.history_position: int = -1
         self.max_history: int = 10
+        # Yüklenen görüntü; worker'lar shared_original'ı kullanır, baskı kipi
+        # kapalıyken ikisi aynıdır
+        self.native_original: Optional[SharedImage] = None
+        self.shared_original: Optional[SharedImage] = None
+        # Baskı kipinde kırpılmış bölgenin baskı çözünürlüğündeki kopyası
+        self.print_size: Optional[PrintSize] = None
+        self.print_original: Optional[SharedImage] = None
+        # Önizlemeler render thread'inde üretilir; kırpma GUI'de önbelleği
+        # temizler. Nesil her kaynak değişiminde artar, eski nesil yazamaz.
+        self.preview_cache: Dict[float, np.ndarray] = {}
+        self.preview_generation: int = 0
+        self._preview_lock = threading.Lock()
+        # Kırpma, paylaşılan kaynağın üzerinde bir bölgedir; görüntü kopyalanmaz
+        self.crop_roi: Optional[Roi] = None
+        self.crop_history: List[Optional[Roi]] = []
+        self.stage_cache = StageCache()
         self.ensure_model_exists()
         logging.info("StateManager başlatıldı")
 
     def ensure_model_exists(self):
         """Model dosyalarının varlığını kontrol et ve indir"""
         try:
-            if not os.path.exists('models'):
-                os.makedirs('models')
-                logging.info("Models klasörü oluşturuldu")
-
-            if not os.path.exists(self.MODEL_PATH):
-                logging.info("HED model indiriliyor...")
-                urllib.request.urlretrieve(self.MODEL_URL, self.MODEL_PATH)
-                logging.info("HED model indirildi")
-
-            if not os.path.exists(self.PROTO_PATH):
-                logging.info("Proto dosyası indiriliyor...")
-                urllib.request.urlretrieve(self.PROTO_URL, self.PROTO_PATH)
-                logging.info("Proto dosyası indirildi")
-
+            store = ModelStore.default()
+            for spec in ModelStore.HED:
+                store.ensure(spec)
             self.state.model_downloaded = True
         except Exception as e:
             logging.error(f"Model indirme hatası: {str(e)}")
@@ -96,7 +106,13 @@ class StateManager:
                 logging.error("Boş görüntü yüklenmeye çalışıldı")
                 return
 
-            self.state.original_image = image.copy()
+            # Yükleme başına tek kopya: worker'lar aynı belleği kullanır
+            shared = SharedImage.from_array(image)
+            self.release_shared_original()
+            self.native_original = shared
+            self.crop_history.clear()
+            self.stage_cache.clear()
+            self._apply_crop(None)
             self.state.last_modified = datetime.now()
             h, w = image.shape[:2]
             logging.info(f"Orijinal görüntü ayarlandı - Boyut: {w}x{h}")
@@ -107,6 +123,178 @@ class StateManager:
             print(f"Orijinal görüntü hatası: {str(e)}")  # Debug
             logging.debug(traceback.format_exc())
 
+    def release_shared_original(self) -> None:
+        """Paylaşılan orijinal görüntü bloklarını serbest bırak"""
+        self._release_print_original()
+        if self.native_original is not None:
+            self.native_original.close()
+            self.native_original = None
+        self.shared_original = None
+
+    def _release_print_original(self) -> None:
+        if self.print_original is not None:
+            self.print_original.close()
+            self.print_original = None
+
+    @property
+    def current_roi(self) -> Optional[Roi]:
+        """Worker'ların işlediği kaynak koordinatlarında geçerli bölge"""
+        if self.shared_original is None:
+            return None
+        if self.print_original is not None:
+            # Baskı kopyası zaten kırpılmış bölgedir
+            return full_roi(self.print_original.handle.shape)
+        return self.crop_roi or full_roi(self.shared_original.handle.shape)
+
+    def set_print_size(self, print_size: Optional[PrintSize]) -> Optional[np.ndarray]:
+        """Baskı boyutunu ayarla; görüntü bir kez hedef çözünürlüğe örneklenir"""
+        try:
+            self.print_size = print_size
+            # Önbellekteki sonuçlar başka çözünürlükteki kaynağa ait
+            self.stage_cache.clear()
+            if self.native_original is None:
+                return None
+            self._apply_crop(self.crop_roi)
+            h, w = self.state.original_image.shape[:2]
+            logging.info(f"Baskı boyutu ayarlandı: {print_size} - İşlenecek boyut: {w}x{h}")
+            return self.state.original_image
+
+        except Exception as e:
+            logging.error(f"Baskı boyutu ayarlama hatası: {str(e)}")
+            logging.debug(traceback.format_exc())
+            return None
+
+    def get_processing_settings(self, source_shape=None) -> Dict[str, Any]:
+        """İşlemcilere verilecek ayarlar; baskı kipinde milimetreler piksele çevrilir
+
+        source_shape: baskı boyutuna örneklenmeden işlenecek görüntünün
+        boyutu (karolu dönüştürme); verilmezse yüklü görüntü içindir.
+        """
+        settings = self.get_current_settings()
+        if self.print_size is None:
+            return settings
+        return self.print_size.pixel_settings(settings, source_shape)
+
+    def crop(self, roi: Roi) -> Optional[np.ndarray]:
+        """Geçerli görüntüyü kırp; roi geçerli görüntünün koordinatlarındadır"""
+        try:
+            if self.native_original is None:
+                logging.error("Kırpılacak görüntü yok")
+                return None
+            base = self.crop_roi or full_roi(self.native_original.handle.shape)
+            x, y, w, h = roi
+            if self.print_original is not None:
+                # Baskı kopyasındaki seçim yüklenen görüntünün koordinatlarına taşınır
+                ph, pw = self.print_original.handle.shape[:2]
+                sx, sy = base[2] / pw, base[3] / ph
+                x, y = int(round(x * sx)), int(round(y * sy))
+                w = max(1, min(int(round(w * sx)), base[2] - x))
+                h = max(1, min(int(round(h * sy)), base[3] - y))
+            self.crop_history.append(self.crop_roi)
+            self._apply_crop((base[0] + x, base[1] + y, w, h))
+            logging.info(f"Görüntü kırpıldı - Bölge: {self.crop_roi}")
+            return self.state.original_image
+
+        except Exception as e:
+            logging.error(f"Kırpma hatası: {str(e)}")
+            logging.debug(traceback.format_exc())
+            return None
+
+    def undo_crop(self) -> Optional[np.ndarray]:
+        """Son kırpmayı geri al"""
+        if not self.can_undo_crop():
+            logging.debug("Geri alınabilecek kırpma yok")
+            return None
+        self._apply_crop(self.crop_history.pop())
+        logging.info(f"Kırpma geri alındı - Bölge: {self.crop_roi}")
+        return self.state.original_image
+
+    def can_undo_crop(self) -> bool:
+        return bool(self.crop_history)
+
+    def _apply_crop(self, roi: Optional[Roi]) -> None:
+        source = self.native_original.array
+        if roi == full_roi(source.shape):
+            roi = None
+        self.crop_roi = roi
+        region = source if roi is None else slice_roi(source, roi)
+        self._release_print_original()
+        if self.print_size is None:
+            self.shared_original = self.native_original
+            self.state.original_image = region
+        else:
+            # Bölge bir kez baskı çözünürlüğüne örneklenir; tüm geçişler bunu işler
+            self.print_original = SharedImage.from_array(self.print_size.resample(region))
+            self.shared_original = self.print_original
+            self.state.original_image = self.print_original.array
+            self.stage_cache.clear()
+        # Önizlemeler bölgeye özgü; tam çözünürlüklü sonuçlar stage_cache'te kalır
+        with self._preview_lock:
+            self.preview_cache.clear()
+            self.preview_generation += 1
+        self.state.last_modified = datetime.now()
+
+    def cached_result(self, stencil_type: str, settings: Dict[str, Any]) -> Optional[np.ndarray]:
+        """Geçerli bölge için daha önce hesaplanmış stencil sonucu"""
+        roi = self.current_roi
+        if roi is None:
+            return None
+        # Yerel işlemlerde kapsayan herhangi bir bölgenin sonucu kullanılabilir
+        exact = StencilProcessor.roi_margin(stencil_type, settings) is None
+        return self.stage_cache.get(stencil_type, settings, roi, exact)
+
+    def store_result(self, stencil_type: str, settings: Dict[str, Any], result: np.ndarray) -> None:
+        """Geçerli bölge için hesaplanan tam çözünürlüklü sonucu sakla"""
+        roi = self.current_roi
+        if roi is None or result.shape[:2] != (roi[3], roi[2]):
+            return
+        if result is self.state.processed_image and self.state.processed_mask is not None:
+            result = self.state.processed_mask
+        else:
+            result = PackedMask.pack_if_binary(result)
+        self.stage_cache.put(stencil_type, settings, roi, result)
+
+    def preview_source(self) -> Callable[[float], Optional[np.ndarray]]:
+        """Geçerli görüntüye bağlı önizleme üreticisi (render thread'i için)
+
+        Görüntü ve nesil çağrı anında alınır; thread sonradan kırpılan ya da
+        değişen kaynağı görmez, eski nesilden önbelleğe yazılmaz.
+        """
+        image = self.state.original_image
+        generation = self.preview_generation
+        return lambda scale: self._preview_image(image, generation, scale)
+
+    def _preview_image(self, image: Optional[np.ndarray], generation: int,
+                       scale: float) -> Optional[np.ndarray]:
+        """Görüntünün küçültülmüş kopyasını döndür (ölçek başına önbellekli)"""
+        if image is None or scale >= 1.0:
+            return image
+
+        with self._preview_lock:
+            preview = self.preview_cache.get(scale) if generation == self.preview_generation else None
+        if preview is None:
+            h, w = image.shape[:2]
+            size = (max(1, int(round(w * scale))), max(1, int(round(h * scale))))
+            preview = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+            with self._preview_lock:
+                if generation == self.preview_generation:
+                    self.preview_cache[scale] = preview
+            logging.debug(f"Önizleme görüntüsü oluşturuldu: {size[0]}x{size[1]}")
+        return preview
+
+    def seed_preview(self, scale: float, preview: np.ndarray) -> None:
+        """Yükleme sırasında küçültülmüş çözülen görüntüyü önizleme olarak kullan"""
+        image = self.state.original_image
+        if image is None or preview is None:
+            return
+        h, w = image.shape[:2]
+        size = (max(1, int(round(w * scale))), max(1, int(round(h * scale))))
+        # Boyut birebir tutmuyorsa önizleme normal yoldan üretilir
+        if (preview.shape[1], preview.shape[0]) == size and preview.shape[2:] == image.shape[2:]:
+            with self._preview_lock:
+                self.preview_cache[scale] = preview
+            logging.debug(f"Önizleme yüklemeden alındı: {size[0]}x{size[1]}")
+
     def set_processed_image(self, image: np.ndarray) -> None:
         """İşlenmiş görüntüyü ayarla ve geçmişe ekle"""
         try:
@@ -114,9 +302,11 @@ class StateManager:
                 logging.error("Boş işlenmiş görüntü ayarlanmaya çalışıldı")
                 return
 
+            entry = PackedMask.pack_if_binary(image)
             self.state.processed_image = image.copy()
+            self.state.processed_mask = entry if isinstance(entry, PackedMask) else None
             self.state.last_modified = datetime.now()
-            self.add_to_history(image)
+            self.add_to_history(entry)
             h, w = image.shape[:2]
             logging.info(f"İşlenmiş görüntü ayarlandı - Boyut: {w}x{h}")
             print(f"İşlenmiş görüntü ayarlandı: {w}x{h}")  # Debug
@@ -200,7 +390,7 @@ class StateManager:
             logging.debug(traceback.format_exc())
             return {}
 
-    def add_to_history(self, image: np.ndarray) -> None:
+    def add_to_history(self, image: Union[np.ndarray, PackedMask]) -> None:
         """Görüntüyü geçmişe ekle"""
         try:
             if image is None:
@@ -212,7 +402,11 @@ class StateManager:
                 self.history = self.history[:self.history_position + 1]
                 logging.debug(f"{removed_count} geçmiş öğesi temizlendi")
             
-            self.history.append(image.copy())
+            if isinstance(image, np.ndarray):
+                image = PackedMask.pack_if_binary(image)
+                if isinstance(image, np.ndarray):
+                    image = image.copy()
+            self.history.append(image)
             self.history_position += 1
             
             if len(self.history) > self.max_history:
@@ -233,7 +427,7 @@ class StateManager:
                 return None
 
             self.history_position -= 1
-            self.state.processed_image = self.history[self.history_position].copy()
+            self._restore_history_entry()
             logging.info(f"İşlem geri alındı - Yeni pozisyon: {self.history_position + 1}/{len(self.history)}")
             return self.state.processed_image
             
@@ -250,7 +444,7 @@ class StateManager:
                 return None
 
             self.history_position += 1
-            self.state.processed_image = self.history[self.history_position].copy()
+            self._restore_history_entry()
             logging.info(f"İşlem yinelendi - Yeni pozisyon: {self.history_position + 1}/{len(self.history)}")
             return self.state.processed_image
             
@@ -259,6 +453,15 @@ class StateManager:
             logging.debug(traceback.format_exc())
             return None
 
+    def _restore_history_entry(self) -> None:
+        entry = self.history[self.history_position]
+        if isinstance(entry, PackedMask):
+            self.state.processed_image = entry.unpack()
+            self.state.processed_mask = entry
+        else:
+            self.state.processed_image = entry.copy()
+            self.state.processed_mask = None
+
     def can_undo(self) -> bool:
         """Geri alma yapılabilir mi?"""
         return self.history_position > 0
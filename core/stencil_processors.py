@@ -1,28 +1,112 @@
 import cv2
 import numpy as np
 import logging
+import threading
 import traceback
 from core.deep_processor import DeepProcessor
 from core.advanced_sketch_processor import AdvancedSketchProcessor
+from core.cancellation import check_cancelled, report_progress
 
 class StencilProcessor:
     """Stencil işleme sınıfı"""
     
     _deep_processor = None
+    # Eşzamanlı ilk çağrılar modeli iki kez yüklemesin
+    _deep_processor_lock = threading.Lock()
     _advanced_processor = AdvancedSketchProcessor()
     
+    # Stencil tipi -> işlem metodu adı
+    PROCESSORS = {
+        "Temel": "basic_stencil",
+        "Adaptif": "adaptive_stencil",
+        "Karakalem": "sketch_stencil",
+        "Derin Stencil": "deep_stencil",
+        "Sanatsal Stencil": "artistic_stencil"
+    }
+    # Isınma geçişinde işlenen sahte görüntünün kenarı
+    WARMUP_SIZE = 64
+    
     @classmethod
     def get_deep_processor(cls):
-        if cls._deep_processor is None:
-            cls._deep_processor = DeepProcessor()
+        with cls._deep_processor_lock:
+            if cls._deep_processor is None:
+                cls._deep_processor = DeepProcessor()
         return cls._deep_processor
     
+    @classmethod
+    def warm_up(cls, stencil_type: str, settings: dict, token=None) -> bool:
+        """Tipin ilk işleminde ödenen yükleme maliyetini önceden öde
+
+        Küçük bir sahte görüntü, render'ın çalıştırdığı PROCESSORS[tip]
+        yolundan geçirilir; içe aktarmalar ve OpenCV çekirdekleri ilk
+        tıklamadan önce hazır olur. İptal aşamalar arasında denetlenir.
+        """
+        check_cancelled(token)
+        size = cls.WARMUP_SIZE
+        # Düz görüntüde kenar çıkmaz; çapraz gradyan tüm aşamaları çalıştırır
+        ramp = np.linspace(0, 255, size).astype(np.int32)
+        gradient = (np.add.outer(ramp, ramp) // 2).astype(np.uint8)
+        image = cv2.cvtColor(gradient, cv2.COLOR_GRAY2BGR)
+        return cls.process(stencil_type, image, settings, token) is not None
+
+    @classmethod
+    def process(cls, stencil_type: str, image: np.ndarray, settings: dict,
+                token=None, progress=None) -> np.ndarray:
+        """Stencil tipine göre ilgili işlemi çalıştır
+
+        token: CancellationToken, aşamalar arasında kontrol edilir
+        progress: 0-1 arası ilerleme alan geri çağrı
+        """
+        method_name = cls.PROCESSORS.get(stencil_type)
+        if method_name is None:
+            logging.error(f"Bilinmeyen stencil tipi: {stencil_type}")
+            return None
+        return getattr(cls, method_name)(image, settings, token, progress)
+
+    @staticmethod
+    def scaled_settings(settings: dict, scale: float) -> dict:
+        """Bulanıklık, blok ve kalınlık ayarlarını verilen oranla ölçekle
+
+        Kaba geçişlerde oran önizleme ölçeği, baskı kipinde mm başına
+        piksel sayısıdır. Çekirdeklerin tek sayı ve alt sınırı korunur.
+        """
+        scaled = dict(settings)
+        if "line_thickness" in scaled:
+            scaled["line_thickness"] = float(max(1, round(float(scaled["line_thickness"]) * scale)))
+        if "blur" in scaled:
+            # Gauss çekirdeği tek sayı olmalı
+            scaled["blur"] = float(int(float(scaled["blur"]) * scale) | 1)
+        if "block_size" in scaled:
+            scaled["block_size"] = float(max(3, int(float(scaled["block_size"]) * scale) | 1))
+        return scaled
+
+    @staticmethod
+    def roi_margin(stencil_type: str, settings: dict):
+        """Bir bölgenin tam görüntüdeki sonucu vermesi için gereken kenar payı
+
+        Filtrelerin etki yarıçaplarının toplamıdır; bölge bu pay kadar
+        genişletilip işlenince iç kısmı tam görüntünün sonucuyla örtüşür.
+        None: işlem yerel değil, bölge kendi başına işlenmeli. CLAHE karo
+        ızgarası görüntü boyutuna bağlıdır; Canny histerezisinde zayıf kenar
+        ancak güçlü bir kenara bağlanırsa kalır ve o kenar herhangi bir
+        uzaklıkta olabilir (Temel).
+        """
+        thickness = max(1, int(float(settings.get("line_thickness", 2))))
+        blur = int(settings.get("blur", 5))
+        blur_radius = (blur if blur % 2 == 1 else blur + 1) // 2
+        if stencil_type == "Adaptif":
+            block_size = int(float(settings.get("block_size", 11)))
+            return blur_radius + (block_size | 1) // 2 + thickness
+        if stencil_type == "Karakalem":
+            return 10 + thickness
+        return None
+
     @staticmethod
-    def deep_stencil(image: np.ndarray, settings: dict) -> np.ndarray:
+    def deep_stencil(image: np.ndarray, settings: dict, token=None, progress=None) -> np.ndarray:
         """Derin öğrenme tabanlı stencil işlemi"""
         try:
             print("Derin stencil başladı:", settings)  # Debug
-            return StencilProcessor._advanced_processor.portrait_to_sketch(image, settings)
+            return StencilProcessor._advanced_processor.portrait_to_sketch(image, settings, token, progress)
         except Exception as e:
             print(f"Derin stencil hatası: {str(e)}")  # Debug
             logging.error(f"Derin stencil hatası: {str(e)}")
@@ -30,11 +114,11 @@ class StencilProcessor:
             return None
 
     @staticmethod
-    def artistic_stencil(image: np.ndarray, settings: dict) -> np.ndarray:
+    def artistic_stencil(image: np.ndarray, settings: dict, token=None, progress=None) -> np.ndarray:
         """Sanatsal stencil işlemi"""
         try:
             print("Sanatsal stencil başladı:", settings)  # Debug
-            return StencilProcessor._advanced_processor.artistic_sketch(image, settings)
+            return StencilProcessor._advanced_processor.artistic_sketch(image, settings, token, progress)
         except Exception as e:
             print(f"Sanatsal stencil hatası: {str(e)}")  # Debug
             logging.error(f"Sanatsal stencil hatası: {str(e)}")
@@ -42,7 +126,7 @@ class StencilProcessor:
             return None
 
     @staticmethod
-    def basic_stencil(image: np.ndarray, settings: dict) -> np.ndarray:
+    def basic_stencil(image: np.ndarray, settings: dict, token=None, progress=None) -> np.ndarray:
         """Temel stencil işlemi"""
         try:
             print("Basic stencil başladı:", settings)  # Debug
@@ -52,18 +136,21 @@ class StencilProcessor:
             print("Gri tonlama tamamlandı")  # Debug
             
             # Bulanıklaştır
+            check_cancelled(token)
             blur = int(settings.get("blur", 5))
             blur_value = blur if blur % 2 == 1 else blur + 1
             blurred = cv2.GaussianBlur(gray, (blur_value, blur_value), 0)
             print(f"Bulanıklaştırma tamamlandı: {blur_value}")  # Debug
             
             # Kenar tespiti
+            check_cancelled(token)
             threshold1 = float(settings.get("threshold1", 50))
             threshold2 = float(settings.get("threshold2", 150))
             edges = cv2.Canny(blurred, threshold1, threshold2)
             print(f"Kenar tespiti tamamlandı: {threshold1}, {threshold2}")  # Debug
             
             # Çizgileri kalınlaştır
+            check_cancelled(token)
             thickness = float(settings.get("line_thickness", 2))
             kernel_size = max(1, int(thickness))
             kernel = np.ones((kernel_size, kernel_size), np.uint8)
@@ -71,6 +158,7 @@ class StencilProcessor:
             print(f"Çizgiler kalınlaştırıldı: {thickness}")  # Debug
             
             result = cv2.bitwise_not(dilated)
+            report_progress(progress, 1.0)
             print("Basic stencil tamamlandı")  # Debug
             
             return result
@@ -82,7 +170,7 @@ class StencilProcessor:
             return None
 
     @staticmethod
-    def adaptive_stencil(image: np.ndarray, settings: dict) -> np.ndarray:
+    def adaptive_stencil(image: np.ndarray, settings: dict, token=None, progress=None) -> np.ndarray:
         """Adaptif stencil işlemi"""
         try:
             print("Adaptif stencil başladı:", settings)  # Debug
@@ -92,12 +180,14 @@ class StencilProcessor:
             print("Gri tonlama tamamlandı")  # Debug
             
             # Bulanıklaştır
+            check_cancelled(token)
             blur = int(settings.get("blur", 5))
             blur_value = blur if blur % 2 == 1 else blur + 1
             blurred = cv2.GaussianBlur(gray, (blur_value, blur_value), 0)
             print(f"Bulanıklaştırma tamamlandı: {blur_value}")  # Debug
             
             # Adaptif eşikleme
+            check_cancelled(token)
             block_size = int(float(settings.get("block_size", 11)))
             c_value = float(settings.get("c_value", 2))
             
@@ -115,12 +205,14 @@ class StencilProcessor:
             print(f"Adaptif eşikleme tamamlandı: block={block_size}, c={c_value}")  # Debug
             
             # Çizgileri kalınlaştır
+            check_cancelled(token)
             thickness = float(settings.get("line_thickness", 2))
             kernel_size = max(1, int(thickness))
             kernel = np.ones((kernel_size, kernel_size), np.uint8)
             dilated = cv2.dilate(thresh, kernel, iterations=1)
             print(f"Çizgiler kalınlaştırıldı: {thickness}")  # Debug
             
+            report_progress(progress, 1.0)
             print("Adaptif stencil tamamlandı")  # Debug
             return dilated
             
@@ -131,7 +223,7 @@ class StencilProcessor:
             return None
 
     @staticmethod
-    def sketch_stencil(image: np.ndarray, settings: dict) -> np.ndarray:
+    def sketch_stencil(image: np.ndarray, settings: dict, token=None, progress=None) -> np.ndarray:
         """Karakalem stencil işlemi"""
         try:
             print("Karakalem stencil başladı:", settings)  # Debug
@@ -148,12 +240,14 @@ class StencilProcessor:
             print(f"Kontrast ve koyuluk ayarlandı: contrast={contrast}, darkness={darkness}")  # Debug
             
             # Karakalem efekti
+            check_cancelled(token)
             inverted = cv2.bitwise_not(adjusted)
             blurred = cv2.GaussianBlur(inverted, (21, 21), 0)
             sketch = cv2.divide(adjusted, cv2.bitwise_not(blurred), scale=256.0)
             print("Karakalem efekti uygulandı")  # Debug
             
             # Çizgileri kalınlaştır
+            check_cancelled(token)
             thickness = float(settings.get("line_thickness", 2))
             kernel_size = max(1, int(thickness))
             kernel = np.ones((kernel_size, kernel_size), np.uint8)
@@ -161,6 +255,7 @@ class StencilProcessor:
             print(f"Çizgiler kalınlaştırıldı: {thickness}")  # Debug
             
             result = cv2.bitwise_not(dilated)
+            report_progress(progress, 1.0)
             print("Karakalem stencil tamamlandı")  # Debug
             return result
             
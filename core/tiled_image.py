@@ -0,0 +1,329 @@
+import cv2
+import numpy as np
+import logging
+import os
+import struct
+import zlib
+from typing import BinaryIO, Dict, List, Tuple
+
+from core.stage_cache import Roi
+
+
+class TiledImageReader:
+    """Belleğe sığmayan görüntüler için bellek eşlemeli, bölge bazlı okuyucu
+
+    Dosya hiçbir zaman bütünüyle çözülmez; sıkıştırılmamış parçalar
+    (TIFF şerit/karoları, PPM/PGM ya da .npy düzlemi) doğrudan dosyadan
+    eşlenir ve yalnızca istenen bölge BGR olarak kopyalanır.
+    """
+
+    EXTENSIONS = ('.tif', '.tiff', '.ppm', '.pgm', '.npy')
+
+    def __init__(self, path: str, width: int, height: int, channels: int,
+                 chunk_size: Tuple[int, int], offsets: List[int], rgb: bool = True):
+        self.path = path
+        self.width = width
+        self.height = height
+        self.channels = channels
+        # Parça ızgarası: her parça chunk_w x chunk_h, satır öncelikli ofsetler
+        self.chunk_w, self.chunk_h = chunk_size
+        # Art arda duran tam genişlikli şeritler tek düzlem gibi eşlenir
+        strip_bytes = self.chunk_h * width * channels
+        if self.chunk_w == width and all(
+                b - a == strip_bytes for a, b in zip(offsets, offsets[1:])):
+            self.chunk_h = height
+            offsets = offsets[:1]
+        self.columns = -(-width // self.chunk_w)
+        self.offsets = offsets
+        self.rgb = rgb
+        self._map = np.memmap(path, dtype=np.uint8, mode='r')
+
+    @property
+    def shape(self) -> Tuple[int, int, int]:
+        return (self.height, self.width, 3)
+
+    @classmethod
+    def open(cls, path: str) -> 'TiledImageReader':
+        """Dosya tipine göre okuyucuyu oluştur"""
+        ext = os.path.splitext(path)[1].lower()
+        with open(path, 'rb') as f:
+            if ext in ('.tif', '.tiff'):
+                return cls._open_tiff(path, f)
+            if ext in ('.ppm', '.pgm'):
+                return cls._open_pnm(path, f)
+            if ext == '.npy':
+                return cls._open_npy(path, f)
+        raise ValueError(f"Desteklenmeyen dosya tipi: {ext}")
+
+    @classmethod
+    def _open_pnm(cls, path: str, f: BinaryIO) -> 'TiledImageReader':
+        magic = f.read(2)
+        if magic not in (b'P5', b'P6'):
+            raise ValueError("Yalnızca ikili PGM (P5) / PPM (P6) desteklenir")
+        fields = []
+        while len(fields) < 3:
+            line = f.readline()
+            if not line:
+                raise ValueError("Eksik PNM başlığı")
+            fields.extend(line.split(b'#')[0].split())
+        width, height, maxval = (int(v) for v in fields[:3])
+        if maxval > 255:
+            raise ValueError("Yalnızca 8 bit PNM desteklenir")
+        channels = 3 if magic == b'P6' else 1
+        return cls(path, width, height, channels, (width, height), [f.tell()])
+
+    @classmethod
+    def _open_npy(cls, path: str, f: BinaryIO) -> 'TiledImageReader':
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran, dtype = np.lib.format.read_array_header_2_0(f)
+        if fortran or dtype != np.uint8 or len(shape) not in (2, 3):
+            raise ValueError("Yalnızca C sıralı uint8 HxW ya da HxWxC dizileri desteklenir")
+        channels = shape[2] if len(shape) == 3 else 1
+        # .npy görüntüleri OpenCV düzeninde (BGR) varsayılır
+        return cls(path, shape[1], shape[0], channels, (shape[1], shape[0]), [f.tell()], rgb=False)
+
+    @classmethod
+    def _open_tiff(cls, path: str, f: BinaryIO) -> 'TiledImageReader':
+        header = f.read(16)
+        order = {b'II': '<', b'MM': '>'}.get(header[:2])
+        if order is None:
+            raise ValueError("Geçersiz TIFF başlığı")
+        magic = struct.unpack(order + 'H', header[2:4])[0]
+        if magic == 42:
+            big, ifd_offset = False, struct.unpack(order + 'I', header[4:8])[0]
+        elif magic == 43:
+            big, ifd_offset = True, struct.unpack(order + 'Q', header[8:16])[0]
+        else:
+            raise ValueError("Geçersiz TIFF başlığı")
+
+        tags = TiffFormat.read_ifd(f, order, big, ifd_offset)
+        width = tags[256][0]
+        height = tags[257][0]
+        channels = tags.get(277, [1])[0]
+        bits = tags.get(258, [8])
+        if tags.get(259, [1])[0] != 1:
+            raise ValueError("Sıkıştırılmış TIFF parça parça okunamaz; sıkıştırmasız kaydedin")
+        if any(b != 8 for b in bits) or tags.get(284, [1])[0] != 1 or channels not in (1, 3, 4):
+            raise ValueError("Yalnızca 8 bit, iç içe (chunky) gri/RGB TIFF desteklenir")
+        if tags.get(262, [1])[0] == 0:
+            raise ValueError("WhiteIsZero TIFF desteklenmiyor")
+
+        if 322 in tags:
+            chunk = (tags[322][0], tags[323][0])
+            offsets = tags[324]
+        else:
+            chunk = (width, min(height, tags.get(278, [height])[0]))
+            offsets = tags[273]
+        return cls(path, width, height, channels, chunk, list(offsets))
+
+    def _chunk(self, column: int, row: int) -> np.ndarray:
+        """Parçanın dosyadaki kopyasız görünümü (kenar parçaları kırpılmış)"""
+        offset = self.offsets[row * self.columns + column]
+        rows = min(self.chunk_h, self.height - row * self.chunk_h)
+        # Karoların kenar dolgusu parçanın sonundadır; satır adımı hep chunk_w
+        count = rows * self.chunk_w * self.channels
+        chunk = self._map[offset:offset + count].reshape(rows, self.chunk_w, self.channels)
+        return chunk[:, :min(self.chunk_w, self.width - column * self.chunk_w)]
+
+    def read_region(self, roi: Roi) -> np.ndarray:
+        """Bölgeyi BGR uint8 olarak oku; yalnızca bölgenin parçalarına dokunulur"""
+        x, y, w, h = roi
+        region = np.empty((h, w, self.channels), np.uint8)
+        for row in range(y // self.chunk_h, (y + h - 1) // self.chunk_h + 1):
+            for column in range(x // self.chunk_w, (x + w - 1) // self.chunk_w + 1):
+                cx, cy = column * self.chunk_w, row * self.chunk_h
+                chunk = self._chunk(column, row)
+                x0, y0 = max(x, cx), max(y, cy)
+                x1 = min(x + w, cx + chunk.shape[1])
+                y1 = min(y + h, cy + chunk.shape[0])
+                region[y0 - y:y1 - y, x0 - x:x1 - x] = chunk[y0 - cy:y1 - cy, x0 - cx:x1 - cx]
+
+        if self.channels == 1:
+            return cv2.cvtColor(region, cv2.COLOR_GRAY2BGR)
+        if self.channels == 4:
+            return cv2.cvtColor(region, cv2.COLOR_RGBA2BGR if self.rgb else cv2.COLOR_BGRA2BGR)
+        if self.rgb:
+            return cv2.cvtColor(region, cv2.COLOR_RGB2BGR)
+        return region
+
+    def close(self) -> None:
+        self._map = None
+
+    def __enter__(self) -> 'TiledImageReader':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class TiffFormat:
+    """Okuyucu ve yazıcının paylaştığı asgari TIFF IFD işlemleri"""
+
+    # Tip -> (struct kodu, bayt)
+    TYPES = {1: ('B', 1), 3: ('H', 2), 4: ('I', 4), 5: ('II', 8), 16: ('Q', 8)}
+
+    @staticmethod
+    def read_ifd(f: BinaryIO, order: str, big: bool, offset: int) -> Dict[int, List[int]]:
+        """İlk IFD'deki sayısal etiketleri oku"""
+        count_code, count_size = ('Q', 8) if big else ('H', 2)
+        entry_size = 20 if big else 12
+        inline = 8 if big else 4
+        f.seek(offset)
+        count = struct.unpack(order + count_code, f.read(count_size))[0]
+        data = f.read(count * entry_size)
+        tags = {}
+        for index in range(count):
+            entry = data[index * entry_size:(index + 1) * entry_size]
+            tag, type_id = struct.unpack(order + 'HH', entry[:4])
+            if type_id not in TiffFormat.TYPES:
+                continue
+            code, size = TiffFormat.TYPES[type_id]
+            if big:
+                n = struct.unpack(order + 'Q', entry[4:12])[0]
+                raw = entry[12:20]
+            else:
+                n = struct.unpack(order + 'I', entry[4:8])[0]
+                raw = entry[8:12]
+            total = n * size
+            if total > inline:
+                position = f.tell()
+                f.seek(struct.unpack(order + ('Q' if big else 'I'), raw)[0])
+                raw = f.read(total)
+                f.seek(position)
+            values = struct.unpack(order + code * n, raw[:total])
+            if type_id == 5:
+                values = [values[i] / max(1, values[i + 1]) for i in range(0, len(values), 2)]
+            tags[tag] = list(values)
+        return tags
+
+
+class TiledTiffWriter:
+    """Gri ya da 1 bitlik TIFF'i şerit şerit diske yazan akış yazıcısı
+
+    Satırlar geldikçe dosyaya eklenir; IFD en sonda yazılır. 4 GB'ı aşan
+    çıktılar otomatik olarak BigTIFF olur. Bellekte yalnızca ofset listesi
+    tutulur. Şeritler sıkıştırmasız ya da Deflate (zlib) ile yazılabilir.
+    """
+
+    COMPRESSION_NONE = 1
+    COMPRESSION_DEFLATE = 8
+
+    def __init__(self, path: str, width: int, height: int, rows_per_strip: int = 64,
+                 bits_per_sample: int = 8, compression: int = COMPRESSION_NONE,
+                 level: int = 1):
+        if bits_per_sample not in (1, 8):
+            raise ValueError(f"Desteklenmeyen bit derinliği: {bits_per_sample}")
+        self.path = path
+        self.width = width
+        self.height = height
+        self.rows_per_strip = rows_per_strip
+        self.bits_per_sample = bits_per_sample
+        self.compression = compression
+        self.level = level
+        # 1 bitte satırlar np.packbits düzeninde gelir (1 beyaz)
+        self.row_bytes = width if bits_per_sample == 8 else (width + 7) // 8
+        self.big = self.row_bytes * height > 0xFFFFFFFF - (1 << 24)
+        self.order = '<'
+        self.rows_written = 0
+        self._offsets: List[int] = []
+        self._counts: List[int] = []
+        self._pending = np.empty((0, self.row_bytes), np.uint8)
+        self._file = open(path, 'wb')
+        if self.big:
+            # BigTIFF: sürüm 43, ofset boyutu 8, IFD ofseti sonra yazılır
+            self._file.write(b'II' + struct.pack('<HHHQ', 43, 8, 0, 0))
+        else:
+            self._file.write(b'II' + struct.pack('<HI', 42, 0))
+
+    def write_rows(self, rows: np.ndarray) -> None:
+        """Sıradaki satırları ekle (HxW uint8, 1 bitte Hx ceil(W/8) paketli)"""
+        if rows.ndim != 2 or rows.shape[1] != self.row_bytes:
+            raise ValueError(f"Beklenmeyen satır boyutu: {rows.shape}")
+        if self.rows_written + rows.shape[0] > self.height:
+            raise ValueError("Görüntü yüksekliği aşıldı")
+        self.rows_written += rows.shape[0]
+        if len(self._pending):
+            rows = np.concatenate([self._pending, rows])
+        full = rows.shape[0] - rows.shape[0] % self.rows_per_strip
+        for start in range(0, full, self.rows_per_strip):
+            self._write_strip(rows[start:start + self.rows_per_strip])
+        self._pending = rows[full:].copy()
+
+    def _write_strip(self, strip: np.ndarray) -> None:
+        strip = np.ascontiguousarray(strip, np.uint8)
+        self._offsets.append(self._file.tell())
+        if self.compression == self.COMPRESSION_DEFLATE:
+            data = zlib.compress(strip.data, self.level)
+            self._counts.append(len(data))
+            self._file.write(data)
+        else:
+            self._counts.append(strip.nbytes)
+            self._file.write(strip.data)
+
+    def _entry(self, tag: int, type_id: int, values: List[int], extra: bytearray, extra_base: int) -> bytes:
+        code = 'I' if type_id == 5 else TiffFormat.TYPES[type_id][0]
+        inline = 8 if self.big else 4
+        raw = struct.pack('<' + code * len(values), *values)
+        count = len(values) // 2 if type_id == 5 else len(values)
+        if len(raw) > inline:
+            offset = extra_base + len(extra)
+            extra.extend(raw)
+            raw = struct.pack('<Q' if self.big else '<I', offset)
+        raw = raw.ljust(inline, b'\0')
+        if self.big:
+            return struct.pack('<HHQ', tag, type_id, count) + raw
+        return struct.pack('<HHI', tag, type_id, count) + raw
+
+    def close(self) -> None:
+        """IFD'yi yaz ve dosyayı kapat"""
+        if self._file is None:
+            return
+        try:
+            if self.rows_written != self.height:
+                raise ValueError(f"Eksik satır: {self.rows_written}/{self.height}")
+            if len(self._pending):
+                self._write_strip(self._pending)
+            offset_type = 16 if self.big else 4
+            entries = [
+                (256, 4, [self.width]),
+                (257, 4, [self.height]),
+                (258, 3, [self.bits_per_sample]),
+                (259, 3, [self.compression]),
+                (262, 3, [1]),
+                (273, offset_type, self._offsets),
+                (277, 3, [1]),
+                (278, 4, [self.rows_per_strip]),
+                (279, offset_type, self._counts),
+                (284, 3, [1])
+            ]
+            if self._file.tell() % 2:
+                self._file.write(b'\0')
+            ifd_offset = self._file.tell()
+            entry_size, count_size, next_size = (20, 8, 8) if self.big else (12, 2, 4)
+            extra_base = ifd_offset + count_size + len(entries) * entry_size + next_size
+            extra = bytearray()
+            body = b''.join(self._entry(tag, t, v, extra, extra_base) for tag, t, v in entries)
+            if self.big:
+                self._file.write(struct.pack('<Q', len(entries)) + body + struct.pack('<Q', 0))
+            else:
+                self._file.write(struct.pack('<H', len(entries)) + body + struct.pack('<I', 0))
+            self._file.write(extra)
+            # Başlıktaki IFD ofsetini güncelle
+            self._file.seek(8 if self.big else 4)
+            self._file.write(struct.pack('<Q' if self.big else '<I', ifd_offset))
+        finally:
+            self._file.close()
+            self._file = None
+
+    def abort(self) -> None:
+        """Yarım kalan dosyayı sil"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        try:
+            os.remove(self.path)
+        except OSError as e:
+            logging.debug(f"Yarım dosya silinemedi: {str(e)}")
@@ -0,0 +1,88 @@
+import numpy as np
+import logging
+import time
+import traceback
+from typing import Optional
+
+from core.cancellation import RenderCancelled, check_cancelled, report_progress
+from core.stage_cache import expand_roi, slice_roi
+from core.stencil_processors import StencilProcessor
+from core.tiled_image import TiledImageReader, TiledTiffWriter
+
+
+class TiledStencilRenderer:
+    """Belleğe sığmayan görüntüleri karo karo işleyip akış halinde yazar
+
+    Her karo, işlemin kenar payı kadar genişletilerek okunur; böylece yerel
+    işlemlerde (Adaptif, Karakalem) karo sınırında dikiş kalmaz. Kenar payı
+    olmayan tipler reddedilir. Bellekte aynı anda yalnızca bir karo ve bir
+    çıktı bandı (genişlik x karo yüksekliği) durur.
+    """
+
+    TILE_SIZE = 2048
+
+    @staticmethod
+    def render(reader: TiledImageReader, writer: TiledTiffWriter, stencil_type: str,
+               settings: dict, tile_size: Optional[int] = None,
+               token=None, progress=None) -> bool:
+        """Okuyucudaki görüntüyü işleyip yazıcıya aktar"""
+        margin = StencilProcessor.roi_margin(stencil_type, settings)
+        if margin is None:
+            # CLAHE ızgarası ve Canny histerezisi karo dışına uzanır; karolar dikiş bırakır
+            logging.error(f"{stencil_type} karolu işlenemez, yerel olmayan işlem")
+            return False
+
+        tile = tile_size or TiledStencilRenderer.TILE_SIZE
+        width, height = reader.width, reader.height
+        start = time.perf_counter()
+        try:
+            for y in range(0, height, tile):
+                rows = min(tile, height - y)
+                band = np.empty((rows, width), np.uint8)
+                for x in range(0, width, tile):
+                    check_cancelled(token)
+                    roi = (x, y, min(tile, width - x), rows)
+                    region = expand_roi(roi, margin, reader.shape)
+                    result = StencilProcessor.process(
+                        stencil_type, reader.read_region(region), settings, token
+                    )
+                    if result is None:
+                        return False
+                    inner = (roi[0] - region[0], roi[1] - region[1], roi[2], roi[3])
+                    band[:, x:x + roi[2]] = slice_roi(result, inner)
+                    report_progress(progress, (y * width + (x + roi[2]) * rows) / (width * height))
+                writer.write_rows(band)
+
+            elapsed = time.perf_counter() - start
+            logging.info(f"Karolu işlem tamamlandı: {width}x{height}, {elapsed:.1f} sn")
+            return True
+
+        except RenderCancelled:
+            raise
+        except Exception as e:
+            logging.error(f"Karolu işlem hatası: {str(e)}")
+            logging.debug(traceback.format_exc())
+            return False
+
+    @staticmethod
+    def convert_file(input_path: str, output_path: str, stencil_type: str,
+                     settings: dict, token=None, progress=None) -> bool:
+        """Dosyadan dosyaya, sınırlı bellekle stencil dönüşümü"""
+        writer = None
+        try:
+            with TiledImageReader.open(input_path) as reader:
+                writer = TiledTiffWriter(output_path, reader.width, reader.height)
+                ok = TiledStencilRenderer.render(
+                    reader, writer, stencil_type, settings, token=token, progress=progress
+                )
+            if ok:
+                writer.close()
+                return True
+        except RenderCancelled:
+            logging.info("Karolu işlem iptal edildi")
+        except Exception as e:
+            logging.error(f"Büyük görüntü dönüştürme hatası: {str(e)}")
+            logging.debug(traceback.format_exc())
+        if writer is not None:
+            writer.abort()
+        return False
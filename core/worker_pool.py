@@ -0,0 +1,207 @@
+import logging
+import multiprocessing
+import threading
+import traceback
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional
+
+import numpy as np
+
+from core.cancellation import CancellationToken, RenderCancelled
+from core.compute_resources import ComputeBudget, ComputeResources
+from core.shared_image import SharedImage, SharedImageHandle
+from core.stage_cache import Roi, expand_roi, full_roi, slice_roi
+
+# Worker'ın son bağlandığı kaynak görüntü; aynı kaynak için her işte yeniden
+# eşlenmez ve adresi sabit kaldığından süreç içi önbellekler de isabet eder
+_attached_source: Optional[SharedImage] = None
+
+
+def _attach_source(handle: SharedImageHandle) -> SharedImage:
+    global _attached_source
+    if _attached_source is None or _attached_source.handle != handle:
+        if _attached_source is not None:
+            _attached_source.close()
+        _attached_source = SharedImage.attach(handle)
+    return _attached_source
+
+
+def _render_into(stencil_type: str, settings: dict,
+                 source: SharedImageHandle, target: SharedImageHandle,
+                 token_handle: Optional[SharedImageHandle] = None,
+                 roi: Optional[Roi] = None) -> Optional[SharedImageHandle]:
+    """Worker sürecinde çalışır: kaynağı okur, sonucu hedef tampona yazar
+
+    roi verilirse yalnızca o bölge (işlemin gerektirdiği kenar payıyla)
+    işlenir; kırpılmış görüntü kopyalanmadan kaynağın görünümü olarak okunur.
+    """
+    from core.stencil_processors import StencilProcessor
+
+    token = CancellationToken.attach(token_handle) if token_handle is not None else None
+    src = _attach_source(source)
+    dst = SharedImage.attach(target)
+    try:
+        image = src.array
+        inner = None
+        if roi is not None and roi != full_roi(image.shape):
+            margin = StencilProcessor.roi_margin(stencil_type, settings) or 0
+            region = expand_roi(roi, margin, image.shape)
+            image = slice_roi(image, region)
+            inner = (roi[0] - region[0], roi[1] - region[1], roi[2], roi[3])
+
+        result = StencilProcessor.process(
+            stencil_type, image, settings, token,
+            token.report if token is not None else None
+        )
+        if result is None:
+            return None
+        if inner is not None:
+            result = slice_roi(result, inner)
+        if result.shape != dst.array.shape:
+            raise ValueError(f"Beklenmeyen çıktı boyutu: {result.shape} != {dst.array.shape}")
+        np.copyto(dst.array, result, casting='unsafe')
+        return target
+    except RenderCancelled:
+        return None
+    finally:
+        dst.close()
+        if token is not None:
+            token.close()
+
+
+def _warm_up(stencil_type: str, settings: dict,
+             token_handle: Optional[SharedImageHandle] = None) -> bool:
+    """Worker sürecinde çalışır: tipin işlem yolunu ısındırır"""
+    from core.stencil_processors import StencilProcessor
+
+    token = CancellationToken.attach(token_handle) if token_handle is not None else None
+    try:
+        return StencilProcessor.warm_up(stencil_type, settings, token)
+    except RenderCancelled:
+        return False
+    finally:
+        if token is not None:
+            token.close()
+
+
+class RenderJob:
+    """Worker'a gönderilmiş tek bir stencil işlemi"""
+
+    def __init__(self, future: Future, output: SharedImage):
+        self.future = future
+        self.output = output
+
+    def result(self, timeout: Optional[float] = None) -> Optional[SharedImage]:
+        """İşlem bitince çıktı tamponunu döndür (başarısızsa None)"""
+        try:
+            handle = self.future.result(timeout)
+        except FutureTimeoutError:
+            # Henüz bitmedi; tampon worker'a ait olmaya devam ediyor
+            raise
+        except Exception:
+            self.output.close()
+            raise
+        if handle is None:
+            self.output.close()
+            return None
+        return self.output
+
+    def cancel(self) -> bool:
+        cancelled = self.future.cancel()
+        if cancelled:
+            self.output.close()
+        return cancelled
+
+
+class StencilWorkerPool:
+    """CPU ağırlıklı stencil işlemlerini ayrı süreçlerde çalıştıran havuz
+
+    Görüntüler pickle'lanmaz; worker'lar yalnızca paylaşılan bellek
+    tanıtıcılarını alır ve sonucu GUI'nin ayırdığı çıktı tamponuna yazar.
+    """
+
+    def __init__(self, budget: Optional[ComputeBudget] = None):
+        self.budget = budget
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._workers = 0
+        # Isınma thread'i ile render thread'i havuzu aynı anda kurmaya çalışabilir
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                budget = self.budget or ComputeResources.budget()
+                self._workers = budget.process_workers
+                # Windows/exe ile aynı davranış için her platformda spawn
+                self._executor = ProcessPoolExecutor(
+                    max_workers=budget.process_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=ComputeResources.worker_initializer,
+                    initargs=(budget.threads_per_worker,)
+                )
+                logging.info(
+                    f"Worker havuzu başlatıldı: {budget.process_workers} süreç, "
+                    f"süreç başına {budget.threads_per_worker} thread"
+                )
+            return self._executor
+
+    def submit(self, stencil_type: str, settings: dict, source: SharedImage,
+               token: Optional[CancellationToken] = None,
+               roi: Optional[Roi] = None) -> RenderJob:
+        """İşlemi havuza gönder; çıktı tamponu burada ayrılır
+
+        roi: kaynağın işlenecek bölgesi (kırpma), None ise tamamı
+        """
+        if roi is None:
+            roi = full_roi(source.handle.shape)
+        w, h = roi[2], roi[3]
+        output = SharedImage.create((h, w), np.uint8)
+        try:
+            future = self._get_executor().submit(
+                _render_into, stencil_type, dict(settings), source.handle, output.handle,
+                token.handle if token is not None else None, roi
+            )
+        except Exception:
+            output.close()
+            raise
+        return RenderJob(future, output)
+
+    def warm_up(self, stencil_type: str, settings: dict,
+                token: Optional[CancellationToken] = None) -> List[Future]:
+        """Worker'ları başlatıp tipin ilk işlem maliyetini önceden öde
+
+        Her worker için bir ısınma işi gönderilir; iş kuyruğu boş olduğundan
+        her biri genellikle ayrı bir sürece düşer. Henüz başlamamış işler
+        Future.cancel ile, süren iş token ile iptal edilir.
+        """
+        executor = self._get_executor()
+        handle = token.handle if token is not None else None
+        return [
+            executor.submit(_warm_up, stencil_type, dict(settings), handle)
+            for _ in range(self._workers)
+        ]
+
+    def render(self, stencil_type: str, settings: dict, source: SharedImage,
+               token: Optional[CancellationToken] = None,
+               roi: Optional[Roi] = None) -> Optional[SharedImage]:
+        """İşlemi havuzda çalıştır ve sonucu bekle"""
+        try:
+            return self.submit(stencil_type, settings, source, token, roi).result()
+        except BrokenProcessPool as e:
+            logging.error(f"Worker havuzu bozuldu: {str(e)}")
+            # Bozulan havuz bir sonraki çağrıda yeniden kurulsun
+            self.shutdown()
+            return None
+        except Exception as e:
+            logging.error(f"Worker işlem hatası: {str(e)}")
+            logging.debug(traceback.format_exc())
+            return None
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Havuzu kapat; bekleyen işler iptal edilir"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
@@ -1,9 +1,10 @@
 from PyQt6.QtWidgets import (QDialog, QGraphicsScene, QGraphicsView, 
                              QVBoxLayout, QHBoxLayout, QPushButton, QCheckBox,
-                             QGraphicsRectItem, QGraphicsItem)
+                             QGraphicsRectItem, QGraphicsLineItem, QGraphicsItem)
 from PyQt6.QtCore import Qt, QRectF, QPointF
 from PyQt6.QtGui import QPixmap, QPen, QColor, QImage, QBrush, QCursor, QPainter
 import numpy as np
+from widgets import array_to_qimage
 
 class CropGraphicsScene(QGraphicsScene):
     def __init__(self):
@@ -14,13 +15,22 @@ class CropGraphicsScene(QGraphicsScene):
         self.guides_visible = True
         self.aspect_ratio_locked = False
         self.aspect_ratio = 1.0
+        self.guide_lines = []
+
+    def reset(self):
+        """Sahneyi temizle (öğe referansları da sıfırlanır)"""
+        self.clear()
+        self.crop_rect = None
+        self.guide_lines = []
 
     def mousePressEvent(self, event):
         if event.button() == Qt.MouseButton.LeftButton:
             self.start_pos = event.scenePos()
             if not self.crop_rect:
                 self.crop_rect = QGraphicsRectItem()
-                self.crop_rect.setPen(QPen(QColor(255, 255, 255), 2, Qt.PenStyle.DashLine))
+                pen = QPen(QColor(255, 255, 255), 2, Qt.PenStyle.DashLine)
+                pen.setCosmetic(True)
+                self.crop_rect.setPen(pen)
                 self.addItem(self.crop_rect)
             self.is_cropping = True
             self.update_rect(event.scenePos())
@@ -60,31 +70,34 @@ class CropGraphicsScene(QGraphicsScene):
         self.draw_guides()
 
     def draw_guides(self):
-        if not self.guides_visible or not self.crop_rect:
+        if not self.crop_rect:
             return
             
-        # Önceki kılavuzları temizle
-        for item in self.items():
-            if isinstance(item, QGraphicsRectItem) and item != self.crop_rect:
-                self.removeItem(item)
+        # Kılavuz çizgileri bir kez oluşturulur, sonra yerinde güncellenir
+        if not self.guide_lines:
+            pen = QPen(QColor(255, 255, 255, 128), 1, Qt.PenStyle.DashLine)
+            pen.setCosmetic(True)
+            for _ in range(4):
+                line = QGraphicsLineItem()
+                line.setPen(pen)
+                self.addItem(line)
+                self.guide_lines.append(line)
                 
-        # Kılavuz çizgileri çiz
-        rect = self.crop_rect.rect()
-        pen = QPen(QColor(255, 255, 255, 128), 1, Qt.PenStyle.DashLine)
-        
+        for line in self.guide_lines:
+            line.setVisible(self.guides_visible)
+        if not self.guides_visible:
+            return
+            
         # Üçte bir çizgileri
+        rect = self.crop_rect.rect()
         for i in range(1, 3):
             # Dikey çizgiler
             x = rect.x() + (rect.width() * i / 3)
-            line = QGraphicsRectItem(x, rect.y(), 1, rect.height())
-            line.setPen(pen)
-            self.addItem(line)
+            self.guide_lines[i - 1].setLine(x, rect.top(), x, rect.bottom())
             
             # Yatay çizgiler
             y = rect.y() + (rect.height() * i / 3)
-            line = QGraphicsRectItem(rect.x(), y, rect.width(), 1)
-            line.setPen(pen)
-            self.addItem(line)
+            self.guide_lines[i + 1].setLine(rect.left(), y, rect.right(), y)
 
 class CropGraphicsView(QGraphicsView):
     def __init__(self, scene):
@@ -102,6 +115,7 @@ class CropWindow(QDialog):
         super().__init__(parent)
         self.setWindowTitle("Görüntüyü Kırp")
         self.setMinimumSize(800, 600)
+        self.pixmap = None
         self.setup_ui()
 
     def setup_ui(self):
@@ -174,20 +188,20 @@ class CropWindow(QDialog):
         """)
 
     def set_image(self, image):
+        """Görüntüyü göster; büyük fotoğraflar için ekran boyutunda vekil verilmelidir"""
         try:
             if isinstance(image, QImage):
                 pixmap = QPixmap.fromImage(image)
             elif isinstance(image, np.ndarray):
-                height, width = image.shape[:2]
-                bytes_per_line = 3 * width
-                qimage = QImage(image.data, width, height, bytes_per_line, QImage.Format.Format_RGB888)
-                pixmap = QPixmap.fromImage(qimage)
+                # BGR dizi doğrudan sarılır, renk dönüşümü yapılmaz
+                pixmap = QPixmap.fromImage(array_to_qimage(image))
             else:
                 pixmap = QPixmap(image)
                 
-            self.scene.clear()
+            self.pixmap = pixmap
+            self.scene.reset()
             self.scene.addPixmap(pixmap)
-            self.scene.setSceneRect(pixmap.rect())
+            self.scene.setSceneRect(QRectF(pixmap.rect()))
             self.view.fitInView(self.scene.sceneRect(), Qt.AspectRatioMode.KeepAspectRatio)
         except Exception as e:
             print(f"set_image error: {str(e)}")  # Debug
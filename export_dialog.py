@@ -0,0 +1,51 @@
+from PyQt6.QtWidgets import (QDialog, QFormLayout, QComboBox, QSpinBox,
+                             QDialogButtonBox)
+from dataclasses import replace
+
+from core.image_exporter import ExportOptions, ImageExporter
+
+
+class ExportOptionsDialog(QDialog):
+    """zlib kullanan biçimler için sıkıştırma seviyesi, strateji ve PNG filtresi"""
+
+    def __init__(self, options: ExportOptions, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Kayıt Seçenekleri")
+        self.options = options
+        self.setup_ui()
+
+    def setup_ui(self):
+        layout = QFormLayout(self)
+
+        # 0: sıkıştırmasız, 1: en hızlı, 9: en küçük dosya
+        self.level_spin = QSpinBox()
+        self.level_spin.setRange(0, 9)
+        self.level_spin.setValue(self.options.level)
+        layout.addRow("Sıkıştırma Seviyesi", self.level_spin)
+
+        self.strategy_combo = QComboBox()
+        self.strategy_combo.addItems(list(ImageExporter.STRATEGIES))
+        self.strategy_combo.setCurrentText(self.options.strategy)
+        layout.addRow("Strateji", self.strategy_combo)
+
+        # TIFF şeritleri filtresiz yazılır
+        self.filter_combo = QComboBox()
+        self.filter_combo.addItems(list(ImageExporter.PNG_FILTERS))
+        self.filter_combo.setCurrentText(self.options.png_filter)
+        self.filter_combo.setEnabled(self.options.format != "deflate8")
+        layout.addRow("PNG Filtresi", self.filter_combo)
+
+        buttons = QDialogButtonBox(
+            QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel
+        )
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addRow(buttons)
+
+    def selected_options(self) -> ExportOptions:
+        return replace(
+            self.options,
+            level=self.level_spin.value(),
+            strategy=self.strategy_combo.currentText(),
+            png_filter=self.filter_combo.currentText()
+        )
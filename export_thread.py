@@ -0,0 +1,67 @@
+from PyQt6.QtCore import QThread, pyqtSignal
+import logging
+
+from core.cancellation import CancellationToken
+from core.image_exporter import ImageExporter
+
+
+class ExportThread(QThread):
+    """Stencil'i arka planda kodlayıp diske ya da yazıcı komutuna yazan thread"""
+    progress = pyqtSignal(int)
+    completed = pyqtSignal(bool)
+
+    def __init__(self, image, file_name, options, command=None):
+        super().__init__()
+        self.image = image
+        self.file_name = file_name
+        self.options = options
+        # Verilirse raster dosyaya değil bu komutun girişine akar
+        self.command = command
+        self.token = CancellationToken()
+
+    def cancel(self):
+        self.token.cancel()
+
+    def run(self):
+        try:
+            progress = lambda fraction: self.progress.emit(int(fraction * 100))
+            if self.command:
+                logging.info(f"Yazıcıya gönderiliyor: {' '.join(self.command)} ({self.options.format})")
+                ok = ImageExporter.send_to_command(
+                    self.image, self.command, self.options, self.token, progress
+                )
+            else:
+                logging.info(f"Kayıt başladı: {self.file_name} ({self.options.format})")
+                ok = ImageExporter.export(
+                    self.image, self.file_name, self.options, self.token, progress
+                )
+            self.completed.emit(ok and not self.token.cancelled)
+        finally:
+            self.token.close()
+
+
+def export_image(image, file_name, options, parent=None, command=None):
+    """Kaydı (ya da yazıcıya gönderimi) ilerleme penceresiyle başlat"""
+    from PyQt6.QtWidgets import QProgressDialog, QMessageBox
+    from PyQt6.QtCore import Qt
+
+    label = "Yazıcıya gönderiliyor..." if command else "Stencil kaydediliyor..."
+    progress = QProgressDialog(label, "İptal", 0, 100, parent)
+    progress.setWindowModality(Qt.WindowModality.WindowModal)
+    # Kısa kayıtlarda pencere hiç görünmez
+    progress.setMinimumDuration(500)
+
+    thread = ExportThread(image, file_name, options, command)
+
+    def export_finished(success):
+        progress.close()
+        if not success and not thread.token.cancelled:
+            message = "Stencil yazıcıya gönderilemedi" if command else "Stencil kaydedilemedi"
+            QMessageBox.critical(parent, "Hata", f"{message}, ayrıntılar günlükte.")
+
+    thread.progress.connect(progress.setValue)
+    thread.completed.connect(export_finished)
+    progress.canceled.connect(thread.cancel)
+    thread.start()
+
+    return thread
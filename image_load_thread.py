@@ -0,0 +1,36 @@
+from PyQt6.QtCore import QThread, pyqtSignal
+import logging
+import time
+
+from core.image_loader import ImageLoader
+
+
+class ImageLoadThread(QThread):
+    """Görüntüyü arka planda çözen thread
+
+    Büyük JPEG'lerde önce küçültülmüş hali yayınlanır, böylece pencere tam
+    çözünürlüklü çözme bitmeden görüntüyü gösterebilir.
+    """
+    # (generation, önizleme, küçültme oranı)
+    preview_ready = pyqtSignal(int, object, int)
+    # (generation, tam çözünürlüklü görüntü ya da hata durumunda None)
+    image_ready = pyqtSignal(int, object)
+
+    def __init__(self, generation, file_name, parent=None):
+        super().__init__(parent)
+        self.generation = generation
+        self.file_name = file_name
+
+    def _emit_preview(self, preview, reduction):
+        elapsed_ms = (time.perf_counter() - self._start) * 1000
+        logging.debug(f"Önizleme çözüldü: 1/{reduction}, {elapsed_ms:.1f} ms")
+        self.preview_ready.emit(self.generation, preview, reduction)
+
+    def run(self):
+        self._start = time.perf_counter()
+        image = ImageLoader.load(self.file_name, self._emit_preview)
+        elapsed_ms = (time.perf_counter() - self._start) * 1000
+        if image is not None:
+            h, w = image.shape[:2]
+            logging.info(f"Görüntü çözüldü: {w}x{h}, {elapsed_ms:.1f} ms")
+        self.image_ready.emit(self.generation, image)
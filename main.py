@@ -1,10 +1,13 @@
 # ----------------------- PART 1: IMPORTS AND INITIAL SETUP START -----------------------
 import sys
 import os
+import multiprocessing
+from dataclasses import replace
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from PyQt6.QtWidgets import QApplication, QMainWindow, QDockWidget, QMessageBox, QProgressDialog
-from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import (QApplication, QMainWindow, QDockWidget, QMessageBox, QProgressDialog,
+                             QLabel, QProgressBar, QTabWidget)
+from PyQt6.QtCore import Qt, QSettings, QThread, QTimer
 import logging
 import traceback
 import cv2
@@ -12,15 +15,29 @@ import numpy as np
 from model_downloader import download_model  # YENİ: ModelDownloader import
 
 from styles import DarkTheme
-from widgets import ImageCropWidget
+from widgets import ImageCropWidget, PyramidImageView
 from core.state_manager import StateManager
 from core.image_processor import ImageProcessor
 from core.stencil_processors import StencilProcessor
+from core.tiled_image import TiledImageReader
 from core.deep_processor import DeepProcessor
+from core.model_store import ModelStore
+from core.crop_processor import CropProcessor
+from core.packed_mask import PackedMask
+from core.image_exporter import ExportOptions, ImageExporter
+from core.worker_pool import StencilWorkerPool
+from core.compute_resources import ComputeResources
+from core.preview_controller import PreviewScaleController
 from components.tools_panel import StencilTools
 from components.actions_panel import ActionsPanel
 from components.menu_bar import MenuBar
 from crop_window import CropWindow
+from progressive_renderer import ProgressiveRenderThread
+from image_load_thread import ImageLoadThread
+from tiled_render_thread import convert_large_image
+from export_thread import export_image
+from export_dialog import ExportOptionsDialog
+from warm_up_thread import WarmUpThread
 
 def exception_hook(exctype, value, tb):
     logging.error(''.join(traceback.format_exception(exctype, value, tb)))
@@ -37,21 +54,50 @@ class DockPanel(QDockWidget):
        self.setAllowedAreas(Qt.DockWidgetArea.AllDockWidgetAreas)
 
 class StencilCreator(QMainWindow):
+   # Pencere çizildikten sonra ısınmanın başlayacağı süre (ms)
+   WARM_UP_DELAY_MS = 500
+   LAST_TYPE_KEY = "last_stencil_type"
+   
    def __init__(self):
        super().__init__()
        self.state = StateManager()
        self.model_downloaders = []
+       ComputeResources.configure(ComputeResources.INTERACTIVE)
+       self.worker_pool = StencilWorkerPool()
+       self.preview_controller = PreviewScaleController(target_ms=50.0)
+       self.render_generation = 0
+       self.render_thread = None
+       self.render_threads = set()
+       self.load_generation = 0
+       self.load_threads = set()
+       self.load_preview = None
+       self.tiled_threads = set()
+       self.export_threads = set()
+       # Biçim başına son kullanılan kayıt seçenekleri
+       self.export_options = {}
+       # Raster'ı girişinden okuyan yazıcı komutu (ör. "lp -d stencil -o raw")
+       self.printer_command = os.environ.get("STENCIL_PRINTER_COMMAND", "lp -o raw")
+       self.printer_format = "pcl"
+       # Oturumlar arası tercihler (son kullanılan stencil tipi)
+       self.preferences = QSettings("StencilCreator", "StencilCreator")
+       self.warm_up_thread = None
        self.init_ui()
        self.check_models()
+       # Zamanlayıcı olay döngüsünde çalışır: pencere önce gösterilir
+       QTimer.singleShot(self.WARM_UP_DELAY_MS, self.start_warm_up)
        
    def init_ui(self):
        self.setWindowTitle("Stencil Oluşturucu")
        self.setMinimumSize(1200, 800)
        self.setStyleSheet(DarkTheme.MAIN_STYLE)
        
-       # Merkez widget
+       # Merkez widget: sığdırılmış önizleme ve %100 inceleme için yakınlaştırma görünümü
        self.image_display = ImageCropWidget()
-       self.setCentralWidget(self.image_display)
+       self.zoom_view = PyramidImageView()
+       self.view_tabs = QTabWidget()
+       self.view_tabs.addTab(self.image_display, "Önizleme")
+       self.view_tabs.addTab(self.zoom_view, "Yakınlaştır")
+       self.setCentralWidget(self.view_tabs)
        
        # Menü bar
        self.menu_bar = MenuBar(self)
@@ -64,6 +110,9 @@ class StencilCreator(QMainWindow):
        # Panel görünürlük durumlarını menüye ekle
        self.setup_view_toggles()
        
+       # Durum çubuğu
+       self.setup_status_bar()
+       
        logging.info("Program başlatıldı")
        
    def setup_panels(self):
@@ -75,6 +124,7 @@ class StencilCreator(QMainWindow):
         self.tools_panel.settings_changed.connect(self.on_settings_changed)
         # Yeni sinyal bağlantısı
         self.tools_panel.apply_model_settings.connect(self.on_model_settings_applied)
+        self.tools_panel.print_size_changed.connect(self.on_print_size_changed)
         
         # İşlemler paneli
         self.actions_panel = ActionsPanel()
@@ -89,12 +139,25 @@ class StencilCreator(QMainWindow):
             "İşlemler": actions_dock
         }
        
+   def setup_status_bar(self):
+       self.preview_status = QLabel("Önizleme: -")
+       self.statusBar().addPermanentWidget(self.preview_status)
+       
+       self.render_progress = QProgressBar()
+       self.render_progress.setRange(0, 100)
+       self.render_progress.setFixedWidth(160)
+       self.render_progress.hide()
+       self.statusBar().addPermanentWidget(self.render_progress)
+       
    def setup_menu_connections(self):
        self.menu_bar.load_requested.connect(self.load_image)
        self.menu_bar.save_requested.connect(self.save_image)
        self.menu_bar.undo_requested.connect(self.undo)
        self.menu_bar.redo_requested.connect(self.redo)
+       self.menu_bar.undo_crop_requested.connect(self.undo_crop)
        self.menu_bar.download_models_requested.connect(self.download_models)
+       self.menu_bar.large_image_requested.connect(self.convert_large_image)
+       self.menu_bar.print_requested.connect(self.print_stencil)
        
    def setup_action_connections(self):
        self.actions_panel.load_requested.connect(self.load_image)
@@ -111,29 +174,7 @@ class StencilCreator(QMainWindow):
 # ----------------------- PART 3: MODEL AND IMAGE HANDLING METHODS START -----------------------
    def check_models(self):
       """Model dosyalarının varlığını kontrol et"""
-      import sys
-      
-      # Ana dizini belirle (exe veya script konumuna göre)
-      if getattr(sys, 'frozen', False):
-          base_dir = os.path.dirname(sys.executable)
-      else:
-          base_dir = os.path.dirname(os.path.abspath(__file__))
-      
-      # Models klasörü yolu
-      models_dir = os.path.join(base_dir, "models")
-      
-      model_paths = [
-          os.path.join(models_dir, "hed_model.caffemodel"),
-          os.path.join(models_dir, "deploy.prototxt")
-      ]
-      
-      missing_models = False
-      for path in model_paths:
-          if not os.path.exists(path):
-              missing_models = True
-              break
-              
-      if missing_models:
+      if ModelStore.default().missing():
           reply = QMessageBox.question(
               self,
               "Model Dosyaları Eksik",
@@ -145,44 +186,84 @@ class StencilCreator(QMainWindow):
 
    def download_models(self):
       """Derin öğrenme modellerini indir"""
-      # Exe mi yoksa script olarak mı çalışıyor kontrol et
-      import sys
-      
-      # Ana dizini belirle (exe veya script konumuna göre)
-      if getattr(sys, 'frozen', False):
-          base_dir = os.path.dirname(sys.executable)
-      else:
-          base_dir = os.path.dirname(os.path.abspath(__file__))
+      # Depo çalıştırılabilir dosyanın yanındaki models klasöründedir;
+      # indirme tamamlanınca doğrulanıp kurulur
+      store = ModelStore.default()
+      for spec in store.missing():
+          downloader = download_model(spec.urls[0], store.staging_path(spec), self,
+                                      store=store, spec=spec)
+          self.model_downloaders.append(downloader)
+          logging.info(f"İndirme başlatıldı: {spec.name}")
+
+   def convert_large_image(self):
+      """Belleğe sığmayan görüntüyü mevcut ayarlarla doğrudan dosyaya dönüştür"""
+      from PyQt6.QtWidgets import QFileDialog
       
-      # Models klasörünü ana dizinin altında oluştur
-      models_dir = os.path.join(base_dir, "models")
+      input_path, _ = QFileDialog.getOpenFileName(
+          self, "Büyük Görüntü Seç", "",
+          "Sıkıştırmasız görüntüler (*.tif *.tiff *.ppm *.pgm *.npy)"
+      )
+      if not input_path:
+          return
+      output_path, _ = QFileDialog.getSaveFileName(
+          self, "Stencil'i Kaydet", "", "TIFF (*.tif)"
+      )
+      if not output_path:
+          return
+          
+      stencil_type = self.state.state.stencil_type
+      source_shape = None
+      if self.state.print_size is not None:
+          # Dosya baskı boyutuna örneklenmez; milimetreler kendi çözünürlüğünde çevrilir
+          try:
+              with TiledImageReader.open(input_path) as reader:
+                  source_shape = reader.shape
+          except Exception as e:
+              logging.error(f"Büyük görüntü açma hatası: {str(e)}")
+              QMessageBox.warning(self, "Uyarı", f"Görüntü açılamadı: {str(e)}")
+              return
+      settings = self.state.get_processing_settings(source_shape)
+      if StencilProcessor.roi_margin(stencil_type, settings) is None:
+          QMessageBox.warning(
+              self, "Uyarı",
+              f"{stencil_type} tüm görüntüye bağlı çalıştığı için karolu işlenemez. "
+              "Adaptif ya da Karakalem seçin."
+          )
+          return
+      thread = convert_large_image(
+          input_path, output_path, stencil_type, settings, self
+      )
+      self.tiled_threads.add(thread)
+      thread.finished.connect(lambda: self.tiled_threads.discard(thread))
       
-      # Model bilgileri
-      models = [
-          {
-              "name": "HED Model",
-              "url": "https://raw.githubusercontent.com/ashukid/hed-edge-detector/refs/heads/master/hed_pretrained_bsds.caffemodel",
-              "path": os.path.join(models_dir, "hed_model.caffemodel")
-          },
-          {
-              "name": "Proto Dosyası",
-              "url": "https://raw.githubusercontent.com/ashukid/hed-edge-detector/refs/heads/master/deploy.prototxt",
-              "path": os.path.join(models_dir, "deploy.prototxt")
-          }
-      ]
-
-      # Models dizini yoksa oluştur
-      if not os.path.exists(models_dir):
-          os.makedirs(models_dir)
-          logging.info(f"Models dizini oluşturuldu: {models_dir}")
-
-      # Modelleri indir
-      for model in models:
-          if not os.path.exists(model["path"]):
-              downloader = download_model(model["url"], model["path"], self)
-              self.model_downloaders.append(downloader)
-              logging.info(f"İndirme başlatıldı: {model['path']}")
+   def start_warm_up(self):
+      """Son kullanılan tipin işlem yolunu boşta ısındır
 
+      Süren bir render varsa gerek yoktur: worker'lar zaten o işle ısınır.
+      """
+      if self.render_thread is not None or self.warm_up_thread is not None:
+          return
+      stencil_type = self.preferences.value(self.LAST_TYPE_KEY, self.state.state.stencil_type)
+      settings = self.state.state.settings.get(stencil_type)
+      if settings is None:
+          return
+      thread = WarmUpThread(self.worker_pool, stencil_type, settings)
+      thread.finished.connect(lambda: self.on_warm_up_finished(thread))
+      self.warm_up_thread = thread
+      thread.start(QThread.Priority.IdlePriority)
+      logging.info(f"Isınma başlatıldı: {stencil_type}")
+      
+   def cancel_warm_up(self):
+      if self.warm_up_thread is not None:
+          self.warm_up_thread.cancel()
+          
+   def on_warm_up_finished(self, thread):
+      if thread is self.warm_up_thread:
+          self.warm_up_thread = None
+          
+   def remember_stencil_type(self):
+      self.preferences.setValue(self.LAST_TYPE_KEY, self.state.state.stencil_type)
+      
    def is_model_based_type(self, stencil_type):
       """Stencil tipinin model tabanlı olup olmadığını kontrol et"""
       return stencil_type in ["Derin Stencil", "Sanatsal Stencil"]
@@ -191,22 +272,26 @@ class StencilCreator(QMainWindow):
       """Normal stencil ayarları değiştiğinde"""
       if stencil_type not in ["Derin Stencil", "Sanatsal Stencil"]:
           self.state.set_stencil_type(stencil_type)
+          self.remember_stencil_type()
           for key, value in settings.items():
               self.state.update_setting(key, value)
           self.update_stencil()
 
+   def on_print_size_changed(self, print_size):
+      """Baskı boyutu değiştiğinde kaynak bir kez yeniden örneklenir"""
+      if print_size == self.state.print_size:
+          return
+      self.cancel_render()
+      self.render_generation += 1
+      original = self.state.set_print_size(print_size)
+      if original is not None:
+          self.update_display(original)
+      # Yeniden işleme ardından gelen ayar sinyaliyle başlar
+
    def on_model_settings_applied(self, stencil_type, settings):
        """Model tabanlı stencil ayarları onaylandığında"""
-       # Model dosyalarını kontrol et - exe için düzeltilmiş yol
-       import sys
-       if getattr(sys, 'frozen', False):
-           base_dir = os.path.dirname(sys.executable)
-       else:
-           base_dir = os.path.dirname(os.path.abspath(__file__))
-           
-       model_path = os.path.join(base_dir, "models", "hed_model.caffemodel")
-       
-       if not os.path.exists(model_path):
+       # Model dosyalarını kontrol et
+       if ModelStore.default().missing():
            reply = QMessageBox.question(
                self,
                "Model Eksik",
@@ -218,20 +303,90 @@ class StencilCreator(QMainWindow):
            return
                
        self.state.set_stencil_type(stencil_type)
+       self.remember_stencil_type()
        for key, value in settings.items():
            self.state.update_setting(key, value)
        self.update_stencil()
 
    def load_image(self):
-      image = self.show_file_dialog("open")
-      if image is not None:
-          self.state.set_original_image(image)
-          self.update_display(image)
-          self.actions_panel.update_image_dependent_buttons(True)
+      file_name = self.show_file_dialog("open")
+      if file_name:
+          self.start_image_load(file_name)
+          
+   def start_image_load(self, file_name):
+      """Görüntüyü arka planda çöz; büyük JPEG'lerde önce küçük önizleme gelir"""
+      self.cancel_render()
+      self.load_generation += 1
+      self.load_preview = None
+      thread = ImageLoadThread(self.load_generation, file_name)
+      thread.preview_ready.connect(self.on_image_preview_ready)
+      thread.image_ready.connect(self.on_image_loaded)
+      thread.finished.connect(lambda: self.load_threads.discard(thread))
+      self.load_threads.add(thread)
+      self.actions_panel.update_image_dependent_buttons(False)
+      self.statusBar().showMessage("Görüntü yükleniyor...")
+      thread.start()
+      
+   def on_image_preview_ready(self, generation, preview, reduction):
+      if generation == self.load_generation:
+          self.load_preview = (1.0 / reduction, preview)
+          self.update_display(preview, full_resolution=False)
+          
+   def on_image_loaded(self, generation, image):
+      if generation != self.load_generation:
+          return
+      self.statusBar().clearMessage()
+      preview, self.load_preview = self.load_preview, None
+      if image is None:
+          logging.error("Görüntü yüklenemedi")
+          self.actions_panel.update_image_dependent_buttons(self.state.state.original_image is not None)
+          return
+      self.state.set_original_image(image)
+      if preview is not None:
+          self.state.seed_preview(*preview)
+      self.update_display(self.state.state.original_image)
+      self.actions_panel.update_image_dependent_buttons(True)
           
+   def print_stencil(self):
+      """Stencil'i 1 bitlik raster olarak yazıcı komutuna akıt"""
+      from PyQt6.QtWidgets import QInputDialog
+      import shlex
+      
+      if self.state.state.processed_image is None:
+          return
+      formats = {"PCL Raster": "pcl", "PBM Raster": "pbm"}
+      names = list(formats)
+      current = names[list(formats.values()).index(self.printer_format)]
+      name, ok = QInputDialog.getItem(
+          self, "Yazıcıya Gönder", "Raster biçimi:", names, names.index(current), False
+      )
+      if not ok:
+          return
+      command, ok = QInputDialog.getText(
+          self, "Yazıcıya Gönder", "Raster'ı girişinden okuyan komut:", text=self.printer_command
+      )
+      if not ok or not command.strip():
+          return
+      self.printer_format = formats[name]
+      self.printer_command = command.strip()
+      
+      options = ExportOptions(self.printer_format, dpi=self.export_dpi())
+      mask = self.state.state.processed_mask
+      image = mask if mask is not None else self.state.state.processed_image
+      thread = export_image(image, None, options, self, shlex.split(self.printer_command))
+      self.export_threads.add(thread)
+      thread.finished.connect(lambda: self.export_threads.discard(thread))
+      
+   def export_dpi(self):
+      """Raster çıktıda bildirilecek çözünürlük: baskı kipindeyse onun DPI'ı"""
+      print_size = self.state.print_size
+      return print_size.dpi if print_size is not None else ExportOptions.dpi
+      
    def save_image(self):
       if self.state.state.processed_image is not None:
-          self.show_file_dialog("save", self.state.state.processed_image)
+          # İkili sonuçlar paketli maskeden 1 bit olarak kaydedilir
+          mask = self.state.state.processed_mask
+          self.show_file_dialog("save", mask if mask is not None else self.state.state.processed_image)
 # ----------------------- PART 3: MODEL AND IMAGE HANDLING METHODS END -----------------------
 # ----------------------- PART 4: IMAGE PROCESSING METHODS START -----------------------
    def crop_image(self):
@@ -246,28 +401,52 @@ class StencilCreator(QMainWindow):
            h, w = self.state.state.original_image.shape[:2]
            print(f"Görüntü boyutu: {w}x{h}")  # Debug
 
-           rgb_image = cv2.cvtColor(self.state.state.original_image, cv2.COLOR_BGR2RGB)
-           print("Görüntü RGB'ye dönüştürüldü")  # Debug
+           # Tam çözünürlük yerine ekran boyutunda vekil göster
+           proxy = self.create_crop_proxy(self.state.state.original_image)
+           print(f"Kırpma vekili: {proxy.shape[1]}x{proxy.shape[0]}")  # Debug
            
-           dialog.set_image(rgb_image)
+           dialog.set_image(proxy)
            print("Görüntü pencereye yüklendi")  # Debug
            
            if dialog.exec() == dialog.DialogCode.Accepted:
                print("Kırpma onaylandı")  # Debug
                rect = dialog.get_crop_rect()
                if rect:
-                   x, y = int(rect.x()), int(rect.y())
-                   w, h = int(rect.width()), int(rect.height())
-                   cropped = self.state.state.original_image[y:y+h, x:x+w]
-                   self.state.set_original_image(cropped)
-                   self.update_display(cropped)
-                   print(f"Kırpma tamamlandı: {w}x{h}")  # Debug
+                   # Vekil üzerindeki seçimi tam çözünürlüğe taşı
+                   roi = CropProcessor.crop_roi(
+                       self.state.state.original_image, rect, dialog.pixmap
+                   )
+                   # Kırpılan görüntü kaynağın kopyasız görünümüdür
+                   cropped = self.state.crop(roi) if roi is not None else None
+                   if cropped is not None:
+                       # Kuyruktaki eski bölge geçişleri artık geçersiz
+                       self.cancel_render()
+                       self.render_generation += 1
+                       self.update_display(cropped)
+                       print(f"Kırpma tamamlandı: {cropped.shape[1]}x{cropped.shape[0]}")  # Debug
 
        except Exception as e:
            print(f"Kırpma hatası: {str(e)}")  # Debug
            logging.error(f"Kırpma hatası: {str(e)}")
            traceback.print_exc()
            
+   def undo_crop(self):
+       original = self.state.undo_crop()
+       if original is not None:
+           self.cancel_render()
+           self.render_generation += 1
+           self.update_display(original)
+           
+   def create_crop_proxy(self, image):
+       """Kırpma penceresi için ekrana sığacak kadar küçültülmüş kopya"""
+       screen = self.screen().availableGeometry()
+       h, w = image.shape[:2]
+       scale = min(1.0, screen.width() / w, screen.height() / h)
+       if scale >= 1.0:
+           return image
+       size = (max(1, int(w * scale)), max(1, int(h * scale)))
+       return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+           
    def convert_to_stencil(self):
        print("\n--- STENCIL DÖNÜŞTÜRME BAŞLADI ---")  # Debug
        if self.state.state.original_image is None:
@@ -275,60 +454,107 @@ class StencilCreator(QMainWindow):
            return
            
        stencil_type = self.state.state.stencil_type
-       settings = self.state.get_current_settings()
+       # Baskı kipinde milimetre ayarları baskı çözünürlüğünde piksele çevrilir
+       settings = self.state.get_processing_settings()
        
        print(f"İşlem tipi: {stencil_type}")  # Debug
        print(f"Ayarlar: {settings}")  # Debug
        print(f"Orijinal görüntü boyutu: {self.state.state.original_image.shape}")  # Debug
 
-       result = None
-       
        try:
-           if stencil_type == "Temel":
-               result = StencilProcessor.basic_stencil(
-                   self.state.state.original_image,
-                   settings
-               )
-           elif stencil_type == "Adaptif":
-               result = StencilProcessor.adaptive_stencil(
-                   self.state.state.original_image,
-                   settings
-               )
-           elif stencil_type == "Karakalem":
-               result = StencilProcessor.sketch_stencil(
-                   self.state.state.original_image,
-                   settings
-               )
-           elif stencil_type == "Derin Stencil":
-               result = StencilProcessor.deep_stencil(
-                   self.state.state.original_image,
-                   settings
-               )
-           elif stencil_type == "Sanatsal Stencil":
-               result = StencilProcessor.artistic_stencil(
-                   self.state.state.original_image,
-                   settings
-               )
+           # Aynı bölge ya da onu kapsayan bir bölge için sonuç zaten varsa
+           cached = self.state.cached_result(stencil_type, settings)
+           if cached is not None:
+               self.cancel_render()
+               self.render_generation += 1
+               self.state.set_processed_image(cached)
+               self.update_display(self.state.state.processed_image)
+               self.update_undo_redo_state()
+               self.preview_status.setText("Önizleme: önbellek")
+               print("--- STENCIL ÖNBELLEKTEN ALINDI ---\n")  # Debug
+               return
+               
+           # İlk geçiş gecikme bütçesine sığan ölçekte, en fazla 1/8
+           first_scale = min(0.125, self.preview_controller.choose_scale(
+               stencil_type, self.state.state.original_image.shape
+           ))
+           passes = [first_scale] + [s for s in (0.25, 0.5) if s > first_scale] + [1.0]
+           
+           # Eski geçişler artık geçersiz; ısınma worker'ı render'la paylaşmasın
+           self.cancel_render()
+           self.cancel_warm_up()
+           self.render_generation += 1
            
-           if result is not None:
-               print("İşlem başarılı, görüntü güncelleniyor...")  # Debug
-               self.state.set_processed_image(result)
-               self.update_display(result)
-               print("Görüntü güncellendi")  # Debug
-           else:
-               print("HATA: İşlem başarısız oldu")  # Debug
+           thread = ProgressiveRenderThread(
+               self.render_generation, stencil_type, settings, passes,
+               self.state.preview_source(), self.worker_pool,
+               self.state.shared_original, self.state.current_roi
+           )
+           thread.pass_ready.connect(self.on_render_pass_ready)
+           thread.progress_changed.connect(self.on_render_progress)
+           thread.finished.connect(lambda: self.on_render_thread_finished(thread))
+           self.render_threads.add(thread)
+           self.render_thread = thread
+           self.render_progress.setValue(0)
+           self.render_progress.show()
+           thread.start()
+           print(f"Kademeli işlem başlatıldı: {passes}")  # Debug
 
        except Exception as e:
            print(f"Stencil dönüştürme hatası: {str(e)}")  # Debug
            logging.error(f"Stencil dönüştürme hatası: {str(e)}")
            traceback.print_exc()
            
-       print("--- STENCIL DÖNÜŞTÜRME TAMAMLANDI ---\n")  # Debug
+   def cancel_render(self):
+       if self.render_thread is not None:
+           self.render_thread.cancel()
+           self.render_thread = None
+           self.render_progress.hide()
+           
+   def on_render_thread_finished(self, thread):
+       self.render_threads.discard(thread)
+       if thread is self.render_thread:
+           self.render_thread = None
+           self.render_progress.hide()
+           
+   def on_render_progress(self, generation, fraction):
+       if generation == self.render_generation:
+           self.render_progress.setValue(int(fraction * 100))
+           
+   def on_render_pass_ready(self, generation, result, scale, elapsed_ms):
+       """Bir işlem geçişi tamamlandığında"""
+       full_resolution = scale >= 1.0
+       if generation != self.render_generation:
+           # Yerini yenisine bırakmış işlem
+           if full_resolution:
+               result.close()
+           return
+           
+       stencil_type = self.state.state.stencil_type
+       if full_resolution:
+           self.state.set_processed_image(result.array)
+           result.close()
+           result = self.state.state.processed_image
+           self.state.store_result(stencil_type, self.state.get_processing_settings(), result)
+           self.render_progress.hide()
+           self.update_undo_redo_state()
+           print("--- STENCIL DÖNÜŞTÜRME TAMAMLANDI ---\n")  # Debug
+       else:
+           # Yalnızca önizleme geçişleri ölçülür: tam geçiş worker'da çalışır,
+           # süresine IPC ve ilk çağrıda süreç başlatma da girer
+           h, w = result.shape[:2]
+           self.preview_controller.record(stencil_type, h * w, elapsed_ms)
+           
+       self.update_display(result, full_resolution)
+       self.update_preview_status(scale, elapsed_ms)
 # ----------------------- PART 4: IMAGE PROCESSING METHODS END -----------------------
 # ----------------------- PART 5: UTILITY METHODS AND MAIN START -----------------------
    def update_stencil(self):
       if self.state.state.original_image is not None:
           self.convert_to_stencil()
+      
+   def update_preview_status(self, scale, elapsed_ms):
+      self.preview_status.setText(f"Önizleme: %{scale * 100:.0f} ({elapsed_ms:.0f} ms)")
           
    def undo(self):
       result = self.state.undo()
@@ -342,8 +568,26 @@ class StencilCreator(QMainWindow):
           self.update_display(result)
       self.update_undo_redo_state()
           
-   def update_display(self, image):
+   def closeEvent(self, event):
+       self.cancel_render()
+       self.cancel_warm_up()
+       if self.warm_up_thread is not None:
+           self.warm_up_thread.wait()
+       self.worker_pool.shutdown(wait=True)
+       for thread in list(self.tiled_threads):
+           thread.cancel()
+       # Süren kayıtlar yarıda kesilmez, tamamlanması beklenir
+       for thread in (list(self.render_threads) + list(self.load_threads) +
+                      list(self.tiled_threads) + list(self.export_threads)):
+           thread.wait()
+       self.state.release_shared_original()
+       super().closeEvent(event)
+          
+   def update_display(self, image, full_resolution=True):
       self.image_display.display_image(image)
+      # Yakınlaştırma görünümü yalnızca tam çözünürlüklü sonuçları gösterir
+      if full_resolution:
+          self.zoom_view.set_image(image)
       
    def update_undo_redo_state(self):
       can_undo = self.state.can_undo()
@@ -353,26 +597,41 @@ class StencilCreator(QMainWindow):
       
    def show_file_dialog(self, dialog_type, image=None):
       from PyQt6.QtWidgets import QFileDialog
-      import cv2
-      import numpy as np
       
       try:
           if dialog_type == "open":
               file_name, _ = QFileDialog.getOpenFileName(
                   self, "Resim Seç", "", "Images (*.png *.jpg *.jpeg)"
               )
-              if file_name:
-                  with open(file_name, 'rb') as f:
-                      file_bytes = np.asarray(bytearray(f.read()), dtype=np.uint8)
-                      return cv2.imdecode(file_bytes, cv2.IMREAD_COLOR)
+              # Çözme arka planda yapılır, burada yalnızca dosya adı döner
+              return file_name or None
                       
           elif dialog_type == "save" and image is not None:
-              file_name, _ = QFileDialog.getSaveFileName(
-                  self, "Stencil'i Kaydet", "", "Images (*.png)"
+              filters = [name for name, _, _ in ImageExporter.FORMATS.values()]
+              if not isinstance(image, PackedMask):
+                  # Gri tonlu sonuçta varsayılan 8 bit; 1 bit seçilirse eşiklenir
+                  filters.insert(0, filters.pop(filters.index(ImageExporter.FORMATS["png8"][0])))
+              file_name, selected_filter = QFileDialog.getSaveFileName(
+                  self, "Stencil'i Kaydet", "", ";;".join(filters)
               )
               if file_name:
-                  _, buf = cv2.imencode('.png', image)
-                  buf.tofile(file_name)
+                  export_format = ImageExporter.format_for_filter(selected_filter)
+                  options = self.export_options.get(export_format) or ExportOptions(
+                      export_format, level=1 if export_format == "deflate8" else 6
+                  )
+                  options = replace(options, dpi=self.export_dpi())
+                  if export_format in ImageExporter.COMPRESSED_FORMATS:
+                      dialog = ExportOptionsDialog(options, self)
+                      if not dialog.exec():
+                          return None
+                      options = dialog.selected_options()
+                  self.export_options[export_format] = options
+                  # Kodlama arka planda yapılır, arayüz donmaz
+                  thread = export_image(
+                      image, ImageExporter.with_extension(file_name, export_format), options, self
+                  )
+                  self.export_threads.add(thread)
+                  thread.finished.connect(lambda: self.export_threads.discard(thread))
                   
       except Exception as e:
           logging.error(f"Dosya işlemi hatası: {str(e)}")
@@ -380,6 +639,7 @@ class StencilCreator(QMainWindow):
       return None
 
 if __name__ == '__main__':
+  multiprocessing.freeze_support()
   app = QApplication(sys.argv)
   window = StencilCreator()
   window.show()
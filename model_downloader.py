@@ -1,9 +1,13 @@
 from PyQt6.QtCore import QThread, pyqtSignal
-import urllib.request
+import urllib.error
 import os
 import logging
+import threading
 import traceback
 
+from core.cancellation import CancellationToken, RenderCancelled
+from core.resumable_download import DownloadError, ResumableDownload
+
 # Loglama ayarlarını yapılandır
 logging.basicConfig(
     filename='model_download.log',
@@ -12,14 +16,56 @@ logging.basicConfig(
 )
 
 class ModelDownloaderThread(QThread):
-    """Model indirme işlemini arka planda yapan thread"""
+    """Model indirme işlemini arka planda yapan thread
+
+    İndirme save_path + '.part' dosyasına yazılır ve hata ya da iptalde
+    silinmez; aynı dosya yeniden istendiğinde HTTP Range ile kaldığı
+    yerden sürer. Aynı anda en çok MAX_CONCURRENT model iner, diğerleri
+    sırada bekler. Kaynak başarısız olursa tanımdaki diğer adresler denenir.
+    """
     progress = pyqtSignal(int)
     finished = pyqtSignal(bool, str)
 
-    def __init__(self, url, save_path):
+    # Aynı anda inen model sayısı; her indirme kendi içinde CONNECTIONS bağlantı açar
+    MAX_CONCURRENT = 2
+    CONNECTIONS = 4
+    _slots = threading.BoundedSemaphore(MAX_CONCURRENT)
+
+    def __init__(self, url, save_path, store=None, spec=None):
         super().__init__()
         self.url = url
         self.save_path = save_path
+        # Verilirse tamamlanan dosya model deposuna doğrulanarak kurulur
+        self.store = store
+        self.spec = spec
+        self.urls = [url] + [u for u in (spec.urls if spec else ()) if u != url]
+        self.token = CancellationToken()
+        self.cancelled = False
+
+    def cancel(self):
+        self.token.cancel()
+
+    def _emit_progress(self, fraction):
+        percent = int(fraction * 100)
+        if percent != self._percent:
+            self._percent = percent
+            self.progress.emit(percent)
+
+    def _download(self):
+        """Adresleri sırayla dene; ilk tamamlanan indirmenin adresi döner"""
+        errors = []
+        for url in self.urls:
+            self._percent = -1
+            try:
+                ResumableDownload(
+                    url, self.save_path, self.CONNECTIONS, self.token, self._emit_progress
+                ).run()
+                return url
+            except (DownloadError, urllib.error.URLError, OSError) as e:
+                logging.warning(f"İndirme başarısız ({url}): {str(e)}")
+                logging.debug(traceback.format_exc())
+                errors.append(str(e))
+        raise DownloadError("; ".join(errors))
 
     def run(self):
         try:
@@ -30,55 +76,31 @@ class ModelDownloaderThread(QThread):
                 os.makedirs(os.path.dirname(self.save_path))
                 logging.info(f"Klasör oluşturuldu: {os.path.dirname(self.save_path)}")
 
-            # URL'yi açmaya çalışmadan önce bağlantıyı test et
-            request = urllib.request.Request(
-                self.url,
-                headers={
-                    'User-Agent': 'Mozilla/5.0',
-                    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8'
-                }
-            )
-            
-            logging.info("İndirme başlıyor...")
-            with urllib.request.urlopen(request, timeout=60) as response:  # Timeout süresini artırdık
-                # Dosyayı doğrudan kaydet
-                with open(self.save_path + '.tmp', 'wb') as out_file:  # Geçici dosya kullan
-                    total_size = int(response.headers.get('content-length', 0))
-                    logging.info(f"Toplam dosya boyutu: {total_size} bytes")
-                    
-                    block_size = 8192
-                    count = 0
-                    downloaded = 0
-                    
-                    while True:
-                        data = response.read(block_size)
-                        if not data:
-                            break
-                        out_file.write(data)
-                        downloaded += len(data)
-                        if total_size > 0:
-                            percent = int(downloaded * 100 / total_size)
-                            self.progress.emit(percent)
-                
-                # İndirme başarılı olduysa geçici dosyayı taşı
-                if os.path.exists(self.save_path + '.tmp'):
-                    os.replace(self.save_path + '.tmp', self.save_path)
-                    file_size = os.path.getsize(self.save_path)
-                    logging.info(f"Dosya başarıyla kaydedildi. Boyut: {file_size} bytes")
-                else:
-                    logging.error("Dosya kaydedilemedi!")
-                    raise Exception("Dosya indirilemedi")
+            # Sıra beklerken de iptal edilebilir
+            while not self._slots.acquire(timeout=0.1):
+                self.token.raise_if_cancelled()
+            try:
+                url = self._download()
+            finally:
+                self._slots.release()
+            logging.info(f"Dosya başarıyla kaydedildi. Boyut: {os.path.getsize(self.save_path)} bytes")
 
+            if self.store is not None:
+                self.store.install(self.spec, self.save_path, url)
             self.finished.emit(True, "")
-            
+
+        except RenderCancelled:
+            self.cancelled = True
+            logging.info(f"İndirme iptal edildi, yarım dosya korunuyor: {self.save_path}")
+            self.finished.emit(False, "İndirme iptal edildi")
         except Exception as e:
             error_msg = f"Model indirme hatası: {str(e)}\n{traceback.format_exc()}"
             logging.error(error_msg)
-            if os.path.exists(self.save_path + '.tmp'):
-                os.remove(self.save_path + '.tmp')
             self.finished.emit(False, str(e))
+        finally:
+            self.token.close()
 
-def download_model(url, save_path, parent=None):
+def download_model(url, save_path, parent=None, store=None, spec=None):
     """Model indirme işlemini başlat"""
     from PyQt6.QtWidgets import QProgressDialog, QMessageBox
     from PyQt6.QtCore import Qt
@@ -86,7 +108,7 @@ def download_model(url, save_path, parent=None):
     progress = QProgressDialog("Model indiriliyor...", "İptal", 0, 100, parent)
     progress.setWindowModality(Qt.WindowModality.WindowModal)
     
-    downloader = ModelDownloaderThread(url, save_path)
+    downloader = ModelDownloaderThread(url, save_path, store, spec)
     
     def update_progress(percent):
         progress.setValue(percent)
@@ -95,11 +117,14 @@ def download_model(url, save_path, parent=None):
         progress.close()
         if success:
             QMessageBox.information(parent, "Başarılı", "Model başarıyla indirildi.")
+        elif downloader.cancelled:
+            QMessageBox.information(parent, "İptal", "İndirme iptal edildi; yeniden başlatıldığında kaldığı yerden sürecek.")
         else:
             QMessageBox.critical(parent, "Hata", f"Model indirilirken hata oluştu: {error}")
     
     downloader.progress.connect(update_progress)
     downloader.finished.connect(download_finished)
+    progress.canceled.connect(downloader.cancel)
     downloader.start()
     
-    return downloader
\ No newline at end of file
+    return downloader
@@ -0,0 +1,210 @@
+"""Model indirmelerini denemek için hata enjekte eden yerel HTTP sunucusu
+
+Bir klasördeki dosyaları HTTP Range desteğiyle sunar; istenirse yanıtları
+rastgele bir noktada keser, 503 döndürür, aralık isteklerini yok sayar ya
+da hızı sınırlar. İndirmenin kaldığı yerden sürmesi ve yeniden denemeler
+bu sunucuya karşı gerçek ağ olmadan sınanır.
+
+Örnek:
+    python model_server_stub.py models_kaynak --port 8765 --cut-rate 0.3 --rate 2048
+    python model_server_stub.py models_kaynak --check hed_model.caffemodel --cut-rate 0.5
+"""
+import argparse
+import hashlib
+import http.server
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+
+BLOCK_SIZE = 64 * 1024
+RANGE = re.compile(r'bytes=(\d*)-(\d*)$')
+
+
+class FaultyHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.stats["requests"] += 1
+            fail = server.random.random() < server.error_rate
+            cut = server.random.random() < server.cut_rate
+            cut_fraction = server.random.random()
+        if server.latency:
+            time.sleep(server.latency)
+
+        path = os.path.join(server.directory, os.path.basename(self.path.split('?')[0]))
+        if fail:
+            server.count("errors")
+            self.send_error(503, "Enjekte edilen hata")
+            return
+        if not os.path.isfile(path):
+            self.send_error(404)
+            return
+
+        size = os.path.getsize(path)
+        start, end = 0, size
+        match = RANGE.match(self.headers.get('Range') or '')
+        partial = match is not None and not server.ignore_range and size > 0
+        if partial:
+            first, last = match.groups()
+            if first:
+                start = int(first)
+                end = min(size, int(last) + 1) if last else size
+            else:
+                start = max(0, size - int(last))
+            if start >= size or start >= end:
+                self.send_response(416)
+                self.send_header('Content-Range', f"bytes */{size}")
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+
+        self.send_response(206 if partial else 200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(end - start))
+        self.send_header('ETag', f'"{size:x}-{int(os.path.getmtime(path)):x}"')
+        if not server.ignore_range:
+            self.send_header('Accept-Ranges', 'bytes')
+        if partial:
+            self.send_header('Content-Range', f"bytes {start}-{end - 1}/{size}")
+        self.end_headers()
+
+        # Kesilecekse yanıtın rastgele bir noktasında bağlantı kapanır
+        limit = start + int((end - start) * cut_fraction) if cut and end - start > 1 else end
+        with open(path, 'rb') as file:
+            file.seek(start)
+            position = start
+            while position < limit:
+                data = file.read(min(BLOCK_SIZE, limit - position))
+                if not data:
+                    break
+                try:
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    return
+                position += len(data)
+                server.count("bytes", len(data))
+                if server.rate:
+                    time.sleep(len(data) / server.rate)
+        if limit < end:
+            server.count("cuts")
+            self.close_connection = True
+
+
+class FaultyFileServer(http.server.ThreadingHTTPServer):
+    """Hata oranları ayarlanabilen dosya sunucusu; testlerde thread'de çalıştırılabilir"""
+    daemon_threads = True
+
+    def __init__(self, directory, port=0, cut_rate=0.0, error_rate=0.0, ignore_range=False,
+                 rate_kbps=0.0, latency_ms=0.0, seed=None, verbose=False):
+        super().__init__(('127.0.0.1', port), FaultyHandler)
+        self.directory = directory
+        self.cut_rate = cut_rate
+        self.error_rate = error_rate
+        self.ignore_range = ignore_range
+        self.rate = rate_kbps * 1024
+        self.latency = latency_ms / 1000.0
+        self.random = random.Random(seed)
+        self.verbose = verbose
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "errors": 0, "cuts": 0, "bytes": 0}
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def count(self, key, amount=1):
+        with self.lock:
+            self.stats[key] += amount
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+def check(server, name, connections, interrupt_after):
+    """Dosyayı sunucudan ResumableDownload ile indir ve içeriği doğrula
+
+    interrupt_after > 0 ise ilk deneme o kadar bayttan sonra iptal edilir;
+    ikinci çalıştırma kaldığı yerden sürmelidir.
+    """
+    from core.cancellation import CancellationToken, RenderCancelled
+    from core.resumable_download import ResumableDownload
+
+    source = os.path.join(server.directory, name)
+    with open(source, 'rb') as file:
+        expected = hashlib.sha256(file.read()).hexdigest()
+    target = os.path.join(tempfile.mkdtemp(), name)
+    url = f"{server.base_url}/{name}"
+    size = os.path.getsize(source)
+
+    if interrupt_after:
+        token = CancellationToken()
+        progress = lambda fraction: token.cancel() if fraction * size >= interrupt_after else None
+        try:
+            ResumableDownload(url, target, connections, token, progress).run()
+        except RenderCancelled:
+            print(f"ilk deneme {interrupt_after} bayttan sonra iptal edildi", file=sys.stderr)
+        finally:
+            token.close()
+
+    start = time.perf_counter()
+    download = ResumableDownload(url, target, connections)
+    download.run()
+    elapsed = time.perf_counter() - start
+    with open(target, 'rb') as file:
+        ok = hashlib.sha256(file.read()).hexdigest() == expected
+    print(f"{name}: {size} bayt, {elapsed:.2f} sn, {len(download.ranges)} bağlantı, "
+          f"devralınan {download.resumed_bytes} bayt, {download.retries} yeniden deneme, "
+          f"SHA-256 {'tutuyor' if ok else 'TUTMUYOR'}; sunucu {server.stats}", file=sys.stderr)
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hata enjekte eden yerel model sunucusu")
+    parser.add_argument('directory', help="Sunulacak dosyaların klasörü")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--cut-rate', type=float, default=0.0,
+                        help="Yanıtın yarıda kesilme olasılığı")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="503 döndürme olasılığı")
+    parser.add_argument('--no-range', action='store_true', help="Range başlığını yok say")
+    parser.add_argument('--rate', type=float, default=0.0, help="Bağlantı başına hız (KB/sn)")
+    parser.add_argument('--latency', type=float, default=0.0, help="İstek başına gecikme (ms)")
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--check', metavar='DOSYA',
+                        help="Sunucuyu başlat, dosyayı indirip doğrula ve çık")
+    parser.add_argument('--connections', type=int, default=4)
+    parser.add_argument('--interrupt-after', type=int, default=0,
+                        help="--check: ilk denemeyi bu kadar bayttan sonra iptal et")
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    server = FaultyFileServer(
+        args.directory, 0 if args.check else args.port, args.cut_rate, args.error_rate,
+        args.no_range, args.rate, args.latency, args.seed, args.verbose
+    )
+    if args.check:
+        server.start()
+        ok = check(server, args.check, args.connections, args.interrupt_after)
+        server.shutdown()
+        sys.exit(0 if ok else 1)
+
+    print(f"{server.base_url} üzerinden {args.directory} sunuluyor", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(f"İstatistik: {server.stats}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+from PyQt6.QtCore import QThread, pyqtSignal
+from concurrent.futures import TimeoutError as FutureTimeoutError
+import logging
+import time
+import traceback
+
+from core.cancellation import CancellationToken, RenderCancelled, sub_progress
+from core.stencil_processors import StencilProcessor
+
+
+class ProgressiveRenderThread(QThread):
+    """Stencil'i kabadan inceye birkaç geçişte işleyen thread
+
+    Her geçiş biter bitmez yayınlanır; yeni ayar geldiğinde eski thread
+    iptal edilir ve kalan geçişleri çalıştırılmaz.
+    """
+    # (generation, sonuç, ölçek, süre_ms); tam çözünürlükte sonuç SharedImage'dır
+    pass_ready = pyqtSignal(int, object, float, float)
+    # (generation, 0-1 arası toplam ilerleme)
+    progress_changed = pyqtSignal(int, float)
+    
+    # Worker ilerlemesinin okunma aralığı (sn)
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, generation, stencil_type, settings, passes,
+                 preview_source, worker_pool, shared_original, roi=None, parent=None):
+        super().__init__(parent)
+        self.generation = generation
+        self.stencil_type = stencil_type
+        self.settings = dict(settings)
+        self.passes = passes
+        self.preview_source = preview_source
+        self.worker_pool = worker_pool
+        self.shared_original = shared_original
+        # Kırpma bölgesi: tam geçiş kaynağın yalnızca bu kısmını işler
+        self.roi = roi
+        # Worker süreci de aynı bayrağı gördüğü için iptal işlemin içine kadar ulaşır
+        self.token = CancellationToken()
+        
+        # Geçişlerin toplam ilerlemedeki payı piksel sayısıyla orantılı
+        weights = [scale * scale for scale in passes]
+        total = sum(weights)
+        self._pass_ranges = []
+        start = 0.0
+        for weight in weights:
+            self._pass_ranges.append((start, start + weight / total))
+            start += weight / total
+
+    def cancel(self):
+        self.token.cancel()
+
+    def is_cancelled(self):
+        return self.token.cancelled
+
+    def _emit_progress(self, fraction):
+        self.progress_changed.emit(self.generation, fraction)
+
+    def _render_full(self, progress):
+        """Tam çözünürlüklü geçişi worker'da çalıştır, ilerlemeyi izle"""
+        job = self.worker_pool.submit(
+            self.stencil_type, self.settings, self.shared_original, self.token, self.roi
+        )
+        while True:
+            try:
+                return job.result(timeout=self.POLL_INTERVAL)
+            except FutureTimeoutError:
+                if self.token.cancelled and job.cancel():
+                    return None
+                progress(self.token.progress)
+
+    def run(self):
+        try:
+            for scale, (start_fraction, end_fraction) in zip(self.passes, self._pass_ranges):
+                if self.token.cancelled:
+                    logging.debug(f"İşlem iptal edildi (nesil {self.generation})")
+                    return
+
+                progress = sub_progress(self._emit_progress, start_fraction, end_fraction)
+                start = time.perf_counter()
+                if scale >= 1.0:
+                    result = self._render_full(progress)
+                else:
+                    image = self.preview_source(scale)
+                    # Çekirdekler önizlemeyle birlikte küçülmezse kaba geçiş fazla bulanık/kalın çıkar
+                    settings = StencilProcessor.scaled_settings(self.settings, scale)
+                    result = StencilProcessor.process(
+                        self.stencil_type, image, settings, self.token, progress
+                    )
+                elapsed_ms = (time.perf_counter() - start) * 1000
+
+                if self.token.cancelled:
+                    if result is not None and scale >= 1.0:
+                        result.close()
+                    return
+                if result is None:
+                    logging.error(f"Geçiş başarısız: %{scale * 100:.0f}")
+                    return
+                self.pass_ready.emit(self.generation, result, scale, elapsed_ms)
+
+        except RenderCancelled:
+            logging.debug(f"İşlem iptal edildi (nesil {self.generation})")
+        except Exception as e:
+            logging.error(f"Kademeli işlem hatası: {str(e)}")
+            logging.debug(traceback.format_exc())
+        finally:
+            self.token.close()
@@ -0,0 +1,132 @@
+"""Termal stencil yazıcısı yerine geçen yerel alıcı
+
+Standart girişten PBM (P4) ya da PCL raster akışını okur, satırları
+sayar ve ilk bayta kadar geçen süreyi, toplam süreyi ve bellek
+kullanımını raporlar. Akış bütünüyle belleğe alınmaz.
+
+Örnek:
+    python raster_printer_stub.py --output basilan.pbm --line-delay 0.1
+"""
+import argparse
+import re
+import sys
+import time
+
+READ_SIZE = 64 * 1024
+PCL_ROW = re.compile(rb'\x1b\*b(\d+)W')
+PCL_SIZE = re.compile(rb'\x1b\*r(\d+)([ST])')
+
+
+class RasterSink:
+    """Gelen raster'ı satır satır ayrıştırır; istenirse PBM olarak yazar"""
+
+    def __init__(self, output=None, line_delay_ms=0.0):
+        self.output = output
+        self.line_delay = line_delay_ms / 1000.0
+        self.kind = None
+        self.width = self.height = None
+        self.row_bytes = None
+        self.rows = 0
+        self.black_bytes = 0
+        self._buffer = b''
+        self._header_written = False
+
+    def feed(self, data):
+        self._buffer += data
+        if self.kind is None and len(self._buffer) >= 2:
+            self.kind = 'pbm' if self._buffer.startswith(b'P4') else 'pcl'
+        if self.kind == 'pbm':
+            self._feed_pbm()
+        elif self.kind == 'pcl':
+            self._feed_pcl()
+
+    def _feed_pbm(self):
+        if self.row_bytes is None:
+            # Başlık: P4, yorumlar, genişlik yükseklik, tek boşluk
+            match = re.match(rb'P4\s+(?:#[^\n]*\n\s*)*(\d+)\s+(\d+)\s', self._buffer)
+            if match is None:
+                return
+            self._set_size(int(match.group(1)), int(match.group(2)))
+            self._buffer = self._buffer[match.end():]
+        complete = len(self._buffer) // self.row_bytes
+        if complete:
+            self._emit_rows(self._buffer[:complete * self.row_bytes], complete)
+            self._buffer = self._buffer[complete * self.row_bytes:]
+
+    def _feed_pcl(self):
+        if self.row_bytes is None:
+            sizes = dict((kind, int(value)) for value, kind in PCL_SIZE.findall(self._buffer))
+            if b'S' not in sizes or b'T' not in sizes:
+                return
+            self._set_size(sizes[b'S'], sizes[b'T'])
+        # Arabellek satır başına kesilmez, yalnızca sonda bir kez kırpılır
+        position = 0
+        while True:
+            match = PCL_ROW.search(self._buffer, position)
+            if match is None or len(self._buffer) < match.end() + int(match.group(1)):
+                # Satırın tamamı henüz gelmedi
+                break
+            end = match.end() + int(match.group(1))
+            self._emit_rows(self._buffer[match.end():end].ljust(self.row_bytes, b'\0'), 1)
+            position = end
+        self._buffer = self._buffer[position:]
+
+    def _set_size(self, width, height):
+        self.width, self.height = width, height
+        self.row_bytes = (width + 7) // 8
+
+    def _emit_rows(self, data, count):
+        self.rows += count
+        self.black_bytes += len(data) - data.count(b'\0')
+        if self.output is not None:
+            if not self._header_written:
+                self.output.write(b'P4\n%d %d\n' % (self.width, self.height))
+                self._header_written = True
+            self.output.write(data)
+        if self.line_delay:
+            # Yavaş yazıcı: satır başına yazma süresi
+            time.sleep(self.line_delay * count)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Yerel termal yazıcı taklidi")
+    parser.add_argument('--output', help="Alınan raster'ı PBM olarak kaydet")
+    parser.add_argument('--line-delay', type=float, default=0.0,
+                        help="Satır başına bekleme (ms), yavaş yazıcıyı taklit eder")
+    args = parser.parse_args()
+
+    output = open(args.output, 'wb') if args.output else None
+    sink = RasterSink(output, args.line_delay)
+    start = time.perf_counter()
+    first_byte = None
+    total = 0
+    stream = sys.stdin.buffer
+    while True:
+        data = stream.read1(READ_SIZE)
+        if not data:
+            break
+        if first_byte is None:
+            first_byte = time.perf_counter() - start
+        total += len(data)
+        sink.feed(data)
+    elapsed = time.perf_counter() - start
+    if output is not None:
+        output.close()
+
+    peak = ''
+    try:
+        # ru_maxrss fork sonrası üst sürecin değerini taşır; VmHWM yalnızca bu sürece aittir
+        with open('/proc/self/status') as status:
+            hwm = next(line for line in status if line.startswith('VmHWM'))
+        peak = f", en yüksek bellek {int(hwm.split()[1]) // 1024} MB"
+    except (OSError, StopIteration):
+        pass
+    print(f"{sink.kind or '-'}: {sink.width}x{sink.height}, {sink.rows} satır, {total} bayt, "
+          f"ilk bayt {1000 * (first_byte or 0):.1f} ms, toplam {elapsed:.2f} sn{peak}",
+          file=sys.stderr)
+    complete = sink.height is not None and sink.rows == sink.height
+    sys.exit(0 if complete else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -87,3 +87,25 @@ class LabeledSlider(QWidget):
             logging.debug(f"Değer ayarlandı: {self.name} = {value}")
         except Exception as e:
             logging.error(f"Değer ayarlama hatası: {str(e)}")
+
+    def reconfigure(self, name, min_val, max_val, value, step=1, decimals=1):
+        """Etiket, aralık ve değeri sinyal göndermeden değiştir (birim değişimi için)"""
+        self.name = name
+        self.step = step
+        self.decimals = decimals
+        self.label.setText(name)
+        value = min(max(value, min_val), max_val)
+        self.slider.blockSignals(True)
+        self.spin.blockSignals(True)
+        try:
+            # Ondalık sayısı aralıktan önce ayarlanmalı, yoksa sınırlar yuvarlanır
+            self.spin.setDecimals(decimals)
+            self.spin.setRange(min_val, max_val)
+            self.spin.setSingleStep(step)
+            self.spin.setValue(value)
+            self.slider.setRange(int(min_val * (10 ** decimals)), int(max_val * (10 ** decimals)))
+            self.slider.setValue(int(round(value * (10 ** decimals))))
+        finally:
+            self.slider.blockSignals(False)
+            self.spin.blockSignals(False)
+        self._last_value = self.spin.value()
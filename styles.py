@@ -86,4 +86,17 @@ class DarkTheme:
             height: 12px;
             background: #ffffff;
         }
+        QTabWidget::pane {
+            border: none;
+        }
+        QTabBar::tab {
+            background-color: #2d2d2d;
+            color: #ffffff;
+            padding: 6px 12px;
+            border-top-left-radius: 4px;
+            border-top-right-radius: 4px;
+        }
+        QTabBar::tab:selected {
+            background-color: #3d3d3d;
+        }
     """
\ No newline at end of file
@@ -0,0 +1,58 @@
+from PyQt6.QtCore import QThread, pyqtSignal
+import logging
+
+from core.cancellation import CancellationToken
+from core.tiled_renderer import TiledStencilRenderer
+
+
+class TiledRenderThread(QThread):
+    """Büyük görüntüyü karo karo dönüştüren thread"""
+    progress = pyqtSignal(int)
+    completed = pyqtSignal(bool)
+
+    def __init__(self, input_path, output_path, stencil_type, settings):
+        super().__init__()
+        self.input_path = input_path
+        self.output_path = output_path
+        self.stencil_type = stencil_type
+        self.settings = dict(settings)
+        self.token = CancellationToken()
+
+    def cancel(self):
+        self.token.cancel()
+
+    def run(self):
+        try:
+            logging.info(f"Büyük görüntü dönüştürülüyor: {self.input_path} -> {self.output_path}")
+            ok = TiledStencilRenderer.convert_file(
+                self.input_path, self.output_path, self.stencil_type, self.settings,
+                self.token, lambda fraction: self.progress.emit(int(fraction * 100))
+            )
+            self.completed.emit(ok and not self.token.cancelled)
+        finally:
+            self.token.close()
+
+
+def convert_large_image(input_path, output_path, stencil_type, settings, parent=None):
+    """Karolu dönüştürmeyi ilerleme penceresiyle başlat"""
+    from PyQt6.QtWidgets import QProgressDialog, QMessageBox
+    from PyQt6.QtCore import Qt
+
+    progress = QProgressDialog("Büyük görüntü dönüştürülüyor...", "İptal", 0, 100, parent)
+    progress.setWindowModality(Qt.WindowModality.WindowModal)
+
+    thread = TiledRenderThread(input_path, output_path, stencil_type, settings)
+
+    def conversion_finished(success):
+        progress.close()
+        if success:
+            QMessageBox.information(parent, "Başarılı", f"Stencil kaydedildi: {output_path}")
+        elif not thread.token.cancelled:
+            QMessageBox.critical(parent, "Hata", "Büyük görüntü dönüştürülemedi, ayrıntılar günlükte.")
+
+    thread.progress.connect(progress.setValue)
+    thread.completed.connect(conversion_finished)
+    progress.canceled.connect(thread.cancel)
+    thread.start()
+
+    return thread
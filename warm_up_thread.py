@@ -0,0 +1,80 @@
+from PyQt6.QtCore import QThread, pyqtSignal
+from concurrent.futures import TimeoutError as FutureTimeoutError
+import logging
+import threading
+import time
+import traceback
+
+from core.cancellation import CancellationToken
+
+
+class WarmUpThread(QThread):
+    """Son kullanılan stencil tipini arka planda ısındıran thread
+
+    Worker süreçleri başlatılır ve tipin işlemcisi küçük bir sahte girdiyle
+    çalıştırılır; böylece ilk çizimde bu maliyet ödenmez. Render başlarken cancel() çağrılır: kuyruktaki ısınma işleri
+    geri alınır, süren iş token ile aşama aralarında durur.
+    """
+    completed = pyqtSignal(bool)
+
+    # Worker durumunun okunma aralığı (sn)
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, worker_pool, stencil_type, settings, parent=None):
+        super().__init__(parent)
+        self.worker_pool = worker_pool
+        self.stencil_type = stencil_type
+        self.settings = dict(settings)
+        self.token = CancellationToken()
+        # Token'ı hâlâ okuyan işlerin sayısı; cancel ile kapatma yarışmasın diye kilitli
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        with self._lock:
+            self.token.cancel()
+
+    def _release(self, future=None):
+        """Son iş bittiğinde token'ı kapat
+
+        İptalde run() süren işleri beklemeden döner; worker'lar bayrağı
+        okumayı sürdürdüğünden paylaşılan bellek ancak o zaman silinir.
+        """
+        with self._lock:
+            self._pending -= 1
+            if self._pending == 0:
+                self.token.close()
+
+    def run(self):
+        start = time.perf_counter()
+        futures = []
+        try:
+            futures = self.worker_pool.warm_up(self.stencil_type, self.settings, self.token)
+            ok = True
+            for future in futures:
+                while not self.token.cancelled:
+                    try:
+                        ok = future.result(timeout=self.POLL_INTERVAL) and ok
+                        break
+                    except FutureTimeoutError:
+                        pass
+            if self.token.cancelled:
+                # Başlamamış işler geri alınır, süren iş token ile durur
+                for future in futures:
+                    future.cancel()
+                logging.info(f"Isınma iptal edildi ({self.stencil_type})")
+                self.completed.emit(False)
+                return
+            logging.info(f"Isınma tamamlandı ({self.stencil_type}): "
+                         f"{1000 * (time.perf_counter() - start):.0f} ms")
+            self.completed.emit(ok)
+        except Exception as e:
+            logging.error(f"Isınma hatası: {str(e)}")
+            logging.debug(traceback.format_exc())
+            self.completed.emit(False)
+        finally:
+            # Bitmiş işlerin geri çağrısı hemen çalışır; thread'in payı en son bırakılır
+            self._pending = len(futures) + 1
+            for future in futures:
+                future.add_done_callback(self._release)
+            self._release()
@@ -1,9 +1,40 @@
-from PyQt6.QtWidgets import QLabel, QWidget, QVBoxLayout, QTextEdit, QComboBox
+from PyQt6.QtWidgets import (QLabel, QWidget, QVBoxLayout, QTextEdit, QComboBox,
+                             QGraphicsView, QGraphicsScene, QGraphicsItem)
 from PyQt6.QtCore import Qt, QRectF
 from PyQt6.QtGui import QPainter, QPen, QColor, QImage, QPixmap
+from PyQt6 import sip
+from collections import OrderedDict
 import logging
+import math
+import time
 import cv2
+import numpy as np
 from utils import QTextEditLogger
+from core.image_pyramid import ImagePyramid
+
+def array_to_qimage(image):
+    """uint8 diziyi kopyalamadan QImage'a sar (satır adımı diziden alınır)
+
+    Dönen QImage dizinin belleğini kullanır; dizi yaşadığı sürece geçerlidir.
+    Dizi önce dönüştürülmesi gerekiyorsa (uint8 dışı tip, bitişik olmayan
+    satır, BGRA) yerel kopya fonksiyondan sağ çıkmadığından QImage kopyalanır.
+    """
+    if image.ndim == 3 and image.shape[2] == 4:
+        image = cv2.cvtColor(np.ascontiguousarray(image, dtype=np.uint8), cv2.COLOR_BGRA2BGR)
+        owned = True
+    else:
+        owned = False
+    channels = 1 if image.ndim == 2 else image.shape[2]
+    # Satır içindeki pikseller bitişik olmalı; satırlar arası adım serbest
+    if (image.dtype != np.uint8 or image.strides[0] <= 0
+            or image.strides[1] != channels or image.strides[-1] != 1):
+        image = np.ascontiguousarray(image, dtype=np.uint8)
+        owned = True
+    image_format = (QImage.Format.Format_BGR888 if channels == 3
+                    else QImage.Format.Format_Grayscale8)
+    qimage = QImage(sip.voidptr(image.ctypes.data), image.shape[1], image.shape[0],
+                    image.strides[0], image_format)
+    return qimage.copy() if owned else qimage
 
 class ImageCropWidget(QLabel):
     """Ana görüntü gösterme alanı"""
@@ -19,37 +50,184 @@ class ImageCropWidget(QLabel):
                 border-radius: 4px;
             }
         """)
+        self._source = None
+        self._cached_size = None
 
     def display_image(self, image):
         try:
-            if len(image.shape) == 3:
-                rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-            else:
-                rgb_image = image
-                
-            h, w = rgb_image.shape[:2]
-            label_w = self.width()
-            label_h = self.height()
-            
-            scale = min(label_w/w, label_h/h)
-            new_w = int(w * scale)
-            new_h = int(h * scale)
+            start = time.perf_counter()
+            if image is not self._source:
+                self._source = image
+                self._cached_size = None
+            self._update_pixmap()
             
-            bytes_per_line = 3 * w if len(image.shape) == 3 else w
+            h, w = image.shape[:2]
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            logging.info(f"Görüntü başarıyla gösterildi: {w}x{h} ({elapsed_ms:.1f} ms)")
             
-            qt_image = QImage(rgb_image.data, w, h, bytes_per_line,
-                            QImage.Format.Format_RGB888 if len(image.shape) == 3 
-                            else QImage.Format.Format_Grayscale8)
+        except Exception as e:
+            logging.error(f"Görüntü gösterme hatası: {str(e)}")
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self._source is not None:
+            self._update_pixmap()
+
+    def _update_pixmap(self):
+        """Görüntüyü önce widget boyutuna küçült, sonra yalnızca o boyutta dönüştür"""
+        rect = self.contentsRect()
+        target = (rect.width(), rect.height())
+        # Görüntü ve widget boyutu değişmediyse önbellekteki pixmap geçerli
+        if target == self._cached_size or min(target) <= 0:
+            return
             
-            pixmap = QPixmap.fromImage(qt_image)
-            scaled_pixmap = pixmap.scaled(new_w, new_h, 
-                                        Qt.AspectRatioMode.KeepAspectRatio,
-                                        Qt.TransformationMode.SmoothTransformation)
-            self.setPixmap(scaled_pixmap)
-            logging.info(f"Görüntü başarıyla gösterildi: {w}x{h}")
+        image = self._source
+        h, w = image.shape[:2]
+        scale = min(target[0] / w, target[1] / h)
+        new_w = max(1, int(w * scale))
+        new_h = max(1, int(h * scale))
+        
+        if (new_w, new_h) != (w, h):
+            interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+            image = cv2.resize(image, (new_w, new_h), interpolation=interpolation)
             
+        # fromImage veriyi kopyalar; numpy tamponu bundan sonra serbest kalabilir
+        self.setPixmap(QPixmap.fromImage(array_to_qimage(image)))
+        self._cached_size = target
+
+class PyramidImageItem(QGraphicsItem):
+    """Yalnızca görünen karoları, ekran ölçeğine uygun piramit seviyesinden çizer"""
+    def __init__(self, view):
+        super().__init__()
+        self.view = view
+        pyramid = view.pyramid
+        self._rect = QRectF(0, 0, pyramid.width, pyramid.height)
+        # exposedRect'in doldurulması için gerekli
+        self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemUsesExtendedStyleOption)
+
+    def boundingRect(self):
+        return self._rect
+
+    def paint(self, painter, option, widget=None):
+        pyramid = self.view.pyramid
+        scale = painter.worldTransform().m11()
+        level = pyramid.level_for_scale(scale)
+        factor = 2 ** level
+        step = pyramid.tile_size * factor
+        columns, rows = pyramid.tile_grid(level)
+        
+        # Küçültürken yumuşat, %100 üstünde pikselleri olduğu gibi göster
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, scale < 1.0)
+        
+        exposed = option.exposedRect.intersected(self._rect)
+        first_col = max(0, int(exposed.left() // step))
+        last_col = min(columns - 1, int(math.ceil(exposed.right() / step)))
+        first_row = max(0, int(exposed.top() // step))
+        last_row = min(rows - 1, int(math.ceil(exposed.bottom() / step)))
+        
+        for row in range(first_row, last_row + 1):
+            for column in range(first_col, last_col + 1):
+                pixmap = self.view.tile_pixmap(level, column, row)
+                target = QRectF(column * step, row * step,
+                                pixmap.width() * factor, pixmap.height() * factor)
+                painter.drawPixmap(target, pixmap, QRectF(pixmap.rect()))
+
+class PyramidImageView(QGraphicsView):
+    """Büyük stencil'ler için piramit ve karo önbelleği destekli yakınlaştırma görünümü
+
+    Tekerlek ile yakınlaştırılır, sürükleyerek kaydırılır; çift tıklama
+    pencereye sığdırma ile %100 arasında geçiş yapar.
+    """
+    MAX_CACHED_TILES = 256
+    MAX_ZOOM = 16.0
+    
+    def __init__(self):
+        super().__init__()
+        self.setScene(QGraphicsScene(self))
+        self.setDragMode(QGraphicsView.DragMode.ScrollHandDrag)
+        self.setTransformationAnchor(QGraphicsView.ViewportAnchor.AnchorUnderMouse)
+        self.setViewportUpdateMode(QGraphicsView.ViewportUpdateMode.SmartViewportUpdate)
+        self.setBackgroundBrush(QColor("#1a1a1a"))
+        self.setStyleSheet("""
+            QGraphicsView {
+                border: 2px solid #2d2d2d;
+                border-radius: 4px;
+            }
+        """)
+        self.pyramid = None
+        self._source = None
+        self._item = None
+        self._fit = True
+        self._tiles = OrderedDict()
+
+    def set_image(self, image):
+        """Görüntüyü değiştir; piramit seviyeleri gerektiğinde oluşturulur"""
+        try:
+            if image is self._source:
+                return
+            self._source = image
+            self._tiles.clear()
+            self.scene().clear()
+            self.pyramid = ImagePyramid(image)
+            self._item = PyramidImageItem(self)
+            self.scene().addItem(self._item)
+            self.scene().setSceneRect(self._item.boundingRect())
+            if self._fit:
+                self.fit_to_window()
         except Exception as e:
-            logging.error(f"Görüntü gösterme hatası: {str(e)}")
+            logging.error(f"Yakınlaştırma görünümü hatası: {str(e)}")
+
+    def tile_pixmap(self, level, column, row):
+        """Karoyu önbellekten al ya da oluştur (LRU)"""
+        key = (level, column, row)
+        pixmap = self._tiles.get(key)
+        if pixmap is not None:
+            self._tiles.move_to_end(key)
+            return pixmap
+            
+        tile = self.pyramid.tile(level, column, row)
+        pixmap = QPixmap.fromImage(array_to_qimage(tile))
+        self._tiles[key] = pixmap
+        if len(self._tiles) > self.MAX_CACHED_TILES:
+            self._tiles.popitem(last=False)
+        return pixmap
+
+    def zoom(self):
+        return self.transform().m11()
+
+    def fit_to_window(self):
+        self._fit = True
+        if self._item is not None:
+            self.fitInView(self._item, Qt.AspectRatioMode.KeepAspectRatio)
+
+    def actual_size(self):
+        """%100 yakınlaştırma"""
+        self._fit = False
+        self.resetTransform()
+
+    def wheelEvent(self, event):
+        if self._item is None:
+            return
+        factor = 1.25 ** (event.angleDelta().y() / 120)
+        # Sığdırma ölçeğinin altına ve MAX_ZOOM üstüne çıkma
+        view = self.viewport().rect()
+        fit_zoom = min(view.width() / self.pyramid.width, view.height() / self.pyramid.height)
+        new_zoom = max(min(fit_zoom, 1.0), min(self.zoom() * factor, self.MAX_ZOOM))
+        ratio = new_zoom / self.zoom()
+        self._fit = False
+        self.scale(ratio, ratio)
+
+    def mouseDoubleClickEvent(self, event):
+        if self._fit:
+            self.actual_size()
+            self.centerOn(self.mapToScene(event.position().toPoint()))
+        else:
+            self.fit_to_window()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self._fit:
+            self.fit_to_window()
 
 class ConsoleWidget(QWidget):
     """Konsol penceresi"""